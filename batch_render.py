@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""Génération en masse des statuts à partir d'un export client JSON ou NDJSON.
+
+Les enregistrements sont lus en flux, regroupés par lots et rendus sur un pool
+de processus. Le template compilé est placé dans le magasin projeté en mémoire
+(voir ``template_store.py``) : tous les processus partagent les mêmes pages au
+lieu d'en charger chacun une copie. Les documents sont écrits dans un dossier ou
+dans une archive .zip unique.
+
+Exemples :
+    python batch_render.py clients.ndjson --output out/
+    python batch_render.py clients.ndjson --output statuts.zip --workers 8 --chunk-size 64
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Iterable, Iterator, Mapping
+
+from statuts_payload import build_payload
+from template_compiler import DEFAULT_CACHE_DIR, CompiledTemplate
+from template_store import STORE_NAME, TemplateStore, ensure_store
+
+DEFAULT_TEMPLATE = "Templates/template-statuts-final.docx"
+
+_store: TemplateStore | None = None
+_template: CompiledTemplate | None = None
+
+
+def iter_records(path: str) -> Iterator[dict[str, Any]]:
+    """Lit un fichier NDJSON ligne à ligne ; un tableau JSON (``.json``) est aussi accepté."""
+
+    with open(path, encoding="utf-8") as handle:
+        if path.endswith(".json"):
+            yield from json.load(handle)
+            return
+        for line in handle:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def chunked(iterable: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def slugify(value: str) -> str:
+    ascii_value = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^A-Za-z0-9]+", "-", ascii_value).strip("-") or "document"
+
+
+def document_name(index: int, payload: dict[str, Any]) -> str:
+    return f"Statuts-{slugify(str(payload.get('denomination') or ''))}-{index:06d}.docx"
+
+
+def _init_worker(store_path: str, template_path: str) -> None:
+    global _store, _template
+    _store = TemplateStore(store_path)
+    _template = _store.template(template_path)
+
+
+def render_chunk(start: int, records: list[Mapping[str, Any]], directory: str | None, strict: bool) -> list[tuple[int, str, bytes | None, str | None]]:
+    """Rend un lot dans un processus du pool.
+
+    Retourne ``(index, nom, octets, erreur)`` ; les octets sont ``None`` lorsque le
+    document a déjà été écrit dans ``directory``.
+    """
+
+    results = []
+    for index, record in enumerate(records, start):
+        try:
+            payload = build_payload(record)
+            name = document_name(index, payload)
+            if directory is None:
+                results.append((index, name, _template.render_bytes(payload, strict), None))
+                continue
+            path = os.path.join(directory, name)
+            # Rendu dans un fichier voisin puis renommé : un échec en cours de
+            # rendu ne laisse pas de .docx tronqué à côté du rapport d'erreurs
+            temporary = f"{path}.tmp"
+            try:
+                with open(temporary, "wb") as output:
+                    _template.render(payload, output, strict)
+                os.replace(temporary, path)
+            except BaseException:
+                if os.path.exists(temporary):
+                    os.unlink(temporary)
+                raise
+            results.append((index, name, None, None))
+        except Exception as exc:  # un enregistrement invalide ne doit pas arrêter le lot
+            results.append((index, f"#{index}", None, f"{type(exc).__name__}: {exc}"))
+    return results
+
+
+def run(
+    input_path: str | Iterable[Mapping[str, Any]],
+    output: str,
+    template_path: str = DEFAULT_TEMPLATE,
+    workers: int | None = None,
+    chunk_size: int = 32,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    strict: bool = True,
+) -> dict[str, Any]:
+    """Génère tous les documents et retourne un rapport (compteurs, débit, erreurs).
+
+    ``input_path`` est un export client, ou directement un itérable
+    d'enregistrements (par exemple ``payload_loader.iter_records``).
+    """
+
+    workers = workers or os.cpu_count() or 1
+    # Compilation (si besoin) dans le processus parent : les workers projettent le magasin
+    store_path = str(ensure_store([template_path], os.path.join(cache_dir, STORE_NAME)))
+
+    to_zip = output.endswith(".zip")
+    directory = None if to_zip else output
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    archive = zipfile.ZipFile(output, "w", zipfile.ZIP_STORED) if to_zip else None
+
+    rendered = 0
+    errors: list[str] = []
+    started = time.perf_counter()
+
+    def collect(future: Future) -> None:
+        nonlocal rendered
+        for _index, name, data, error in future.result():
+            if error:
+                errors.append(f"{name}: {error}")
+                continue
+            if archive is not None:
+                # Un .docx est déjà compressé : stockage simple dans l'archive
+                archive.writestr(name, data)
+            rendered += 1
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(store_path, template_path)) as pool:
+            pending: set[Future] = set()
+            start = 0
+            records = iter_records(input_path) if isinstance(input_path, str) else input_path
+            for chunk in chunked(records, chunk_size):
+                # Nombre de lots en vol borné : la mémoire reste constante quelle que soit la taille de l'export
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future)
+                pending.add(pool.submit(render_chunk, start, chunk, directory, strict))
+                start += len(chunk)
+            for future in pending:
+                collect(future)
+    finally:
+        if archive is not None:
+            archive.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "documents": rendered,
+        "errors": errors,
+        "seconds": elapsed,
+        "documents_per_second": rendered / elapsed if elapsed else 0.0,
+        "workers": workers,
+        "chunk_size": chunk_size,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="export client (.ndjson, ou tableau .json)")
+    parser.add_argument("--output", required=True, help="dossier de sortie, ou fichier .zip")
+    parser.add_argument("--template", default=DEFAULT_TEMPLATE)
+    parser.add_argument("--workers", type=int, default=None, help="processus de rendu (défaut : nombre de cœurs)")
+    parser.add_argument("--chunk-size", type=int, default=32, help="enregistrements par lot envoyé à un processus")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--lenient", action="store_true", help="placeholders manquants rendus vides")
+    args = parser.parse_args()
+
+    report = run(
+        args.input,
+        args.output,
+        template_path=args.template,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        cache_dir=args.cache_dir,
+        strict=not args.lenient,
+    )
+
+    for error in report["errors"][:20]:
+        print(f"❌ {error}", file=sys.stderr)
+    print(
+        f"✅ {report['documents']} documents en {report['seconds']:.2f} s "
+        f"({report['documents_per_second']:.1f} doc/s, {report['workers']} workers, lots de {report['chunk_size']})"
+    )
+    if report["errors"]:
+        print(f"⚠️  {len(report['errors'])} enregistrements en erreur", file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
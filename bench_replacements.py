@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Benchmark : boucle ``str.replace`` historique vs table compilée en une passe.
+
+Exemple :
+    python bench_replacements.py --paragraphs 20000 --extra-patterns 300
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from improved_template import REPLACEMENTS
+from replacement_engine import apply_sequential, compile_replacements
+
+FILLER = (
+    "Les associés sont réunis en assemblée au moins une fois par an pour l'approbation des comptes. "
+    "Chaque action donne droit à une voix."
+)
+
+
+def build_replacements(extra_patterns: int) -> list[tuple[str, str]]:
+    """Table réelle suivie de motifs fictifs pour simuler une table volumineuse."""
+
+    extra = [(f"Clause type n°{index:04d}", f"{{{{clause_{index:04d}}}}}") for index in range(extra_patterns)]
+    return list(REPLACEMENTS) + extra
+
+
+def build_paragraphs(count: int, replacements: list[tuple[str, str]], seed: int = 42) -> list[str]:
+    rng = random.Random(seed)
+    searches = [search for search, _ in replacements]
+    paragraphs = []
+    for _ in range(count):
+        if rng.random() < 0.3:
+            paragraphs.append(f"{FILLER} {rng.choice(searches)} {FILLER}")
+        else:
+            paragraphs.append(FILLER)
+    return paragraphs
+
+
+def timed(label: str, func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<12} {best * 1000:10.2f} ms")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", type=int, default=10000)
+    parser.add_argument("--extra-patterns", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    replacements = build_replacements(args.extra_patterns)
+    paragraphs = build_paragraphs(args.paragraphs, replacements)
+    matcher = compile_replacements(replacements)
+
+    expected = [apply_sequential(text, replacements) for text in paragraphs]
+    actual = [matcher.sub(text) for text in paragraphs]
+    if expected != actual:
+        raise SystemExit("❌ Les deux moteurs ne produisent pas le même résultat")
+
+    print(f"📊 {len(paragraphs)} paragraphes, {len(replacements)} motifs (meilleur de {args.repeat})")
+    sequential = timed("séquentiel", lambda: [apply_sequential(text, replacements) for text in paragraphs], args.repeat)
+    compiled = timed("compilé", lambda: [matcher.sub(text) for text in paragraphs], args.repeat)
+    print(f"  gain         x{sequential / compiled:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""Benchmark du pipeline de templates sur des statuts synthétiques de 10, 100 et 1000 pages.
+
+Les documents sont générés à partir de la spec de ``create_clean_template.py`` :
+les articles sont répétés jusqu'à la taille voulue et chaque article reçoit un
+paragraphe contenant des valeurs de ``improved_template.REPLACEMENTS``. Chaque
+taille est mesurée dans un processus neuf pour isoler le pic de mémoire (RSS).
+
+Étapes chronométrées séparément (meilleur de ``--repeat``) :
+    load     Document(chemin)
+    replace  apply_replacements(iter_paragraphs(document))
+    save     document.save(...)
+    repack   docx_repack.save_document(...) (parties inchangées recopiées compressées)
+    stream   rewrite_docx(...) (chemin XML en flux, sans python-docx)
+
+Exemples :
+    python bench_templates.py --output bench/HEAD.json
+    python bench_templates.py --pages 10 100 --baseline bench/main.json --threshold 0.25
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any
+
+from template_compiler import DEFAULT_CACHE_DIR
+
+FIXTURES_DIR = os.path.join(DEFAULT_CACHE_DIR, "bench")
+PARAGRAPHS_PER_PAGE = 30
+DEFAULT_PAGES = (10, 100, 1000)
+TIMED_STAGES = ("load_s", "replace_s", "save_s", "repack_s", "stream_s")
+
+
+def synthetic_spec(pages: int) -> dict[str, Any]:
+    from create_clean_template import SPEC_PATH
+    from improved_template import REPLACEMENTS
+    from template_spec import load_spec
+
+    spec = load_spec(SPEC_PATH)
+    articles = [block for block in spec["blocks"] if isinstance(block, dict) and "article" in block]
+    searches = [search for search, _ in REPLACEMENTS]
+
+    blocks: list[Any] = []
+    paragraphs = 0
+    index = 0
+    while paragraphs < pages * PARAGRAPHS_PER_PAGE:
+        article = articles[index % len(articles)]
+        legacy = f"Il est précisé que {searches[index % len(searches)]} figure au présent article."
+        blocks.append({"article": article["article"], "body": [*article["body"], legacy]})
+        paragraphs += len(article["body"]) + 3
+        index += 1
+    return {**spec, "blocks": blocks}
+
+
+def fixture_path(pages: int) -> str:
+    """Document synthétique de ``pages`` pages (généré une fois, puis réutilisé).
+
+    Le nom du fichier contient une empreinte de la spec synthétique et de
+    ``REPLACEMENTS`` : modifier l'une ou l'autre régénère la fixture.
+    """
+
+    from improved_template import REPLACEMENTS
+    from template_spec import TemplateBuilder
+
+    spec = synthetic_spec(pages)
+    digest = hashlib.sha256()
+    digest.update(json.dumps(spec, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    digest.update(json.dumps(REPLACEMENTS, ensure_ascii=False).encode("utf-8"))
+    path = os.path.join(FIXTURES_DIR, f"statuts-{pages}p-{digest.hexdigest()[:12]}.docx")
+    if not os.path.exists(path):
+        os.makedirs(FIXTURES_DIR, exist_ok=True)
+        TemplateBuilder(spec).build().save(path)
+    return path
+
+
+def measure(path: str, repeat: int) -> dict[str, Any]:
+    """Exécuté dans un processus dédié : temps par étape et pic de RSS."""
+
+    from docx import Document
+
+    from docx_paragraphs import iter_paragraphs
+    from docx_repack import save_document
+    from docx_stream import rewrite_docx
+    from improved_template import REPLACEMENT_MATCHER, apply_replacements, object_social_text
+
+    best = dict.fromkeys(TIMED_STAGES, float("inf"))
+    paragraphs = 0
+    with tempfile.TemporaryDirectory() as directory:
+        streamed = os.path.join(directory, "stream.docx")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            document = Document(path)
+            best["load_s"] = min(best["load_s"], time.perf_counter() - start)
+
+            start = time.perf_counter()
+            visited = list(iter_paragraphs(document))
+            apply_replacements(visited)
+            best["replace_s"] = min(best["replace_s"], time.perf_counter() - start)
+            paragraphs = len(visited)
+
+            start = time.perf_counter()
+            document.save(io.BytesIO())
+            best["save_s"] = min(best["save_s"], time.perf_counter() - start)
+
+            start = time.perf_counter()
+            save_document(document, path, io.BytesIO())
+            best["repack_s"] = min(best["repack_s"], time.perf_counter() - start)
+
+            start = time.perf_counter()
+            rewrite_docx(path, streamed, REPLACEMENT_MATCHER, paragraph_hook=object_social_text)
+            best["stream_s"] = min(best["stream_s"], time.perf_counter() - start)
+
+    return {
+        **best,
+        "paragraphs": paragraphs,
+        "file_bytes": os.path.getsize(path),
+        # ru_maxrss est en kilo-octets sous Linux, en octets sous macOS
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == "darwin" else 1),
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(pages_list: list[int], repeat: int) -> dict[str, Any]:
+    results = {}
+    for pages in pages_list:
+        path = fixture_path(pages)
+        # Processus neuf par taille : le pic de RSS ne dépend pas des tailles précédentes
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            results[str(pages)] = pool.submit(measure, path, repeat).result()
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """Liste les étapes plus lentes que la référence de plus de ``threshold`` (0.2 = +20 %)."""
+
+    regressions = []
+    for pages, metrics in current["results"].items():
+        reference = baseline.get("results", {}).get(pages)
+        if not reference:
+            continue
+        for stage in (*TIMED_STAGES, "peak_rss_kb"):
+            old, new = reference.get(stage), metrics.get(stage)
+            if old and new and new > old * (1 + threshold):
+                regressions.append(f"{pages} pages / {stage} : {old:.4g} → {new:.4g} (+{(new / old - 1) * 100:.0f} %)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=list(DEFAULT_PAGES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="fichier JSON des résultats")
+    parser.add_argument("--baseline", help="résultats JSON de référence (autre commit)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="ralentissement toléré (0.2 = +20 %%)")
+    args = parser.parse_args()
+
+    report = run(args.pages, args.repeat)
+    print(f"📊 révision {report['revision']} (meilleur de {args.repeat})")
+    print(f"  {'pages':>6} {'§':>7} {'load':>9} {'replace':>9} {'save':>9} {'repack':>9} {'stream':>9} {'RSS':>9}")
+    for pages, metrics in report["results"].items():
+        print(
+            f"  {pages:>6} {metrics['paragraphs']:>7} "
+            + " ".join(f"{metrics[stage] * 1000:>7.1f}ms" for stage in TIMED_STAGES)
+            + f" {metrics['peak_rss_kb'] / 1024:>7.1f}Mo"
+        )
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"💾 Résultats : {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        regressions = compare(report, baseline, args.threshold)
+        for regression in regressions:
+            print(f"❌ Régression : {regression}", file=sys.stderr)
+        if regressions:
+            raise SystemExit(1)
+        print(f"✅ Aucune régression au-delà de {args.threshold:.0%} par rapport à {baseline.get('revision')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""Reconstruction incrémentale des templates .docx du dépôt.
+
+Chaque template produit est une cible du graphe ci-dessous. Pour chaque cible on
+enregistre le hash de ses entrées (documents sources, specs), de sa
+configuration (table de remplacements) et des scripts qui la produisent ; une
+cible n'est reconstruite que si l'un de ces hash, ou le template produit
+lui-même, a changé. Les cibles indépendantes sont construites en parallèle.
+
+Cibles :
+    statuts-source   create_template.py    ~/Desktop/Statuts SAHEL TRANSPORT.docx → templates/template-statuts.docx
+    statuts-enrichi  improved_template.py  templates/template-statuts.docx → templates/template-statuts-enrichi.docx
+    spec:<nom>       template_spec.py      templates/specs/<nom>.json → sortie déclarée par la spec
+
+Exemples :
+    python build_templates.py
+    python build_templates.py spec:statuts-clean --force
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from create_clean_template import check_placeholders
+from template_compiler import DEFAULT_CACHE_DIR, file_hash
+
+STATE_PATH = os.path.join(DEFAULT_CACHE_DIR, "build-state.json")
+STATE_VERSION = 1
+
+# Scripts importés par chaque constructeur : en modifier un invalide ses cibles
+SHARED_SCRIPTS = ("replacement_engine.py", "template_metrics.py")
+DOCX_SCRIPTS = ("docx_paragraphs.py", "docx_stream.py", "docx_package.py", "docx_repack.py")
+SPEC_SCRIPTS = ("template_spec.py", *SHARED_SCRIPTS)
+SOURCE_SCRIPTS = ("create_template.py", *SHARED_SCRIPTS, *DOCX_SCRIPTS)
+ENRICHI_SCRIPTS = ("improved_template.py", *SHARED_SCRIPTS, *DOCX_SCRIPTS)
+
+
+@dataclass
+class Target:
+    name: str
+    output: str
+    inputs: list[str]
+    scripts: tuple[str, ...]
+    build: Callable[[], None]
+    config: Callable[[], Any] = lambda: None
+    deps: list[str] = field(default_factory=list)
+
+
+def _build_statuts_source() -> None:
+    subprocess.run([sys.executable, "create_template.py"], check=True, stdout=subprocess.DEVNULL)
+
+
+def _build_statuts_enrichi() -> None:
+    import improved_template
+
+    improved_template.build_template()
+
+
+def _enrichi_config() -> Any:
+    import improved_template
+
+    return [improved_template.REPLACEMENTS, improved_template.OBJECT_SOCIAL_PREFIXES]
+
+
+def _spec_builder(spec_path: str) -> Callable[[], None]:
+    def build() -> None:
+        from template_spec import build_from_spec
+
+        build_from_spec(spec_path)
+
+    return build
+
+
+def targets() -> dict[str, Target]:
+    """Graphe des cibles, dans un ordre compatible avec leurs dépendances."""
+
+    from template_spec import iter_spec_paths, load_spec
+
+    graph = {
+        "statuts-source": Target(
+            "statuts-source",
+            "templates/template-statuts.docx",
+            [os.path.expanduser("~/Desktop/Statuts SAHEL TRANSPORT.docx")],
+            SOURCE_SCRIPTS,
+            _build_statuts_source,
+        ),
+        "statuts-enrichi": Target(
+            "statuts-enrichi",
+            "templates/template-statuts-enrichi.docx",
+            ["templates/template-statuts.docx"],
+            ENRICHI_SCRIPTS,
+            _build_statuts_enrichi,
+            config=_enrichi_config,
+            deps=["statuts-source"],
+        ),
+    }
+    for spec_path in iter_spec_paths():
+        name = f"spec:{spec_path.stem}"
+        spec_file = spec_path.as_posix()
+        graph[name] = Target(name, load_spec(spec_path)["output"], [spec_file], SPEC_SCRIPTS, _spec_builder(spec_file))
+    return graph
+
+
+def config_hash(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def fingerprint(target: Target) -> dict[str, Any] | None:
+    """Hash des entrées, de la configuration et des scripts ; ``None`` si une entrée manque."""
+
+    if not all(os.path.exists(path) for path in target.inputs):
+        return None
+    return {
+        "inputs": {path: file_hash(path) for path in target.inputs},
+        "config": config_hash(target.config()),
+        "scripts": {path: file_hash(path) for path in target.scripts},
+    }
+
+
+def load_state(path: str = STATE_PATH) -> dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as handle:
+            state = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    return state.get("targets", {}) if state.get("version") == STATE_VERSION else {}
+
+
+def save_state(targets_state: dict[str, Any], path: str = STATE_PATH) -> None:
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(handle, "w", encoding="utf-8") as output:
+        json.dump({"version": STATE_VERSION, "targets": targets_state}, output, indent=2, ensure_ascii=False)
+    os.replace(temporary, path)
+
+
+def is_up_to_date(target: Target, current: dict[str, Any], recorded: dict[str, Any] | None) -> bool:
+    if not recorded or not os.path.exists(target.output):
+        return False
+    if any(recorded.get(key) != current[key] for key in ("inputs", "config", "scripts")):
+        return False
+    # Un template retouché à la main est régénéré
+    return recorded.get("output") == file_hash(target.output)
+
+
+def _run_target(name: str) -> tuple[str, float]:
+    started = time.perf_counter()
+    target = targets()[name]
+    Path(target.output).parent.mkdir(parents=True, exist_ok=True)
+    target.build()
+    return name, time.perf_counter() - started
+
+
+def build(selected: list[str] | None = None, force: bool = False, jobs: int | None = None, dry_run: bool = False) -> dict[str, str]:
+    """Reconstruit les cibles nécessaires ; retourne l'état de chaque cible examinée."""
+
+    # PLACEHOLDERS (payloads des statuts) doit suivre la spec du template propre
+    check_placeholders()
+
+    graph = targets()
+    unknown = [name for name in selected or () if name not in graph]
+    if unknown:
+        raise SystemExit(f"❌ Cible(s) inconnue(s) : {', '.join(unknown)}")
+
+    # Les dépendances des cibles demandées sont examinées aussi
+    wanted: list[str] = []
+
+    def add(name: str) -> None:
+        for dep in graph[name].deps:
+            add(dep)
+        if name not in wanted:
+            wanted.append(name)
+
+    for name in selected or graph:
+        add(name)
+
+    state = load_state()
+    results: dict[str, str] = {}
+    remaining = list(wanted)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while remaining:
+            # Une vague = les cibles dont toutes les dépendances sont traitées
+            wave = [name for name in remaining if all(dep in results for dep in graph[name].deps)]
+            remaining = [name for name in remaining if name not in wave]
+            to_build = []
+            for name in wave:
+                target = graph[name]
+                if any(results[dep] in ("échec", "ignorée") for dep in target.deps):
+                    results[name] = "ignorée"
+                    continue
+                if dry_run and any(results[dep] == "à reconstruire" for dep in target.deps):
+                    # La dépendance reconstruite changera les entrées de cette cible
+                    results[name] = "à reconstruire"
+                    continue
+                current = fingerprint(target)
+                if current is None:
+                    results[name] = "ignorée" if not os.path.exists(target.output) else "à jour"
+                    continue
+                if not force and is_up_to_date(target, current, state.get(name)):
+                    results[name] = "à jour"
+                    continue
+                to_build.append((name, current))
+
+            if dry_run:
+                results.update((name, "à reconstruire") for name, _ in to_build)
+                continue
+
+            if len(to_build) == 1:
+                futures = [(to_build[0], None)]
+            else:
+                futures = [((name, current), pool.submit(_run_target, name)) for name, current in to_build]
+
+            for (name, current), future in futures:
+                try:
+                    _, elapsed = future.result() if future else _run_target(name)
+                except Exception as exc:
+                    print(f"❌ {name} : {exc}", file=sys.stderr)
+                    results[name] = "échec"
+                    continue
+                # Les hash sont ceux relevés avant la construction : une entrée modifiée
+                # pendant le build provoquera une nouvelle reconstruction
+                state[name] = {**current, "output": file_hash(graph[name].output)}
+                results[name] = f"reconstruite ({elapsed * 1000:.0f} ms)"
+
+    if not dry_run:
+        save_state(state)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="*", help="cibles à construire (défaut : toutes)")
+    parser.add_argument("--force", action="store_true", help="reconstruit même les cibles à jour")
+    parser.add_argument("--jobs", type=int, default=None, help="constructions parallèles (défaut : nombre de cœurs)")
+    parser.add_argument("--dry-run", action="store_true", help="affiche ce qui serait reconstruit")
+    parser.add_argument("--list", action="store_true", help="liste les cibles")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, target in targets().items():
+            print(f"{name:<20} {target.output}")
+        return
+
+    started = time.perf_counter()
+    results = build(args.targets, args.force, args.jobs, args.dry_run)
+    for name, status in results.items():
+        print(f"  {name:<20} {status}")
+    print(f"⏱️  {time.perf_counter() - started:.2f} s")
+    if "échec" in results.values():
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,11 @@ Script pour transformer le document Word en template avec placeholders
 from docx import Document
 import os
 
+from docx_paragraphs import iter_paragraphs
+from docx_repack import save_document
+from replacement_engine import compile_replacements, replace_in_runs
+from template_metrics import flush, metrics
+
 # Chemins des fichiers
 input_file = os.path.expanduser("~/Desktop/Statuts SAHEL TRANSPORT.docx")
 output_file = "./templates/template-statuts.docx"
@@ -16,7 +21,8 @@ if not os.path.exists(input_file):
 
 # Charger le document
 print("📄 Chargement du document Word...")
-doc = Document(input_file)
+with metrics.timer("load"):
+    doc = Document(input_file)
 
 # Dictionnaire des remplacements
 replacements = {
@@ -37,9 +43,9 @@ replacements = {
     # DURÉE
     "99 ans": "{{duree_annees}} ans",
     
-    # EXERCICE
-    "31 décembre": "{{date_cloture}}",
+    # EXERCICE (la date complète doit précéder "31 décembre")
     "31 décembre 2025": "{{premier_exercice_fin}}",
+    "31 décembre": "{{date_cloture}}",
     
     # CAPITAL
     "0 000 €": "{{capital_social_formate}} €",
@@ -54,36 +60,31 @@ replacements = {
     "société par actions simplifiée unipersonnelle": "{{forme_juridique_complete}}",
     "S.A.S.U": "{{forme_juridique_sigle}}",
 }
+matcher = compile_replacements(replacements.items())
+matcher.track_hits()
 
 def replace_in_paragraph(paragraph):
     """Remplace le texte dans un paragraphe en préservant le formatage"""
-    for run in paragraph.runs:
-        for old_text, new_text in replacements.items():
-            if old_text in run.text:
-                run.text = run.text.replace(old_text, new_text)
+    metrics.incr("paragraphs_visited")
+    metrics.incr("replacements", replace_in_runs(paragraph, matcher))
 
-def replace_in_tables(tables):
-    """Remplace le texte dans les tableaux"""
-    for table in tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for paragraph in cell.paragraphs:
-                    replace_in_paragraph(paragraph)
-
-# Remplacer dans tous les paragraphes
+# Remplacer dans tous les paragraphes (corps, tableaux, en-têtes, pieds de page, notes)
 print("🔄 Remplacement des valeurs par des placeholders...")
-for paragraph in doc.paragraphs:
-    replace_in_paragraph(paragraph)
-
-# Remplacer dans les tableaux
-replace_in_tables(doc.tables)
+with metrics.timer("replace"):
+    for paragraph in iter_paragraphs(doc):
+        replace_in_paragraph(paragraph)
+metrics.record_hits("replacement_hits", matcher)
 
 # Créer le dossier templates s'il n'existe pas
 os.makedirs("./templates", exist_ok=True)
 
 # Sauvegarder le template
 print(f"💾 Sauvegarde du template dans {output_file}...")
-doc.save(output_file)
+with metrics.timer("save"):
+    save_document(doc, input_file, output_file)
+
+# Export des métriques si $TEMPLATE_METRICS est défini
+flush("create_template.py")
 
 print("✅ Template créé avec succès !")
 print(f"📁 Emplacement : {os.path.abspath(output_file)}")
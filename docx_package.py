@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""Écriture bas niveau d'un paquet .docx (archive zip) sans passer par ``zipfile``.
+
+``zipfile`` ne sait pas recopier une entrée sans la décompresser puis la
+recompresser. :class:`PackageWriter` permet :
+
+- de recopier octet pour octet les données compressées d'une entrée existante
+  (images, polices, styles inchangés) ;
+- d'écrire une nouvelle entrée en flux, compressée au fil de l'eau, sans jamais
+  garder la partie complète en mémoire.
+
+Le format ZIP64 n'est pas géré : un .docx dépasse rarement 4 Go.
+"""
+from __future__ import annotations
+
+import struct
+import zlib
+from typing import BinaryIO
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipInfo
+
+LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+END_OF_CENTRAL_DIRECTORY = struct.Struct("<IHHHHIIH")
+
+LOCAL_HEADER_SIGNATURE = 0x04034B50
+CENTRAL_HEADER_SIGNATURE = 0x02014B50
+END_OF_CENTRAL_DIRECTORY_SIGNATURE = 0x06054B50
+
+VERSION = 20
+FLAG_UTF8 = 0x800
+ZIP32_LIMIT = 0xFFFFFFFF
+COPY_CHUNK_SIZE = 1 << 16
+
+
+def dos_datetime(date_time: tuple[int, int, int, int, int, int]) -> tuple[int, int]:
+    year, month, day, hour, minute, second = date_time
+    dos_time = hour << 11 | minute << 5 | second // 2
+    dos_date = (year - 1980) << 9 | month << 5 | day
+    return dos_time, dos_date
+
+
+def raw_data_offset(source: BinaryIO, info: ZipInfo) -> int:
+    """Position des données compressées d'une entrée dans l'archive source."""
+
+    source.seek(info.header_offset)
+    header = source.read(LOCAL_HEADER.size)
+    fields = LOCAL_HEADER.unpack(header)
+    if fields[0] != LOCAL_HEADER_SIGNATURE:
+        raise ValueError(f"En-tête local invalide pour {info.filename}")
+    name_length, extra_length = fields[9], fields[10]
+    return info.header_offset + LOCAL_HEADER.size + name_length + extra_length
+
+
+class _Entry:
+    __slots__ = ("name", "flags", "method", "dos_time", "dos_date", "crc", "compress_size", "file_size", "external_attr", "offset")
+
+    def __init__(self, name: bytes, flags: int, method: int, date_time, external_attr: int, offset: int):
+        self.name = name
+        self.flags = flags
+        self.method = method
+        self.dos_time, self.dos_date = dos_datetime(date_time)
+        self.crc = 0
+        self.compress_size = 0
+        self.file_size = 0
+        self.external_attr = external_attr
+        self.offset = offset
+
+    def local_header(self) -> bytes:
+        return LOCAL_HEADER.pack(
+            LOCAL_HEADER_SIGNATURE,
+            VERSION,
+            self.flags,
+            self.method,
+            self.dos_time,
+            self.dos_date,
+            self.crc,
+            self.compress_size,
+            self.file_size,
+            len(self.name),
+            0,
+        ) + self.name
+
+    def central_header(self) -> bytes:
+        return CENTRAL_HEADER.pack(
+            CENTRAL_HEADER_SIGNATURE,
+            VERSION,
+            VERSION,
+            self.flags,
+            self.method,
+            self.dos_time,
+            self.dos_date,
+            self.crc,
+            self.compress_size,
+            self.file_size,
+            len(self.name),
+            0,
+            0,
+            0,
+            0,
+            self.external_attr,
+            self.offset,
+        ) + self.name
+
+
+class StreamedEntry:
+    """Entrée en cours d'écriture : les données sont compressées au fil de l'eau."""
+
+    def __init__(self, writer: "PackageWriter", entry: _Entry, level: int):
+        self._writer = writer
+        self._entry = entry
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, -15) if entry.method == ZIP_DEFLATED else None
+
+    def write(self, data: bytes) -> None:
+        if not data:
+            return
+        entry = self._entry
+        entry.crc = zlib.crc32(data, entry.crc)
+        entry.file_size += len(data)
+        if self._compressor is not None:
+            data = self._compressor.compress(data)
+        if data:
+            entry.compress_size += len(data)
+            self._writer._file.write(data)
+
+    def close(self) -> None:
+        entry = self._entry
+        if self._compressor is not None:
+            tail = self._compressor.flush()
+            entry.compress_size += len(tail)
+            self._writer._file.write(tail)
+            self._compressor = None
+        self._writer._finish_streamed(entry)
+
+    def __enter__(self) -> "StreamedEntry":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.close()
+
+
+class PackageWriter:
+    """Écrit une archive zip entrée par entrée dans un fichier positionnable."""
+
+    def __init__(self, file: BinaryIO, compresslevel: int = 6):
+        self._file = file
+        self._entries: list[_Entry] = []
+        self._names: set[bytes] = set()
+        self.compresslevel = compresslevel
+
+    def _new_entry(self, info: ZipInfo, method: int) -> _Entry:
+        name = info.filename.encode("utf-8")
+        if name in self._names:
+            raise ValueError(f"Entrée en double : {info.filename}")
+        self._names.add(name)
+        flags = FLAG_UTF8 if not info.filename.isascii() else 0
+        return _Entry(name, flags, method, info.date_time, info.external_attr, self._file.tell())
+
+    def copy_raw(self, source: BinaryIO, info: ZipInfo) -> None:
+        """Recopie une entrée de ``source`` sans la décompresser."""
+
+        entry = self._copied_entry(info)
+        data_offset = raw_data_offset(source, info)
+        self._file.write(entry.local_header())
+        source.seek(data_offset)
+        remaining = info.compress_size
+        while remaining:
+            chunk = source.read(min(COPY_CHUNK_SIZE, remaining))
+            if not chunk:
+                raise ValueError(f"Données tronquées pour {info.filename}")
+            self._file.write(chunk)
+            remaining -= len(chunk)
+        self._entries.append(entry)
+
+    def write_compressed(self, info: ZipInfo, data: bytes) -> None:
+        """Écrit une entrée dont les données sont déjà compressées (``info`` porte CRC et tailles)."""
+
+        if len(data) != info.compress_size:
+            raise ValueError(f"Taille compressée incohérente pour {info.filename}")
+        entry = self._copied_entry(info)
+        self._file.write(entry.local_header())
+        self._file.write(data)
+        self._entries.append(entry)
+
+    def _copied_entry(self, info: ZipInfo) -> _Entry:
+        entry = self._new_entry(info, info.compress_type)
+        entry.crc = info.CRC
+        entry.compress_size = info.compress_size
+        entry.file_size = info.file_size
+        return entry
+
+    def open(self, info: ZipInfo | str, compress_type: int = ZIP_DEFLATED) -> StreamedEntry:
+        """Ouvre une nouvelle entrée écrite en flux ; l'en-tête est corrigé à la fermeture."""
+
+        if isinstance(info, str):
+            info = ZipInfo(info, date_time=(1980, 1, 1, 0, 0, 0))
+        if compress_type not in (ZIP_DEFLATED, ZIP_STORED):
+            raise ValueError(f"Méthode de compression non gérée : {compress_type}")
+        entry = self._new_entry(info, compress_type)
+        self._file.write(entry.local_header())
+        return StreamedEntry(self, entry, self.compresslevel)
+
+    def writestr(self, info: ZipInfo | str, data: bytes, compress_type: int = ZIP_DEFLATED) -> None:
+        with self.open(info, compress_type) as stream:
+            stream.write(data)
+
+    def _finish_streamed(self, entry: _Entry) -> None:
+        if entry.compress_size > ZIP32_LIMIT or entry.file_size > ZIP32_LIMIT:
+            raise ValueError(f"Entrée trop volumineuse (ZIP64 non géré) : {entry.name.decode('utf-8')}")
+        end = self._file.tell()
+        self._file.seek(entry.offset)
+        self._file.write(entry.local_header())
+        self._file.seek(end)
+        self._entries.append(entry)
+
+    def close(self) -> None:
+        if len(self._entries) > 0xFFFF:
+            raise ValueError("Trop d'entrées (ZIP64 non géré)")
+        start = self._file.tell()
+        for entry in self._entries:
+            self._file.write(entry.central_header())
+        size = self._file.tell() - start
+        if start > ZIP32_LIMIT:
+            raise ValueError("Archive trop volumineuse (ZIP64 non géré)")
+        self._file.write(
+            END_OF_CENTRAL_DIRECTORY.pack(
+                END_OF_CENTRAL_DIRECTORY_SIGNATURE,
+                0,
+                0,
+                len(self._entries),
+                len(self._entries),
+                size,
+                start,
+                0,
+            )
+        )
+
+    def __enter__(self) -> "PackageWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            self.close()
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""Parcours paresseux des paragraphes d'un document python-docx.
+
+``document.paragraphs`` puis ``table.rows``/``row.cells`` ignorent en-têtes,
+pieds de page et notes, ne descendent pas dans les tableaux imbriqués et
+visitent une cellule fusionnée autant de fois qu'elle couvre de colonnes. Ici,
+chaque ``w:p`` des parties texte (celles de ``docx_stream.STREAMED_PARTS``) est
+visité exactement une fois, dans l'ordre du XML, au fil de l'itération :
+
+- ``parts`` restreint le parcours à certaines parties ;
+- l'appelant peut s'arrêter à tout moment (``break``, ``any``, ``next``) sans
+  que le reste du document soit parcouru ;
+- :func:`first_page` s'arrête au premier saut de page du corps.
+
+Exemple :
+    python docx_paragraphs.py Templates/template-statuts-final.docx --compare
+"""
+from __future__ import annotations
+
+import argparse
+import re
+from typing import Callable, Iterator
+
+from docx import Document
+from docx.opc.part import Part, XmlPart
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+
+from docx_stream import STREAMED_PARTS
+
+BODY_PART = re.compile(r"^word/document\.xml$")
+
+_PARAGRAPH = qn("w:p")
+_PAGE_BREAK = "./w:r/w:br[@w:type='page'] | ./w:r/w:lastRenderedPageBreak"
+
+
+class _PartParent:
+    """Parent minimal d'un ``Paragraph`` : donne accès à sa partie (styles, images)."""
+
+    __slots__ = ("part",)
+
+    def __init__(self, part: XmlPart):
+        self.part = part
+
+
+def _load_xml_part(package, part: Part) -> XmlPart:
+    """Remplace dans ``package`` une partie laissée en octets par python-docx (notes) par un ``XmlPart``.
+
+    Les relations qui la ciblent pointent ensuite vers la nouvelle partie : les
+    modifications de ses paragraphes sont enregistrées par ``Document.save``.
+    """
+
+    xml_part = XmlPart.load(part.partname, part.content_type, part.blob, package)
+    for rel in part.rels.values():
+        target = rel.target_ref if rel.is_external else rel.target_part
+        xml_part.rels.add_relationship(rel.reltype, target, rel.rId, rel.is_external)
+    for owner in [package, *package.iter_parts()]:
+        for rel in list(owner.rels.values()):
+            if not rel.is_external and rel.target_part is part:
+                owner.rels.add_relationship(rel.reltype, xml_part, rel.rId)
+    return xml_part
+
+
+def iter_parts(document: Document, parts: re.Pattern[str] = STREAMED_PARTS) -> Iterator[XmlPart]:
+    """Parties texte du document : le corps d'abord, puis les autres par nom."""
+
+    package = document.part.package
+    selected = []
+    for part in list(package.iter_parts()):
+        name = str(part.partname).lstrip("/")
+        if not parts.match(name):
+            continue
+        if not isinstance(part, XmlPart):
+            # Notes de bas de page et de fin : python-docx ne les analyse pas
+            part = _load_xml_part(package, part)
+        selected.append((name != "word/document.xml", name, part))
+    for _is_other, _name, part in sorted(selected, key=lambda item: item[:2]):
+        yield part
+
+
+def iter_paragraphs(document: Document, parts: re.Pattern[str] = STREAMED_PARTS) -> Iterator[Paragraph]:
+    """Chaque paragraphe des parties sélectionnées, une seule fois, dans l'ordre du document."""
+
+    for part in iter_parts(document, parts):
+        parent = _PartParent(part)
+        for element in part.element.iter(_PARAGRAPH):
+            yield Paragraph(element, parent)
+
+
+def first_page(document: Document) -> Iterator[Paragraph]:
+    """Paragraphes du corps jusqu'au premier saut de page (explicite ou mémorisé par Word)."""
+
+    started = False
+    for paragraph in iter_paragraphs(document, BODY_PART):
+        p_pr = paragraph._p.pPr
+        if started and p_pr is not None and p_pr.find(qn("w:pageBreakBefore")) is not None:
+            return
+        started = True
+        yield paragraph
+        if paragraph._p.xpath(_PAGE_BREAK):
+            return
+
+
+def any_paragraph(
+    document: Document, predicate: Callable[[Paragraph], bool], parts: re.Pattern[str] = STREAMED_PARTS
+) -> bool:
+    """``True`` dès qu'un paragraphe vérifie ``predicate`` ; le reste n'est pas parcouru."""
+
+    return any(predicate(paragraph) for paragraph in iter_paragraphs(document, parts))
+
+
+def legacy_paragraphs(document: Document) -> Iterator[Paragraph]:
+    """Ancien parcours (corps puis cellules des tableaux de premier niveau), pour comparaison."""
+
+    yield from document.paragraphs
+    for table in document.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                yield from cell.paragraphs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("document")
+    parser.add_argument("--compare", action="store_true", help="compare au parcours python-docx historique")
+    args = parser.parse_args()
+
+    document = Document(args.document)
+    visits: dict[str, int] = {}
+    elements = []
+    for paragraph in iter_paragraphs(document):
+        name = str(paragraph.part.partname).lstrip("/")
+        visits[name] = visits.get(name, 0) + 1
+        elements.append(paragraph._p)
+    for name, count in visits.items():
+        print(f"📄 {name} : {count} paragraphe(s)")
+    print(f"📄 première page : {sum(1 for _ in first_page(document))} paragraphe(s)")
+
+    if args.compare:
+        legacy = [paragraph._p for paragraph in legacy_paragraphs(document)]
+        # Les éléments lxml restent référencés : une même balise donne le même objet
+        unique = set(legacy)
+        print(
+            f"🔁 parcours historique : {len(legacy)} visite(s) pour {len(unique)} paragraphe(s) distinct(s), "
+            f"{len(set(elements) - unique)} paragraphe(s) jamais visité(s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""Sauvegarde d'un .docx en recopiant tel quel le contenu compressé inchangé.
+
+``Document.save`` décompresse et recompresse tout le paquet, y compris les
+images qui font l'essentiel du poids des statuts. Ici l'archive source sert de
+référence : chaque partie dont le contenu (CRC et taille) est identique est
+recopiée octet pour octet sans être décompressée (voir
+``docx_package.PackageWriter.copy_raw``) ; seules les parties XML réellement
+modifiées sont recompressées.
+
+python-docx ne resérialise pas une partie XML à l'identique (déclaration,
+espaces, ordre des attributs) même quand elle n'a pas été modifiée : une partie
+XML dont les octets diffèrent est donc comparée à la source sous forme
+canonique (C14N, après l'analyse que fait python-docx) avant d'être
+recompressée. ``[Content_Types].xml`` est recopié tel quel tant que les
+parties et leurs types sont ceux de la source, et reconstruit sinon.
+
+Exemples :
+    python docx_repack.py templates/template-statuts.docx /tmp/copie.docx
+    python docx_repack.py source.docx sortie.docx --replace word/document.xml=document.xml
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import zipfile
+import zlib
+from typing import BinaryIO, Iterable, Mapping
+from xml.sax.saxutils import quoteattr
+
+from lxml import etree
+
+from docx_package import PackageWriter
+from template_metrics import metrics
+
+Member = tuple[str, bytes | None]
+
+CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+CONTENT_TYPES_MEMBER = "[Content_Types].xml"
+RELATIONSHIPS_TYPE = "application/vnd.openxmlformats-package.relationships+xml"
+XML_SUFFIXES = (".xml", ".rels")
+# Même analyse que docx.oxml.parser : les nœuds texte vides sont ignorés
+_parser = etree.XMLParser(remove_blank_text=True, resolve_entities=False)
+
+
+def _write_members(source: zipfile.ZipFile, raw: BinaryIO, output: BinaryIO, members: Iterable[Member]) -> dict[str, int]:
+    """Écrit les membres dans l'ordre ; une donnée ``None`` désigne l'entrée source recopiée telle quelle."""
+
+    stats = {"parts_copied": 0, "parts_compressed": 0, "bytes_copied": 0}
+    with PackageWriter(output) as writer:
+        for name, data in members:
+            if data is None:
+                info = source.getinfo(name)
+                writer.copy_raw(raw, info)
+                stats["parts_copied"] += 1
+                stats["bytes_copied"] += info.compress_size
+                continue
+            try:
+                info = source.getinfo(name)
+            except KeyError:
+                info = None
+            writer.writestr(info or name, data)
+            stats["parts_compressed"] += 1
+    return stats
+
+
+def _write_to(output_path: str | BinaryIO, write) -> dict[str, int]:
+    """Écrit dans un flux, ou dans un fichier temporaire renommé à la fin (source = sortie possible)."""
+
+    if not isinstance(output_path, (str, os.PathLike)):
+        return write(output_path)
+    directory = os.path.dirname(os.path.abspath(output_path))
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "w+b") as output:
+            stats = write(output)
+        os.replace(temporary, output_path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    metrics.incr("bytes_written", os.path.getsize(output_path))
+    return stats
+
+
+def repack(source_path: str, output_path: str | BinaryIO, modified: Mapping[str, bytes]) -> dict[str, int]:
+    """Recopie ``source_path`` en remplaçant les parties de ``modified`` (nom de membre → contenu).
+
+    Les autres entrées gardent leurs données compressées d'origine ; une partie
+    absente de la source est ajoutée en fin d'archive.
+    """
+
+    def write(output: BinaryIO) -> dict[str, int]:
+        with open(source_path, "rb") as raw, zipfile.ZipFile(raw) as source:
+            names = [info.filename for info in source.infolist()]
+            added = [name for name in modified if name not in names]
+            return _write_members(source, raw, output, ((name, modified.get(name)) for name in [*names, *added]))
+
+    with metrics.timer("repack"):
+        stats = _write_to(output_path, write)
+    _count(stats)
+    return stats
+
+
+def source_content_types(source: zipfile.ZipFile) -> dict[str, str]:
+    """Type de contenu de chaque membre de la source (``Override``, sinon ``Default`` par extension)."""
+
+    root = etree.fromstring(source.read(CONTENT_TYPES_MEMBER), _parser)
+    defaults, overrides = {}, {}
+    for element in root:
+        if element.tag == f"{{{CONTENT_TYPES_NS}}}Default":
+            defaults[element.get("Extension", "").lower()] = element.get("ContentType")
+        elif element.tag == f"{{{CONTENT_TYPES_NS}}}Override":
+            overrides[element.get("PartName", "").lstrip("/")] = element.get("ContentType")
+    types = {}
+    for name in source.namelist():
+        if name != CONTENT_TYPES_MEMBER:
+            content_type = overrides.get(name) or defaults.get(name.rpartition(".")[2].lower())
+            if content_type:
+                types[name] = content_type
+    return types
+
+
+def content_types_xml(parts) -> bytes:
+    """``[Content_Types].xml`` d'un paquet : ``Default`` pour les relations et le XML, ``Override`` par partie."""
+
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
+        f'<Types xmlns="{CONTENT_TYPES_NS}">',
+        f'<Default Extension="rels" ContentType="{RELATIONSHIPS_TYPE}"/>',
+        '<Default Extension="xml" ContentType="application/xml"/>',
+    ]
+    for part in parts:
+        lines.append(f"<Override PartName={quoteattr(str(part.partname))} ContentType={quoteattr(part.content_type)}/>")
+    lines.append("</Types>")
+    return "".join(lines).encode("utf-8")
+
+
+def document_members(document, source: zipfile.ZipFile | None = None) -> list[Member]:
+    """Membres du paquet tels que ``Document.save`` les écrirait, dans le même ordre.
+
+    Avec ``source``, ``[Content_Types].xml`` vaut ``None`` (recopié) si les
+    parties et leurs types sont inchangés.
+    """
+
+    from docx.opc.packuri import PACKAGE_URI
+
+    package = document.part.package
+    parts = list(package.iter_parts())
+    content_types = None
+    if source is None or source_content_types(source) != _part_types(parts):
+        content_types = content_types_xml(parts)
+    members = [(CONTENT_TYPES_MEMBER, content_types), (PACKAGE_URI.rels_uri.membername, package.rels.xml)]
+    for part in parts:
+        members.append((part.partname.membername, part.blob))
+        if len(part.rels):
+            members.append((part.partname.rels_uri.membername, part.rels.xml))
+    return members
+
+
+def _part_types(parts) -> dict[str, str]:
+    types = {"_rels/.rels": RELATIONSHIPS_TYPE}
+    for part in parts:
+        types[part.partname.membername] = part.content_type
+        if len(part.rels):
+            types[part.partname.rels_uri.membername] = RELATIONSHIPS_TYPE
+    return types
+
+
+def _canonical(data: bytes) -> bytes:
+    return etree.tostring(etree.fromstring(data, _parser), method="c14n")
+
+
+def _changed(source: zipfile.ZipFile, name: str, data: bytes | None) -> bytes | None:
+    """``None`` si ``data`` est identique (taille et CRC, sinon XML canonique) à l'entrée ``name`` de la source."""
+
+    if data is None:
+        return None
+    try:
+        info = source.getinfo(name)
+    except KeyError:
+        return data
+    if info.file_size == len(data) and info.CRC == zlib.crc32(data):
+        return None
+    if not name.endswith(XML_SUFFIXES):
+        return data
+    try:
+        return None if _canonical(source.read(name)) == _canonical(data) else data
+    except etree.XMLSyntaxError:
+        return data
+
+
+def save_document(document, source_path: str, output_path: str | BinaryIO) -> dict[str, int]:
+    """Équivalent de ``document.save(output_path)`` pour un document ouvert depuis ``source_path``.
+
+    Une partie dont le contenu est identique à celui de la source (images,
+    polices, thème, styles non modifiés…) est recopiée compressée.
+    """
+
+    with metrics.timer("repack"):
+
+        def write(output: BinaryIO) -> dict[str, int]:
+            with open(source_path, "rb") as raw, zipfile.ZipFile(raw) as source:
+                members = document_members(document, source)
+                return _write_members(source, raw, output, ((name, _changed(source, name, data)) for name, data in members))
+
+        stats = _write_to(output_path, write)
+    _count(stats)
+    return stats
+
+
+def _count(stats: Mapping[str, int]) -> None:
+    metrics.incr("parts_copied", stats["parts_copied"])
+    metrics.incr("parts_compressed", stats["parts_compressed"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source")
+    parser.add_argument("output")
+    parser.add_argument("--replace", action="append", default=[], metavar="PARTIE=FICHIER", help="partie remplacée par le contenu d'un fichier")
+    args = parser.parse_args()
+
+    modified = {}
+    for item in args.replace:
+        name, _, path = item.partition("=")
+        if not path:
+            raise SystemExit(f"❌ --replace attend PARTIE=FICHIER : {item}")
+        with open(path, "rb") as handle:
+            modified[name] = handle.read()
+
+    try:
+        stats = repack(args.source, args.output, modified)
+    except (OSError, zipfile.BadZipFile) as exc:
+        raise SystemExit(f"❌ Impossible de recopier {args.source} : {exc}") from exc
+    print(
+        f"✅ {args.output} : {stats['parts_copied']} partie(s) recopiée(s) "
+        f"({stats['bytes_copied']} octets compressés), {stats['parts_compressed']} recompressée(s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
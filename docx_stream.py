@@ -0,0 +1,423 @@
+# -*- coding: utf-8 -*-
+"""Réécriture en flux des parties XML d'un .docx, sans modèle objet python-docx.
+
+Le corps, les en-têtes, les pieds de page et les notes sont lus par un parseur
+incrémental (expat) et réécrits au fil de l'eau : seul le paragraphe (``w:p``) en
+cours est gardé en mémoire, le temps d'y appliquer la table de remplacements.
+Les autres parties (images, polices, styles) sont recopiées telles quelles, sans
+décompression ni recompression.
+"""
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from typing import BinaryIO, Callable, Iterator
+from xml.parsers import expat
+
+from docx_package import PackageWriter
+from replacement_engine import ReplacementMatcher, splice_runs
+from template_metrics import metrics
+
+STREAMED_PARTS = re.compile(r"^word/(document|header\d*|footer\d*|footnotes|endnotes)\.xml$")
+
+READ_CHUNK_SIZE = 1 << 16
+WRITE_BUFFER_SIZE = 1 << 16
+
+# Reçoit le texte complet d'un paragraphe ; retourne le nouveau texte ou ``None``
+ParagraphHook = Callable[[str], "str | None"]
+
+_TEXT_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+_ATTRIBUTE_ESCAPES = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "\n": "&#10;", "\r": "&#13;", "\t": "&#9;"}
+)
+
+
+def escape_text(text: str) -> str:
+    return text.translate(_TEXT_ESCAPES)
+
+
+def start_tag(name: str, attributes: list[str]) -> str:
+    parts = ["<", name]
+    for index in range(0, len(attributes), 2):
+        parts.append(f' {attributes[index]}="{attributes[index + 1].translate(_ATTRIBUTE_ESCAPES)}"')
+    return "".join(parts)
+
+
+# Éléments d'un run lus comme du texte, comme ``Run.text`` de python-docx
+_RUN_CHARACTERS = {"w:tab": "\t", "w:cr": "\n", "w:br": "\n"}
+# w:br de saut de page ou de colonne : pas de texte
+_TEXT_BREAK_TYPES = (None, "textWrapping")
+
+
+def run_character(name: str, attributes: list[str]) -> str | None:
+    """Caractère équivalent d'un ``w:tab``, ``w:cr`` ou ``w:br`` de run, ``None`` pour les autres éléments."""
+
+    character = _RUN_CHARACTERS.get(name)
+    if name == "w:br" and dict(zip(attributes[::2], attributes[1::2])).get("w:type") not in _TEXT_BREAK_TYPES:
+        return None
+    return character
+
+
+class _TextSegment:
+    """Contenu d'un ``w:t`` (ou d'un ``w:tab``/``w:br``) du paragraphe en cours, et ses emplacements dans le tampon."""
+
+    __slots__ = ("attributes", "tag_slot", "text_slot", "chunks", "markup")
+
+    def __init__(self, attributes: list[str], tag_slot: int, text_slot: int, markup: str | None = None):
+        self.attributes = attributes
+        self.tag_slot = tag_slot
+        self.text_slot = text_slot
+        self.chunks: list[str] = []
+        # Élément d'origine d'un segment ``w:tab``/``w:br``, réécrit tel quel si son caractère est conservé
+        self.markup = markup
+
+
+def element_text(text: str) -> str:
+    """XML d'un texte de run : ``\t`` en ``w:tab``, ``\n`` en ``w:br``, le reste en ``w:t``."""
+
+    parts = []
+    for piece in re.split(r"([\t\n])", text):
+        if piece == "\t":
+            parts.append("<w:tab/>")
+        elif piece == "\n":
+            parts.append("<w:br/>")
+        elif piece:
+            space = ' xml:space="preserve"' if piece != piece.strip() else ""
+            parts.append(f"<w:t{space}>{escape_text(piece)}</w:t>")
+    return "".join(parts)
+
+
+class PartRewriter:
+    """Réécrit une partie XML WordprocessingML au fil des événements expat."""
+
+    def __init__(
+        self,
+        write: Callable[[bytes], None],
+        matcher: ReplacementMatcher,
+        paragraph_hook: ParagraphHook | None = None,
+    ):
+        self._write = write
+        self.matcher = matcher
+        self.paragraph_hook = paragraph_hook
+        self.paragraphs = 0
+        self.replacements = 0
+
+        self._output: list[str] = []
+        self._output_size = 0
+        self._buffer: list[str] | None = None
+        self._paragraphs: list[list[_TextSegment]] = []
+        self._segment: _TextSegment | None = None
+        self._pending: str | None = None
+        self._runs = 0
+        self._character: str | None = None
+
+        parser = expat.ParserCreate()
+        parser.ordered_attributes = True
+        parser.buffer_text = True
+        parser.XmlDeclHandler = self._xml_declaration
+        parser.StartElementHandler = self._start
+        parser.EndElementHandler = self._end
+        parser.CharacterDataHandler = self._characters
+        parser.CommentHandler = self._comment
+        parser.ProcessingInstructionHandler = self._processing_instruction
+        self._parser = parser
+
+    # -- sortie -------------------------------------------------------------
+
+    def _emit(self, text: str) -> None:
+        if self._buffer is not None:
+            self._buffer.append(text)
+            return
+        self._output.append(text)
+        self._output_size += len(text)
+        if self._output_size >= WRITE_BUFFER_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._output:
+            self._write("".join(self._output).encode("utf-8"))
+            self._output = []
+            self._output_size = 0
+
+    def _close_pending(self) -> None:
+        if self._pending is not None:
+            self._emit(self._pending + ">")
+            self._pending = None
+
+    # -- événements expat -----------------------------------------------------
+
+    def _xml_declaration(self, version: str, encoding: str | None, standalone: int) -> None:
+        declaration = f'<?xml version="{version}" encoding="UTF-8"'
+        if standalone != -1:
+            declaration += ' standalone="yes"' if standalone else ' standalone="no"'
+        self._emit(declaration + "?>\r\n")
+
+    def _start(self, name: str, attributes: list[str]) -> None:
+        self._close_pending()
+        if name == "w:r":
+            self._runs += 1
+        elif self._runs and self._paragraphs and self._character is None and run_character(name, attributes) is not None:
+            # w:tab/w:br comptent dans le texte du paragraphe, comme avec python-docx
+            buffer = self._buffer
+            segment = _TextSegment(attributes, len(buffer), len(buffer), start_tag(name, attributes) + "/>")
+            segment.chunks.append(run_character(name, attributes))
+            buffer.append("")
+            self._paragraphs[-1].append(segment)
+            self._character = name
+            return
+        if name == "w:p":
+            if not self._paragraphs:
+                self._buffer = []
+            self._paragraphs.append([])
+        elif name == "w:t" and self._paragraphs:
+            # La balise ouvrante est produite à la fin du paragraphe : xml:space peut changer
+            buffer = self._buffer
+            segment = _TextSegment(attributes, len(buffer), len(buffer) + 1)
+            buffer.extend(("", ""))
+            self._paragraphs[-1].append(segment)
+            self._segment = segment
+            return
+        self._pending = start_tag(name, attributes)
+
+    def _end(self, name: str) -> None:
+        if name == self._character:
+            # Élément produit à la fin du paragraphe (vide dans WordprocessingML)
+            self._character = None
+            return
+        if name == "w:r":
+            self._runs -= 1
+        if self._pending is not None:
+            self._emit(self._pending + "/>")
+            self._pending = None
+        else:
+            self._emit(f"</{name}>")
+
+        if name == "w:t" and self._segment is not None:
+            self._segment = None
+        elif name == "w:p" and self._paragraphs:
+            self._finish_paragraph(self._paragraphs.pop())
+            if not self._paragraphs:
+                buffer = self._buffer
+                self._buffer = None
+                for text in buffer:
+                    self._emit(text)
+
+    def _characters(self, data: str) -> None:
+        if self._segment is not None:
+            self._segment.chunks.append(data)
+            return
+        self._close_pending()
+        self._emit(escape_text(data))
+
+    def _comment(self, data: str) -> None:
+        self._close_pending()
+        self._emit(f"<!--{data}-->")
+
+    def _processing_instruction(self, target: str, data: str) -> None:
+        self._close_pending()
+        self._emit(f"<?{target} {data}?>" if data else f"<?{target}?>")
+
+    # -- paragraphes ----------------------------------------------------------
+
+    def _finish_paragraph(self, segments: list[_TextSegment]) -> None:
+        self.paragraphs += 1
+        texts = ["".join(segment.chunks) for segment in segments]
+
+        new_texts = texts
+        if segments:
+            replaced = self.paragraph_hook("".join(texts)) if self.paragraph_hook else None
+            if replaced is not None:
+                new_texts = [replaced] + [""] * (len(texts) - 1)
+            else:
+                new_texts, count = splice_runs(texts, self.matcher)
+                self.replacements += count
+
+        buffer = self._buffer
+        for segment, text in zip(segments, new_texts):
+            if segment.markup is not None:
+                buffer[segment.tag_slot] = segment.markup if text == segment.chunks[0] else element_text(text)
+                continue
+            attributes = segment.attributes
+            if self.preserve_space(text) and "xml:space" not in attributes[::2]:
+                attributes = attributes + ["xml:space", "preserve"]
+            buffer[segment.tag_slot] = start_tag("w:t", attributes) + ">"
+            buffer[segment.text_slot] = escape_text(text)
+
+    def preserve_space(self, text: str) -> bool:
+        """Indique si le ``w:t`` réécrit doit porter ``xml:space="preserve"``."""
+
+        return text != text.strip()
+
+    # -- API ------------------------------------------------------------------
+
+    def feed(self, data: bytes) -> None:
+        self._parser.Parse(data, False)
+
+    def close(self) -> None:
+        self._parser.Parse(b"", True)
+        self._flush()
+
+
+def rewrite_part(
+    source: BinaryIO,
+    write: Callable[[bytes], None],
+    matcher: ReplacementMatcher,
+    paragraph_hook: ParagraphHook | None = None,
+) -> PartRewriter:
+    """Lit ``source`` par blocs et écrit la partie réécrite via ``write``."""
+
+    rewriter = PartRewriter(write, matcher, paragraph_hook)
+    while True:
+        chunk = source.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        rewriter.feed(chunk)
+    rewriter.close()
+    return rewriter
+
+
+def rewrite_docx(
+    source_path: str,
+    output_path: str,
+    matcher: ReplacementMatcher,
+    paragraph_hook: ParagraphHook | None = None,
+    parts: re.Pattern[str] = STREAMED_PARTS,
+) -> dict[str, int]:
+    """Applique ``matcher`` aux parties texte de ``source_path`` et écrit ``output_path``.
+
+    Retourne quelques compteurs : parties réécrites, parties recopiées, paragraphes
+    visités et remplacements effectués. Le document est écrit dans un fichier
+    temporaire renommé à la fin : une erreur ne laisse jamais de .docx tronqué.
+    """
+
+    stats = {"parts_rewritten": 0, "parts_copied": 0, "paragraphs": 0, "replacements": 0, "bytes_written": 0}
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)), suffix=".tmp")
+    try:
+        with metrics.timer("stream"), os.fdopen(handle, "wb") as output:
+            _rewrite_package(source_path, output, matcher, paragraph_hook, parts, stats)
+            stats["bytes_written"] = output.tell()
+        # mkstemp crée le fichier en 0600 : le document garde les droits de la source
+        shutil.copymode(source_path, temporary)
+        os.replace(temporary, output_path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+    metrics.incr("paragraphs_visited", stats["paragraphs"])
+    metrics.incr("replacements", stats["replacements"])
+    metrics.incr("bytes_written", stats["bytes_written"])
+    return stats
+
+
+def _rewrite_package(
+    source_path: str,
+    output: BinaryIO,
+    matcher: ReplacementMatcher,
+    paragraph_hook: ParagraphHook | None,
+    parts: re.Pattern[str],
+    stats: dict[str, int],
+) -> None:
+    with zipfile.ZipFile(source_path) as archive, open(source_path, "rb") as raw:
+        with PackageWriter(output) as writer:
+            for info in archive.infolist():
+                if not parts.match(info.filename):
+                    writer.copy_raw(raw, info)
+                    stats["parts_copied"] += 1
+                    continue
+
+                with archive.open(info) as source, writer.open(info) as target:
+                    rewriter = rewrite_part(source, target.write, matcher, paragraph_hook)
+                stats["parts_rewritten"] += 1
+                stats["paragraphs"] += rewriter.paragraphs
+                stats["replacements"] += rewriter.replacements
+
+
+class ParagraphText:
+    """Texte d'un ``w:p`` tel que découpé en ``w:t`` par Word (``w:tab`` et ``w:br`` compris)."""
+
+    __slots__ = ("segments", "style", "in_table")
+
+    def __init__(self, style: str | None, in_table: bool):
+        self.segments: list[str] = []
+        self.style = style
+        self.in_table = in_table
+
+    @property
+    def text(self) -> str:
+        return "".join(self.segments)
+
+
+def iter_part_paragraphs(source: BinaryIO) -> Iterator[ParagraphText]:
+    """Lit une partie XML en flux et produit ses paragraphes au fur et à mesure.
+
+    Rien n'est réécrit : seuls le texte, le style (``w:pStyle``) et la présence dans
+    un tableau sont conservés. Interrompre l'itération arrête la lecture.
+    """
+
+    finished: list[ParagraphText] = []
+    stack: list[ParagraphText] = []
+    state = {"text": None, "tables": 0, "runs": 0}
+
+    def start(name: str, attributes: list[str]) -> None:
+        if name == "w:r":
+            state["runs"] += 1
+        elif state["runs"] and stack and (character := run_character(name, attributes)) is not None:
+            stack[-1].segments.append(character)
+        elif name == "w:p":
+            stack.append(ParagraphText(None, state["tables"] > 0))
+        elif name == "w:t" and stack:
+            state["text"] = []
+        elif name == "w:pStyle" and stack:
+            stack[-1].style = dict(zip(attributes[::2], attributes[1::2])).get("w:val")
+        elif name == "w:tbl":
+            state["tables"] += 1
+
+    def end(name: str) -> None:
+        if name == "w:t" and state["text"] is not None:
+            stack[-1].segments.append("".join(state["text"]))
+            state["text"] = None
+        elif name == "w:p" and stack:
+            finished.append(stack.pop())
+        elif name == "w:tbl":
+            state["tables"] -= 1
+        elif name == "w:r":
+            state["runs"] -= 1
+
+    def characters(data: str) -> None:
+        if state["text"] is not None:
+            state["text"].append(data)
+
+    parser = expat.ParserCreate()
+    parser.ordered_attributes = True
+    parser.buffer_text = True
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = characters
+
+    while True:
+        chunk = source.read(READ_CHUNK_SIZE)
+        parser.Parse(chunk, not chunk)
+        yield from finished
+        finished.clear()
+        if not chunk:
+            break
+
+
+def part_sort_key(name: str) -> tuple[int, str]:
+    """Le corps du document d'abord, puis les autres parties par nom."""
+
+    return (0 if name == "word/document.xml" else 1, name)
+
+
+def iter_docx_paragraphs(path: str, parts: re.Pattern[str] = STREAMED_PARTS) -> Iterator[tuple[str, int, ParagraphText]]:
+    """Produit ``(partie, index, paragraphe)`` pour les parties texte d'un .docx."""
+
+    with zipfile.ZipFile(path) as archive:
+        names = sorted((name for name in archive.namelist() if parts.match(name)), key=part_sort_key)
+        for name in names:
+            with archive.open(name) as source:
+                for index, paragraph in enumerate(iter_part_paragraphs(source)):
+                    yield name, index, paragraph
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""Formats français des montants, dates et nombres en lettres, par colonnes entières.
+
+Reproduit à l'octet près les helpers TypeScript utilisés par les générateurs :
+
+- :func:`format_nombre` : ``new Intl.NumberFormat("fr-FR", options).format(n)``
+  (espace fine insécable U+202F entre les milliers, virgule décimale, arrondi
+  « half expand » sur la représentation décimale la plus courte, comme V8) ;
+- :func:`format_date_longue` : ``toLocaleDateString("fr-FR", {day: "numeric",
+  month: "long", year: "numeric"})`` ;
+- :func:`nombre_en_lettres` : ``lib/utils/nombreEnLettres.ts``, particularités
+  comprises (« vingt un », « un million  euros »…). Là où la version TS produit
+  ``undefined`` (tranche de milliers ou de millions supérieure à 99, 100
+  centimes), une ``ValueError`` est levée.
+
+Les fonctions au pluriel (:func:`format_nombres`, :func:`format_dates`,
+:func:`nombres_en_lettres`) prennent une colonne complète (liste, tuple,
+tableau numpy…) ; chaque valeur distincte n'est formatée qu'une fois, et les
+résultats restent mémorisés d'un appel à l'autre.
+
+La conformité est vérifiée contre des sorties produites par Node
+(``lib/tests/runners/export-french-format.ts``) ; ``npm run test:french-format``
+régénère les références puis lance :
+
+    python french_format.py --check lib/tests/fixtures/french-format.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Context, Decimal
+from functools import lru_cache
+from typing import Any, Callable, Iterable
+
+MOIS = (
+    "janvier",
+    "février",
+    "mars",
+    "avril",
+    "mai",
+    "juin",
+    "juillet",
+    "août",
+    "septembre",
+    "octobre",
+    "novembre",
+    "décembre",
+)
+
+# Séparateur de milliers produit par Intl.NumberFormat("fr-FR")
+NARROW_NO_BREAK_SPACE = "\u202f"
+MEMO_SIZE = 1 << 16
+
+UNITES = (
+    "", "un", "deux", "trois", "quatre", "cinq", "six", "sept", "huit", "neuf", "dix",
+    "onze", "douze", "treize", "quatorze", "quinze", "seize", "dix-sept", "dix-huit", "dix-neuf",
+)  # fmt: skip
+DIZAINES = ("", "", "vingt", "trente", "quarante", "cinquante", "soixante", "soixante", "quatre-vingt", "quatre-vingt")
+
+# Assez de chiffres pour quantifier n'importe quel double (jusqu'à ~1e308)
+_DECIMAL_CONTEXT = Context(prec=400, rounding=ROUND_HALF_UP)
+
+
+def _map_column(function: Callable[[Any], str], values: Iterable[Any], key: Callable[[Any], Any] | None = None) -> list[str]:
+    """Applique ``function`` à une colonne en ne calculant qu'une fois chaque valeur distincte."""
+
+    if hasattr(values, "tolist"):
+        # Tableau numpy/pandas : conversion en scalaires Python en une seule opération
+        values = values.tolist()
+    seen: dict[Any, str] = {}
+    results = []
+    for value in values:
+        memo_key = value if key is None else key(value)
+        try:
+            result = seen[memo_key]
+        except KeyError:
+            result = seen[memo_key] = function(value)
+        except TypeError:
+            # Valeur non hachable : formatée sans mémorisation
+            result = function(value)
+        results.append(result)
+    return results
+
+
+# --- Nombres -----------------------------------------------------------------
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _format_number(shortest: str, minimum_fraction_digits: int, maximum_fraction_digits: int) -> str:
+    """Formate ``repr`` d'un double (clé de mémorisation qui distingue ``-0.0`` de ``0.0``)."""
+
+    if shortest == "nan":
+        return "NaN"
+    if shortest in ("inf", "-inf"):
+        return "-∞" if shortest[0] == "-" else "∞"
+
+    # V8 arrondit la représentation décimale la plus courte, pas la valeur binaire exacte
+    quantum = Decimal(1).scaleb(-maximum_fraction_digits)
+    rounded = Decimal(shortest).quantize(quantum, context=_DECIMAL_CONTEXT)
+    digits = f"{abs(rounded):f}"
+    integer, _, fraction = digits.partition(".")
+    fraction = fraction.rstrip("0")
+    fraction += "0" * (minimum_fraction_digits - len(fraction))
+
+    groups = []
+    while len(integer) > 3:
+        integer, group = integer[:-3], integer[-3:]
+        groups.append(group)
+    groups.append(integer)
+    text = NARROW_NO_BREAK_SPACE.join(reversed(groups))
+    if fraction:
+        text += "," + fraction
+    return ("-" if rounded.is_signed() else "") + text
+
+
+def format_nombre(value: float | int, minimum_fraction_digits: int = 0, maximum_fraction_digits: int = 3) -> str:
+    """Équivalent de ``new Intl.NumberFormat("fr-FR", {minimumFractionDigits, maximumFractionDigits}).format(value)``."""
+
+    # Les nombres JS sont des doubles : un entier Python est converti de la même façon
+    return _format_number(repr(float(value)), minimum_fraction_digits, max(minimum_fraction_digits, maximum_fraction_digits))
+
+
+def format_montant(montant: float | int) -> str:
+    """Équivalent de ``new Intl.NumberFormat("fr-FR").format(montant)``."""
+
+    return format_nombre(montant)
+
+
+def format_montant_decimal(montant: float | int | None) -> str:
+    """Montant à deux décimales (``formatMontant`` de ``lib/generateAugmentationCapital.ts``)."""
+
+    if montant is None:
+        return "0,00"
+    return format_nombre(montant, 2, 2)
+
+
+def format_nombres(values: Iterable[float | int], minimum_fraction_digits: int = 0, maximum_fraction_digits: int = 3) -> list[str]:
+    return _map_column(lambda value: format_nombre(value, minimum_fraction_digits, maximum_fraction_digits), values, key=repr)
+
+
+# --- Dates -------------------------------------------------------------------
+
+
+def parse_date(value: str | date | None) -> date | None:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _format_date(parsed: date) -> str:
+    return f"{parsed.day} {MOIS[parsed.month - 1]} {parsed.year}"
+
+
+def format_date_longue(value: str | date | None) -> str:
+    """Date longue fr-FR (``1 janvier 2025``) ; date du jour si absente."""
+
+    # La date du jour n'est jamais mémorisée sous la clé None
+    return _format_date(parse_date(value) or date.today())
+
+
+def format_dates(values: Iterable[str | date | None]) -> list[str]:
+    return _map_column(format_date_longue, values)
+
+
+# --- Nombres en lettres ------------------------------------------------------
+
+
+def _js_round(value: float) -> int:
+    """``Math.round`` : au plus proche, les demis vers +∞."""
+
+    floor = math.floor(value)
+    return floor + 1 if value - floor >= 0.5 else floor
+
+
+def _convertir_nombre(n: int) -> str:
+    """``convertirNombre`` de ``nombreEnLettres.ts`` (0 à 99)."""
+
+    if n >= 100:
+        raise ValueError(f"Tranche {n} non convertible (la version TS produit 'undefined')")
+    if n == 0:
+        return "zéro"
+    if n < 20:
+        return UNITES[n]
+
+    dizaine, unite = divmod(n, 10)
+    if dizaine in (7, 9):
+        base = 60 if dizaine == 7 else 80
+        reste = n - base
+        return DIZAINES[base // 10] + ("-" + UNITES[reste] if reste > 0 else "")
+
+    result = DIZAINES[dizaine]
+    if unite > 0:
+        result += ("-" if dizaine == 8 else " ") + UNITES[unite]
+    elif dizaine == 8:
+        result += "s"
+    return result
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _nombre_en_lettres(nombre: float) -> str:
+    entier = math.floor(nombre)
+    decimales = _js_round((nombre - entier) * 100)
+
+    if entier == 0 and decimales == 0:
+        return "zéro euro"
+
+    resultat = ""
+    reste = entier
+
+    if reste >= 1_000_000:
+        millions = reste // 1_000_000
+        resultat += _convertir_nombre(millions) + " million" + ("s" if millions > 1 else "") + " "
+        reste %= 1_000_000
+
+    if reste >= 1000:
+        milliers = reste // 1000
+        resultat += "mille " if milliers == 1 else _convertir_nombre(milliers) + " mille "
+        reste %= 1000
+
+    if reste >= 100:
+        centaines = reste // 100
+        if centaines == 1:
+            resultat += "cent "
+        else:
+            resultat += UNITES[centaines] + " cent" + ("s" if centaines > 1 and reste % 100 == 0 else "") + " "
+        reste %= 100
+
+    if reste >= 20:
+        dizaine, unite = divmod(reste, 10)
+        if dizaine in (7, 9):
+            base = 60 if dizaine == 7 else 80
+            reste_unite = reste - base
+            resultat += DIZAINES[base // 10] + ("-" + UNITES[reste_unite] if reste_unite > 0 else "")
+        else:
+            resultat += DIZAINES[dizaine]
+            if unite > 0:
+                resultat += ("-" if dizaine == 8 else " ") + UNITES[unite]
+            elif dizaine == 8:
+                resultat += "s"
+    elif reste > 0:
+        resultat += UNITES[reste]
+
+    euros = " euro" + ("s" if entier > 1 else "")
+    if decimales > 0:
+        resultat += euros + " et " + _convertir_nombre(decimales) + " centime" + ("s" if decimales > 1 else "")
+    else:
+        resultat += euros
+
+    # String.prototype.trim
+    return resultat.strip()
+
+
+def nombre_en_lettres(nombre: float | int) -> str:
+    """Équivalent de ``nombreEnLettres(nombre)`` (``lib/utils/nombreEnLettres.ts``)."""
+
+    return _nombre_en_lettres(float(nombre))
+
+
+def nombres_en_lettres(values: Iterable[float | int]) -> list[str]:
+    return _map_column(nombre_en_lettres, values)
+
+
+# --- Conformité --------------------------------------------------------------
+
+
+def check_fixtures(path: str) -> list[str]:
+    """Compare les sorties Python aux sorties TS enregistrées ; retourne les écarts."""
+
+    with open(path, encoding="utf-8") as handle:
+        fixtures = json.load(handle)
+
+    failures = []
+
+    def compare(label: str, inputs: list[Any], expected: list[str], actual: list[str]) -> None:
+        for case, wanted, got in zip(inputs, expected, actual):
+            if wanted != got:
+                failures.append(f"{label} {case!r} : attendu {wanted!r}, obtenu {got!r}")
+
+    for group in fixtures["nombres"]:
+        minimum, maximum = group["minimumFractionDigits"], group["maximumFractionDigits"]
+        actual = format_nombres(_decode_numbers(group["inputs"]), minimum, maximum)
+        compare(f"Intl.NumberFormat({minimum}, {maximum})", group["inputs"], group["outputs"], actual)
+
+    dates = fixtures["dates"]
+    compare("toLocaleDateString", dates["inputs"], dates["outputs"], format_dates(dates["inputs"]))
+
+    lettres = fixtures["lettres"]
+    actual = []
+    for value, expected in zip(lettres["inputs"], lettres["outputs"]):
+        try:
+            actual.append(nombre_en_lettres(value))
+        except ValueError:
+            # Cas où la version TS produit « undefined » : refusé côté Python
+            actual.append(expected if "undefined" in expected else "ValueError")
+    compare("nombreEnLettres", lettres["inputs"], lettres["outputs"], actual)
+    return failures
+
+
+def _decode_numbers(values: list[Any]) -> list[float]:
+    """Les valeurs non finies sont enregistrées en chaînes dans le JSON."""
+
+    special = {"NaN": math.nan, "Infinity": math.inf, "-Infinity": -math.inf, "-0": -0.0}
+    return [special[value] if isinstance(value, str) else value for value in values]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", metavar="JSON", required=True, help="sorties de référence produites par Node")
+    args = parser.parse_args()
+
+    failures = check_fixtures(args.check)
+    for failure in failures[:50]:
+        print(f"❌ {failure}")
+    if failures:
+        raise SystemExit(f"❌ {len(failures)} écart(s) avec les helpers TypeScript")
+    print("✅ Sorties identiques aux helpers TypeScript")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,29 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
+import argparse
+import os
+import tempfile
+import zipfile
+
 from docx import Document
 from docx.opc.exceptions import PackageNotFoundError
 
+from docx_paragraphs import iter_paragraphs
+from docx_repack import save_document
+from docx_stream import iter_docx_paragraphs, rewrite_docx
+from replacement_engine import compile_replacements, replace_in_runs
+from template_compiler import compile_template
+from template_metrics import add_arguments, instrumented, metrics
+
 SOURCE_PATH = "templates/template-statuts.docx"
-OUTPUT_PATH = "templates/template-statuts-final.docx"
+OUTPUT_PATH = "templates/template-statuts-enrichi.docx"
 
 # Remplacements simples (ordre important pour éviter les collisions)
+# Les paragraphes d'un associé (identité, ligne d'apport) sont encadrés par
+# {{#associes}} … {{/associes}} : le compilateur répète le paragraphe entier
+# pour chaque associé, avec les champs de statuts_payload.associe_values.
+# Le président reste unique : son paragraphe garde les champs president_*
 REPLACEMENTS = [
     (
         "Monsieur DIAOU Mamadou Né le (date) à LIEU (FRANCE) Demeurant au ({{adresse_siege_complete}})",
@@ -15,15 +31,15 @@ REPLACEMENTS = [
     ),
     (
         "Monsieur DIAOU Mamadou Né (date) à Ville (FRANCE)",
-        "{{associe_civilite}} {{associe_prenom}} {{associe_nom}} né(e) le {{associe_date_naissance}} à {{associe_lieu_naissance}}",
+        "{{#associes}}{{civilite}} {{prenom}} {{nom}} né(e) le {{date_naissance}} à {{lieu_naissance}}{{/associes}}",
     ),
     (
-        "Monsieur DIAOU Mamadou    0 000 ",
-        "{{associe_prenom}} {{associe_nom}}    {{associe_montant_apport_formate}} ",
+        "Monsieur DIAOU Mamadou    0 000 €",
+        "{{#associes}}{{prenom}} {{nom}}    {{apport_formate}} €{{/associes}}",
     ),
     (
-        "Montant des apports en numéraire  0 000 ",
-        "Montant des apports en numéraire  {{total_apports_numeraires_formate}} ",
+        "Montant des apports en numéraire  0 000 €",
+        "Montant des apports en numéraire  {{total_apports_numeraires_formate}} €",
     ),
     (
         "Ces apports ont été libérés à hauteur de 2 700 euros",
@@ -55,7 +71,7 @@ REPLACEMENTS = [
     ),
     (
         "Société par actions simplifiée unipersonnelle au capital de (o)euros Siège social : (adresse)",
-        "{{forme_juridique_longue}} au capital de {{capital_social_formate}}  Siège social : {{adresse_siege_complete}}",
+        "{{forme_juridique_longue}} au capital de {{capital_social_formate}} € Siège social : {{adresse_siege_complete}}",
     ),
     (
         "RCS en cours dimmatriculation",
@@ -86,52 +102,167 @@ OBJECT_SOCIAL_PREFIXES = (
     "Et plus généralement",
 )
 
+# Table compilée une fois : chaque paragraphe est réécrit en une seule passe
+REPLACEMENT_MATCHER = compile_replacements(REPLACEMENTS)
+# Occurrences par motif, exportées dans les métriques pour repérer les entrées mortes
+REPLACEMENT_MATCHER.track_hits()
 
-def iter_paragraphs(document: Document):
-    """Iterate over all paragraphs in the document, including those in tables."""
 
-    for paragraph in document.paragraphs:
-        yield paragraph
-    for table in document.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for paragraph in cell.paragraphs:
-                    yield paragraph
+def object_social_text(text: str) -> str | None:
+    """Texte de remplacement des paragraphes de l'objet social, ``None`` pour les autres."""
+
+    stripped = text.strip()
+    if stripped.startswith(OBJECT_SOCIAL_PREFIXES[0]):
+        return "{{objet_social}}"
+    if stripped.startswith(OBJECT_SOCIAL_PREFIXES[1:]):
+        return ""
+    return None
 
 
 def apply_replacements(paragraphs):
+    visited = 0
+    replaced = 0
     for paragraph in paragraphs:
-        original_text = paragraph.text
-
+        visited += 1
         # Gestion spécifique de l'objet social
-        stripped = original_text.strip()
-        if stripped.startswith(OBJECT_SOCIAL_PREFIXES[0]):
-            paragraph.text = "{{objet_social}}"
-            continue
-        if stripped.startswith(OBJECT_SOCIAL_PREFIXES[1]) or stripped.startswith(OBJECT_SOCIAL_PREFIXES[2]) or stripped.startswith(OBJECT_SOCIAL_PREFIXES[3]):
-            paragraph.text = ""
+        object_social = object_social_text(paragraph.text)
+        if object_social is not None:
+            paragraph.text = object_social
             continue
 
-        new_text = original_text
-        for search, replacement in REPLACEMENTS:
-            if search in new_text:
-                new_text = new_text.replace(search, replacement)
+        # Remplacement run par run : la mise en forme est conservée, y compris
+        # pour les occurrences que Word a découpées sur plusieurs runs
+        replaced += replace_in_runs(paragraph, REPLACEMENT_MATCHER)
 
-        if new_text != original_text:
-            paragraph.text = new_text
+    metrics.incr("paragraphs_visited", visited)
+    metrics.incr("replacements", replaced)
 
 
-def main():
+def build_template(source_path: str = SOURCE_PATH, output_path: str = OUTPUT_PATH) -> None:
+    with metrics.timer("load"):
+        document = Document(source_path)
+    with metrics.timer("replace"):
+        apply_replacements(iter_paragraphs(document))
+    with metrics.timer("save"):
+        # Images et parties inchangées recopiées sans recompression
+        save_document(document, source_path, output_path)
+    metrics.record_hits("replacement_hits", REPLACEMENT_MATCHER)
+
+
+def stream_template(source_path: str = SOURCE_PATH, output_path: str = OUTPUT_PATH) -> dict[str, int]:
+    """Même transformation, en flux sur le XML brut (mémoire constante)."""
+
+    stats = rewrite_docx(source_path, output_path, REPLACEMENT_MATCHER, paragraph_hook=object_social_text)
+    metrics.record_hits("replacement_hits", REPLACEMENT_MATCHER)
+    return stats
+
+
+# Associés de contrôle : chacun doit produire sa propre ligne d'apport
+CHECK_ASSOCIES = [
+    {"prenom": "Awa", "nom": "DIALLO", "apport_formate": "600"},
+    {"prenom": "Moussa", "nom": "KEITA", "apport_formate": "400"},
+]
+
+
+def check_template(path: str) -> list[str]:
+    """Rend le template avec deux associés et vérifie les boucles ; retourne les écarts."""
+
+    compiled = compile_template(path)
+    failures = []
+    if "associes" not in compiled.loops:
+        failures.append("aucune boucle {{#associes}} dans le template")
+    for name in ("president_prenom", "president_nom"):
+        if name not in compiled.placeholders:
+            failures.append(f"{{{{{name}}}}} absent ou répété dans une boucle")
+
+    with tempfile.TemporaryDirectory() as directory:
+        rendered = os.path.join(directory, "rendu.docx")
+        values = {"president_prenom": "Jean", "president_nom": "MARTIN", "associes": CHECK_ASSOCIES}
+        with open(rendered, "wb") as output:
+            compiled.render(values, output, strict=False)
+        paragraphs = [paragraph for _part, _index, paragraph in iter_docx_paragraphs(rendered)]
+
+    for associe in CHECK_ASSOCIES:
+        row = f"{associe['prenom']} {associe['nom']}    {associe['apport_formate']} €"
+        if not any(paragraph.in_table and paragraph.text.strip() == row for paragraph in paragraphs):
+            failures.append(f"ligne d'apport absente du tableau : {row!r}")
+    presidents = sum("Jean MARTIN né(e)" in paragraph.text for paragraph in paragraphs)
+    if presidents != 1:
+        failures.append(f"paragraphe du président rendu {presidents} fois au lieu d'une")
+    return failures
+
+
+def write_check_source(path: str) -> None:
+    """Extrait des statuts source : identité du président, d'un associé et tableau des apports."""
+
+    document = Document()
+    document.add_paragraph(REPLACEMENTS[0][0])
+    document.add_paragraph(REPLACEMENTS[1][0])
+    table = document.add_table(rows=2, cols=1)
+    table.cell(0, 0).text = REPLACEMENTS[2][0]
+    table.cell(1, 0).text = REPLACEMENTS[3][0]
+    document.save(path)
+
+
+def self_check() -> list[str]:
+    """Construit le template enrichi d'un extrait de statuts, dans les deux modes, et le vérifie."""
+
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "source.docx")
+        write_check_source(source)
+        for mode, build in (("python-docx", build_template), ("--stream", stream_template)):
+            output = os.path.join(directory, f"enrichi-{mode.strip('-')}.docx")
+            build(source, output)
+            failures += [f"{mode} : {failure}" for failure in check_template(output)]
+    return failures
+
+
+def run(args: argparse.Namespace) -> None:
+    if args.check:
+        failures = self_check()
+        for failure in failures:
+            print(f"❌ {failure}")
+        if failures:
+            raise SystemExit(f"❌ {len(failures)} écart(s) dans le template enrichi")
+        print("✅ Boucles {{#associes}} présentes, président hors boucle")
+        return
+
+    if args.stream:
+        try:
+            stats = stream_template(args.source, args.output)
+        except (OSError, zipfile.BadZipFile) as exc:
+            raise SystemExit(f"Impossible d'ouvrir le document source : {exc}") from exc
+        print(f"Template enrichi sauvegardé dans {args.output} ({stats['replacements']} remplacements)")
+        return
+
     try:
-        document = Document(SOURCE_PATH)
+        build_template(args.source, args.output)
     except PackageNotFoundError as exc:
         raise SystemExit(f"Impossible d'ouvrir le document source : {exc}") from exc
 
-    apply_replacements(iter_paragraphs(document))
+    print(f"Template enrichi sauvegardé dans {args.output}")
+
 
-    document.save(OUTPUT_PATH)
-    print(f"Template enrichi sauvegardé dans {OUTPUT_PATH}")
+def main():
+    parser = argparse.ArgumentParser(description="Transforme les statuts source en template à placeholders")
+    parser.add_argument("--source", default=SOURCE_PATH)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="réécrit le XML en flux sans charger le document avec python-docx",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="construit le template d'un extrait de statuts et vérifie les boucles des associés",
+    )
+    add_arguments(parser)
+    args = parser.parse_args()
 
+    with instrumented("improved_template.py", args.metrics, args.profile):
+        run(args)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,125 @@
+/**
+ * Client du worker de rendu Python (render_worker.py)
+ *
+ * Le processus Python est lancé une fois, charge tous les templates, puis rend
+ * chaque document en quelques millisecondes : une requête NDJSON par ligne sur
+ * stdin, une réponse par ligne sur stdout, dans le même ordre.
+ *
+ *   const worker = await getPythonRenderWorker();
+ *   const buffer = await worker.render({ record: client });
+ */
+
+import { ChildProcessWithoutNullStreams, spawn } from "child_process";
+import { join } from "path";
+import { createInterface } from "readline";
+
+const PYTHON_BIN = process.env.PYTHON_BIN || "python3";
+const WORKER_SCRIPT = join(process.cwd(), "render_worker.py");
+
+export interface RenderRequest {
+  template?: string;
+  record?: Record<string, unknown>;
+  values?: Record<string, unknown>;
+  lenient?: boolean;
+}
+
+interface WorkerResponse {
+  id?: number | null;
+  ok?: boolean;
+  ready?: boolean;
+  docx?: string;
+  error?: string;
+}
+
+type Pending = { resolve: (response: WorkerResponse) => void; reject: (error: Error) => void };
+
+export class PythonRenderWorker {
+  private process: ChildProcessWithoutNullStreams;
+  private pending = new Map<number, Pending>();
+  private nextId = 1;
+  alive = true;
+  readonly ready: Promise<void>;
+
+  constructor() {
+    this.process = spawn(PYTHON_BIN, [WORKER_SCRIPT], { cwd: process.cwd() });
+    this.process.stderr.on("data", (chunk) => process.stderr.write(chunk));
+
+    let markReady: () => void;
+    let failStartup: (error: Error) => void;
+    this.ready = new Promise<void>((resolve, reject) => {
+      markReady = resolve;
+      failStartup = reject;
+    });
+
+    createInterface({ input: this.process.stdout }).on("line", (line) => {
+      let response: WorkerResponse;
+      try {
+        response = JSON.parse(line);
+      } catch {
+        console.error("[PYTHON RENDER WORKER] Ligne ignorée :", line);
+        return;
+      }
+      if (response.ready) {
+        markReady();
+        return;
+      }
+      const request = this.pending.get(response.id ?? -1);
+      if (!request) return;
+      this.pending.delete(response.id as number);
+      request.resolve(response);
+    });
+
+    const fail = (error: Error) => {
+      this.alive = false;
+      failStartup(error);
+      this.pending.forEach((request) => request.reject(error));
+      this.pending.clear();
+    };
+    // Sans écouteur, un ENOENT (PYTHON_BIN absent) ou un EPIPE arrêterait le serveur Node
+    this.process.on("error", (error) => fail(new Error(`render_worker.py indisponible : ${error.message}`)));
+    this.process.stdin.on("error", (error) => fail(new Error(`render_worker.py injoignable : ${error.message}`)));
+    this.process.on("exit", (code) => fail(new Error(`render_worker.py arrêté (code ${code})`)));
+  }
+
+  private send(request: Record<string, unknown>): Promise<WorkerResponse> {
+    const id = this.nextId++;
+    return new Promise((resolve, reject) => {
+      if (!this.alive) {
+        reject(new Error("render_worker.py arrêté"));
+        return;
+      }
+      this.pending.set(id, { resolve, reject });
+      this.process.stdin.write(JSON.stringify({ ...request, id }) + "\n");
+    });
+  }
+
+  /**
+   * Rend un template et retourne le .docx
+   */
+  async render(request: RenderRequest): Promise<Buffer> {
+    await this.ready;
+    const response = await this.send({ ...request });
+    if (!response.ok || !response.docx) {
+      throw new Error(response.error || "Rendu impossible");
+    }
+    return Buffer.from(response.docx, "base64");
+  }
+
+  close(): void {
+    this.process.stdin.end();
+  }
+}
+
+let sharedWorker: PythonRenderWorker | null = null;
+
+/**
+ * Worker partagé par les générateurs, démarré au premier appel
+ */
+export async function getPythonRenderWorker(): Promise<PythonRenderWorker> {
+  // Worker arrêté (plantage, mise à jour des templates) : relancé au prochain appel
+  if (!sharedWorker || !sharedWorker.alive) {
+    sharedWorker = new PythonRenderWorker();
+  }
+  await sharedWorker.ready;
+  return sharedWorker;
+}
@@ -0,0 +1,114 @@
+/**
+ * Runner d'export des sorties de référence des formats français
+ *
+ * Produit lib/tests/fixtures/french-format.json : pour une série d'entrées,
+ * les sorties de Intl.NumberFormat("fr-FR"), de toLocaleDateString("fr-FR")
+ * et de nombreEnLettres. Le module Python french_format.py est vérifié
+ * contre ce fichier :
+ *
+ *   npx tsx lib/tests/runners/export-french-format.ts
+ *   python french_format.py --check lib/tests/fixtures/french-format.json
+ */
+
+import { writeFileSync } from 'fs';
+import { join } from 'path';
+
+import { nombreEnLettres } from '../../utils/nombreEnLettres';
+
+// Les dates "AAAA-MM-JJ" sont interprétées en UTC puis affichées à l'heure de Paris
+process.env.TZ = 'Europe/Paris';
+
+const FIXTURE_PATH = join(__dirname, '..', 'fixtures', 'french-format.json');
+
+/**
+ * Générateur pseudo-aléatoire déterministe (LCG) : le fichier produit est stable
+ */
+function pseudoAleatoire(graine: number): () => number {
+  let etat = graine;
+  return () => {
+    etat = (etat * 1103515245 + 12345) % 2147483648;
+    return etat / 2147483648;
+  };
+}
+
+/**
+ * Valeurs non finies et -0 : non représentables en JSON, enregistrées en chaînes
+ */
+function encoderNombre(n: number): number | string {
+  if (Number.isNaN(n)) return 'NaN';
+  if (n === Infinity) return 'Infinity';
+  if (n === -Infinity) return '-Infinity';
+  if (Object.is(n, -0)) return '-0';
+  return n;
+}
+
+function entreesNombres(): number[] {
+  const aleatoire = pseudoAleatoire(42);
+  const valeurs = [
+    0, -0, 1, -1, 0.1 + 0.2, 2.0005, 1.0005, 1.0015, 8.345, 1234.005, 999.9995, 0.0005, 0.00049, 1e-7, -0.0001,
+    1000, 9999, 10000, 123456789.12345, 2 ** 53 + 2, 1e21, 1e-21, 100 / 3, 2 / 3, -1234.5, 12345678.9,
+    NaN, Infinity, -Infinity,
+  ];
+  for (let i = 0; i < 500; i++) {
+    valeurs.push(Math.round(aleatoire() * 10 ** (1 + (i % 9))) / 10 ** (i % 5));
+    valeurs.push((aleatoire() - 0.5) * 10 ** (i % 12));
+  }
+  for (let i = 0; i < 200; i++) {
+    // Demis exacts en représentation décimale : cas d'arrondi
+    valeurs.push(i + 0.0005, i * 1000 + 0.005, i / 8);
+  }
+  return valeurs;
+}
+
+function entreesDates(): string[] {
+  const dates: string[] = [];
+  const debut = Date.UTC(1990, 0, 1);
+  for (let jour = 0; jour < 366 * 45; jour += 7) {
+    dates.push(new Date(debut + jour * 86400000).toISOString().slice(0, 10));
+  }
+  dates.push('2024-02-29', '2025-01-01', '2025-12-31', '2000-03-01');
+  return dates;
+}
+
+function entreesLettres(): number[] {
+  const aleatoire = pseudoAleatoire(7);
+  const valeurs: number[] = [];
+  for (let i = 0; i <= 1200; i++) valeurs.push(i);
+  for (let i = 0; i < 400; i++) valeurs.push(Math.round(aleatoire() * 10000000) / 100);
+  for (let i = 0; i < 200; i++) valeurs.push(Math.floor(aleatoire() * 100000));
+  valeurs.push(0.01, 0.5, 1.5, 1.005, 1.999, 21.21, 80, 99.99, 1000.01, 71000, 99999.99, 100000, 250000, 1000000, 2500000, 1e8, -1.5, -2);
+  return valeurs;
+}
+
+function main(): void {
+  const nombres = entreesNombres();
+  const dates = entreesDates();
+  const lettres = entreesLettres();
+  const optionsDate: Intl.DateTimeFormatOptions = { day: 'numeric', month: 'long', year: 'numeric' };
+
+  const fixtures = {
+    node: process.versions.node,
+    icu: process.versions.icu,
+    nombres: [
+      { minimumFractionDigits: 0, maximumFractionDigits: 3 },
+      { minimumFractionDigits: 2, maximumFractionDigits: 2 },
+    ].map((options) => ({
+      ...options,
+      inputs: nombres.map(encoderNombre),
+      outputs: nombres.map((n) => new Intl.NumberFormat('fr-FR', options).format(n)),
+    })),
+    dates: {
+      inputs: dates,
+      outputs: dates.map((d) => new Date(d).toLocaleDateString('fr-FR', optionsDate)),
+    },
+    lettres: {
+      inputs: lettres,
+      outputs: lettres.map((n) => nombreEnLettres(n)),
+    },
+  };
+
+  writeFileSync(FIXTURE_PATH, JSON.stringify(fixtures, null, 1) + '\n');
+  console.log(`✅ ${FIXTURE_PATH} : ${nombres.length * 2 + dates.length + lettres.length} cas`);
+}
+
+main();
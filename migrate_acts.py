@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""Migration en masse d'actes rédigés en templates à placeholders.
+
+Généralise ``create_template.py`` (un seul fichier, noms du client codés en dur)
+à une arborescence complète d'actes : chaque document reçoit sa propre table de
+remplacements, lue dans un manifeste, appliquée en flux sur le XML
+(``docx_stream.rewrite_docx``, mêmes règles de priorité que
+``replacement_engine``), sur un pool de processus.
+
+Manifeste CSV (une ligne par remplacement, dans l'ordre de priorité) :
+
+    path,search,replace
+    2023/Statuts SAHEL TRANSPORT.docx,SAHEL TRANSPORT,{{denomination}}
+    2023/Statuts SAHEL TRANSPORT.docx,DIAOU Mamadou,{{associe_prenom}} {{associe_nom}}
+    *,99 ans,{{duree_societe}} ans
+
+ou JSON : ``{"chemin relatif": [["recherche", "remplacement"], …] | {"recherche":
+"remplacement"}, …}``. L'entrée ``*`` s'applique à tous les documents, après
+leurs remplacements propres ; si elle existe, tous les .docx de l'arborescence
+sont migrés, sinon seulement ceux du manifeste.
+
+Reprise : chaque document traité est journalisé dans
+``<sortie>/.migration-checkpoint.ndjson``. Un document dont le contenu (sha256)
+et la table de remplacements n'ont pas changé depuis sa dernière conversion
+n'est pas retraité ; une migration interrompue se relance avec la même commande.
+Le rapport CSV donne, par fichier, le statut, le nombre de substitutions et les
+motifs jamais rencontrés.
+
+Exemples :
+    python migrate_acts.py archives/ --manifest manifeste.csv --output migres/
+    python migrate_acts.py archives/ --manifest manifeste.json --output migres/ --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Iterator
+from xml.parsers import expat
+
+from docx_stream import rewrite_docx
+from replacement_engine import Replacement, compile_replacements
+from template_compiler import file_hash
+from template_metrics import add_arguments, instrumented, metrics
+
+MIGRATION_VERSION = 1
+ALL_DOCUMENTS = "*"
+CHECKPOINT_NAME = ".migration-checkpoint.ndjson"
+REPORT_NAME = "migration-report.csv"
+REPORT_FIELDS = ("path", "status", "replacements", "paragraphs", "unused", "seconds", "sha256", "error")
+
+Manifest = dict[str, list[Replacement]]
+
+
+def _normalize(path: str) -> str:
+    return Path(path.strip()).as_posix()
+
+
+def load_manifest(path: str) -> Manifest:
+    """Tables de remplacements par document (chemin relatif à la racine de l'archive)."""
+
+    manifest: Manifest = {}
+    if path.endswith(".csv"):
+        # utf-8-sig : manifestes exportés depuis Excel
+        with open(path, encoding="utf-8-sig", newline="") as handle:
+            for row in csv.DictReader(handle):
+                key = row["path"].strip()
+                key = key if key == ALL_DOCUMENTS else _normalize(key)
+                manifest.setdefault(key, []).append((row["search"], row["replace"]))
+        return manifest
+
+    with open(path, encoding="utf-8") as handle:
+        data = json.load(handle)
+    for key, replacements in data.items():
+        pairs = replacements.items() if isinstance(replacements, dict) else replacements
+        manifest[key if key == ALL_DOCUMENTS else _normalize(key)] = [(search, replace) for search, replace in pairs]
+    return manifest
+
+
+def replacements_for(manifest: Manifest, relative: str) -> list[Replacement]:
+    # Les remplacements propres au document priment sur les remplacements communs
+    return manifest.get(relative, []) + manifest.get(ALL_DOCUMENTS, [])
+
+
+def conversion_key(source_hash: str, replacements: list[Replacement]) -> str:
+    """Identifie une conversion : même source et même table donnent le même document."""
+
+    digest = hashlib.sha256(f"{MIGRATION_VERSION}:{source_hash}:".encode("ascii"))
+    digest.update(json.dumps(replacements, ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def iter_documents(root: str, exclude: str | None = None) -> Iterator[str]:
+    """Chemins relatifs des .docx de l'arborescence, dans un ordre stable."""
+
+    exclude = os.path.abspath(exclude) if exclude else None
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = sorted(name for name in subdirectories if os.path.abspath(os.path.join(directory, name)) != exclude)
+        for name in sorted(files):
+            # ~$… : fichiers de verrouillage laissés par Word
+            if name.lower().endswith(".docx") and not name.startswith("~$"):
+                yield Path(os.path.relpath(os.path.join(directory, name), root)).as_posix()
+
+
+def load_checkpoint(path: str) -> dict[str, dict[str, Any]]:
+    """Dernière entrée journalisée par document ; une ligne tronquée par un arrêt brutal est ignorée."""
+
+    entries: dict[str, dict[str, Any]] = {}
+    try:
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                entries[entry["path"]] = entry
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def convert(source_root: str, output_root: str, relative: str, replacements: list[Replacement], previous_key: str | None) -> dict[str, Any]:
+    """Convertit un document dans un processus du pool ; retourne son entrée de journal."""
+
+    started = time.perf_counter()
+    source = os.path.join(source_root, relative)
+    target = os.path.join(output_root, relative)
+    entry: dict[str, Any] = {"path": relative}
+    try:
+        entry["sha256"] = file_hash(source)
+        entry["key"] = conversion_key(entry["sha256"], replacements)
+        if entry["key"] == previous_key and os.path.exists(target):
+            return {**entry, "status": "skipped"}
+
+        matcher = compile_replacements(replacements)
+        hits = matcher.track_hits()
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        # rewrite_docx écrit dans un temporaire puis le renomme : pas de sortie tronquée
+        stats = rewrite_docx(source, target, matcher)
+    except (OSError, zipfile.BadZipFile, expat.ExpatError, ValueError) as exc:
+        # ExpatError : XML invalide dans une partie texte
+        return {**entry, "key": None, "status": "error", "error": f"{type(exc).__name__}: {exc}"}
+
+    return {
+        **entry,
+        "status": "converted",
+        "replacements": stats["replacements"],
+        "paragraphs": stats["paragraphs"],
+        "hits": dict(hits),
+        "unused": [search for search in dict(replacements) if not hits[search]],
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+def write_report(path: str, rows: list[dict[str, Any]]) -> None:
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8", newline="") as output:
+            writer = csv.DictWriter(output, REPORT_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({**row, "unused": " | ".join(row.get("unused") or ())})
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def run(
+    source_root: str,
+    manifest_path: str,
+    output_root: str,
+    workers: int | None = None,
+    report_path: str | None = None,
+) -> dict[str, Any]:
+    """Migre l'arborescence et retourne les compteurs par statut."""
+
+    workers = workers or os.cpu_count() or 1
+    manifest = load_manifest(manifest_path)
+    if ALL_DOCUMENTS in manifest:
+        documents = list(iter_documents(source_root, exclude=output_root))
+    else:
+        documents = sorted(manifest)
+
+    os.makedirs(output_root, exist_ok=True)
+    checkpoint_path = os.path.join(output_root, CHECKPOINT_NAME)
+    previous = load_checkpoint(checkpoint_path)
+
+    rows: list[dict[str, Any]] = []
+    counts = dict.fromkeys(("converted", "skipped", "error", "missing"), 0)
+    started = time.perf_counter()
+
+    with open(checkpoint_path, "a", encoding="utf-8") as journal:
+
+        def record(entry: dict[str, Any]) -> None:
+            counts[entry["status"]] += 1
+            metrics.incr(f"documents_{entry['status']}")
+            if entry["status"] == "skipped":
+                # Le rapport reprend les compteurs de la conversion d'origine
+                entry = {**previous[entry["path"]], "status": "skipped"}
+            else:
+                journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                journal.flush()
+            metrics.incr("replacements", entry.get("replacements") or 0)
+            rows.append(entry)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending: set[Future] = set()
+            for relative in documents:
+                if not os.path.isfile(os.path.join(source_root, relative)):
+                    record({"path": relative, "status": "missing", "error": "absent de l'archive"})
+                    continue
+                # Nombre de conversions en vol borné : la mémoire reste constante sur toute l'archive
+                if len(pending) >= workers * 4:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record(future.result())
+                previous_key = previous.get(relative, {}).get("key")
+                pending.add(pool.submit(convert, source_root, output_root, relative, replacements_for(manifest, relative), previous_key))
+            for future in pending:
+                record(future.result())
+
+    rows.sort(key=lambda row: row["path"])
+    write_report(report_path or os.path.join(output_root, REPORT_NAME), rows)
+    return {**counts, "seconds": time.perf_counter() - started, "workers": workers, "rows": rows}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="racine de l'archive d'actes (.docx)")
+    parser.add_argument("--manifest", required=True, help="tables de remplacements (.csv ou .json)")
+    parser.add_argument("--output", required=True, help="dossier des templates produits (même arborescence)")
+    parser.add_argument("--workers", type=int, default=None, help="processus de conversion (défaut : nombre de cœurs)")
+    parser.add_argument("--report", help=f"rapport CSV par fichier (défaut : <sortie>/{REPORT_NAME})")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrumented("migrate_acts.py", args.metrics, args.profile):
+        report = run(args.source, args.manifest, args.output, workers=args.workers, report_path=args.report)
+
+    for row in report["rows"]:
+        if row.get("error"):
+            print(f"❌ {row['path']} : {row['error']}", file=sys.stderr)
+    print(
+        f"✅ {report['converted']} converti(s), {report['skipped']} inchangé(s) en {report['seconds']:.1f} s "
+        f"({report['workers']} workers)"
+    )
+    if report["error"] or report["missing"]:
+        print(f"⚠️  {report['error']} en erreur, {report['missing']} absent(s) de l'archive", file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+"""Chargement en masse des payloads des statuts depuis la base (clients + associés).
+
+``/api/generate-statuts`` lit le client puis ses associés : deux allers-retours
+par document. Ici, les clients sont parcourus par pages (pagination par clé sur
+``clients.id``, sans ``OFFSET``) et chaque page est lue avec ses associés en une
+seule requête ``LEFT JOIN`` ; les lignes sont regroupées par client, converties
+par ``statuts_payload.build_payload`` et produites une à une par un générateur.
+Seule la page en cours est en mémoire : 100 000 clients se chargent avec la même
+empreinte que 1 000.
+
+Chaque enregistrement est un ``StatutsRecord`` à ``__slots__`` (les 18
+placeholders de ``create_clean_template.py``, la liste ``associes`` des blocs
+répétés et l'identifiant du client) ; il se lit comme un dictionnaire et peut
+être passé tel quel au template compilé ou à ``batch_render.run``.
+
+Sources :
+- PostgreSQL (``--dsn postgresql://…``) : connexions empruntées à un pool
+  ``psycopg_pool`` le temps d'une page (``pip install "psycopg[binary,pool]"``) ;
+- SQLite (``--sqlite fichier.db``) : base locale de substitution, créée et
+  remplie de clients fictifs par ``--seed``.
+
+Les colonnes lues sont celles de la liste ``CLIENT_COLUMNS`` / ``ASSOCIE_COLUMNS``
+présentes dans la base : le schéma de ``supabase/migrations/00_acpm_schema.sql``
+(``denomination``, ``adresse``) comme le schéma de production (``nom_entreprise``,
+``capital_social``…) sont acceptés.
+
+Exemples :
+    python payload_loader.py --sqlite acpm.db --seed 100000
+    python payload_loader.py --sqlite acpm.db --ndjson > clients.ndjson
+    python payload_loader.py --dsn "$DATABASE_URL" --output statuts.zip --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import random
+import resource
+import sqlite3
+import sys
+import time
+import uuid
+from collections.abc import Mapping
+from typing import Any, Iterator, Sequence
+
+from create_clean_template import PLACEHOLDERS
+from statuts_payload import build_payload
+from template_metrics import add_arguments, instrumented, metrics
+
+DEFAULT_PAGE_SIZE = 500
+DEFAULT_POOL_SIZE = 4
+
+CLIENT_COLUMNS = (
+    "id",
+    "denomination",
+    "nom_entreprise",
+    "forme_juridique",
+    "adresse",
+    "adresse_siege",
+    "objet_social",
+    "duree_societe",
+    "capital_social",
+    "nb_actions",
+    "montant_libere",
+    "date_debut_activite",
+    "date_cloture",
+)
+ASSOCIE_COLUMNS = (
+    "id",
+    "civilite",
+    "prenom",
+    "nom",
+    "date_naissance",
+    "lieu_naissance",
+    "adresse",
+    "nombre_actions",
+    "montant_apport",
+    "apport",
+)
+# Colonnes JSONB, stockées en texte dans la base SQLite
+JSON_COLUMNS = {"adresse", "adresse_siege"}
+
+# Table clients de 00_acpm_schema.sql, complétée des colonnes lues par la
+# génération des statuts, et table associes telle qu'utilisée par les routes API
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clients (
+  id TEXT PRIMARY KEY,
+  denomination TEXT NOT NULL,
+  nom_entreprise TEXT,
+  siret TEXT,
+  forme_juridique TEXT,
+  adresse TEXT,
+  adresse_siege TEXT,
+  code_postal TEXT,
+  ville TEXT,
+  objet_social TEXT,
+  duree_societe INTEGER,
+  capital_social NUMERIC,
+  nb_actions INTEGER,
+  montant_libere NUMERIC,
+  date_debut_activite TEXT,
+  date_cloture TEXT,
+  created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS associes (
+  id TEXT PRIMARY KEY,
+  client_id TEXT NOT NULL REFERENCES clients(id) ON DELETE CASCADE,
+  civilite TEXT,
+  prenom TEXT,
+  nom TEXT,
+  date_naissance TEXT,
+  lieu_naissance TEXT,
+  adresse TEXT,
+  nationalite TEXT,
+  nombre_actions INTEGER,
+  montant_apport NUMERIC,
+  pourcentage_capital NUMERIC,
+  president INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_associes_client_id ON associes(client_id);
+"""
+
+RECORD_KEYS = (*PLACEHOLDERS, "associes")
+
+
+class StatutsRecord(Mapping):
+    """Payload des statuts d'un client, sans dictionnaire par instance."""
+
+    __slots__ = (*RECORD_KEYS, "client_id")
+
+    def __init__(self, client_id: Any, payload: Mapping[str, Any]):
+        self.client_id = client_id
+        for key in RECORD_KEYS:
+            setattr(self, key, payload.get(key))
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in RECORD_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(RECORD_KEYS)
+
+    def __len__(self) -> int:
+        return len(RECORD_KEYS)
+
+    def __reduce__(self):
+        # Envoi aux processus de rendu : tuple compact plutôt que l'état par attribut
+        return (_record_from_values, (self.client_id, tuple(getattr(self, key) for key in RECORD_KEYS)))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"client_id": self.client_id, **{key: getattr(self, key) for key in RECORD_KEYS}}
+
+
+def _record_from_values(client_id: Any, values: tuple[Any, ...]) -> StatutsRecord:
+    return StatutsRecord(client_id, dict(zip(RECORD_KEYS, values)))
+
+
+class SqliteSource:
+    """Base SQLite locale (substitut de la base Supabase pour les essais)."""
+
+    param = "?"
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+
+    def columns(self, table: str) -> set[str]:
+        return {row[1] for row in self.connection.execute(f"PRAGMA table_info({table})")}
+
+    def fetch(self, sql: str, params: Sequence[Any]) -> list[tuple[Any, ...]]:
+        return self.connection.execute(sql, params).fetchall()
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class PostgresSource:
+    """Base PostgreSQL ; une connexion du pool est empruntée pour chaque page."""
+
+    param = "%s"
+
+    def __init__(self, dsn: str, pool_size: int = DEFAULT_POOL_SIZE):
+        try:
+            from psycopg_pool import ConnectionPool
+        except ImportError:
+            raise SystemExit('❌ psycopg et psycopg_pool sont requis : pip install "psycopg[binary,pool]"')
+        self.pool = ConnectionPool(dsn, min_size=1, max_size=pool_size, open=True)
+
+    def columns(self, table: str) -> set[str]:
+        rows = self.fetch("SELECT column_name FROM information_schema.columns WHERE table_name = %s", [table])
+        return {row[0] for row in rows}
+
+    def fetch(self, sql: str, params: Sequence[Any]) -> list[tuple[Any, ...]]:
+        with self.pool.connection() as connection:
+            return connection.execute(sql, params).fetchall()
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+def open_source(dsn: str | None = None, sqlite_path: str | None = None, pool_size: int = DEFAULT_POOL_SIZE) -> SqliteSource | PostgresSource:
+    if dsn:
+        return PostgresSource(dsn, pool_size)
+    if sqlite_path:
+        return SqliteSource(sqlite_path)
+    raise ValueError("Source manquante : --dsn ou --sqlite")
+
+
+def page_queries(source: SqliteSource | PostgresSource) -> tuple[str, str, list[str], list[str]]:
+    """Requêtes de la première page et des suivantes : clients après la dernière clé lue, joints à leurs associés."""
+
+    available = source.columns("clients")
+    client_columns = [name for name in CLIENT_COLUMNS if name in available]
+    available = source.columns("associes")
+    associe_columns = [name for name in ASSOCIE_COLUMNS if name in available]
+    if "id" not in client_columns or "id" not in associe_columns:
+        raise ValueError("Tables clients/associes sans colonne id")
+
+    order = "a.pourcentage_capital DESC NULLS LAST, a.id" if "pourcentage_capital" in available else "a.id"
+    select = f"SELECT {', '.join('c.' + name for name in client_columns)}, {', '.join('a.' + name for name in associe_columns)} "
+    joined = f"LEFT JOIN associes AS a ON a.client_id = c.id ORDER BY c.id, {order}"
+    page = f"SELECT {', '.join(client_columns)} FROM clients {{where}}ORDER BY id LIMIT {source.param}"
+    first = select + f"FROM ({page.format(where='')}) AS c " + joined
+    following = select + f"FROM ({page.format(where=f'WHERE id > {source.param} ')}) AS c " + joined
+    return first, following, client_columns, associe_columns
+
+
+def _row_dict(names: list[str], values: Sequence[Any]) -> dict[str, Any]:
+    row = dict(zip(names, values))
+    for name in JSON_COLUMNS.intersection(row):
+        value = row[name]
+        if isinstance(value, str) and value.startswith("{"):
+            row[name] = json.loads(value)
+    return row
+
+
+def iter_client_rows(source: SqliteSource | PostgresSource, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[dict[str, Any]]:
+    """Clients (avec leur liste ``associes``) dans l'ordre de ``clients.id``."""
+
+    first_sql, next_sql, client_columns, associe_columns = page_queries(source)
+    width = len(client_columns)
+    last_id = None
+    while True:
+        params = [page_size] if last_id is None else [last_id, page_size]
+        rows = source.fetch(first_sql if last_id is None else next_sql, params)
+        metrics.incr("pages")
+        if not rows:
+            return
+        for client_id, group in itertools.groupby(rows, key=lambda row: row[0]):
+            group = list(group)
+            client = _row_dict(client_columns, group[0][:width])
+            # LEFT JOIN : un client sans associé donne une ligne d'associé entièrement NULL
+            client["associes"] = [_row_dict(associe_columns, row[width:]) for row in group if row[width] is not None]
+            yield client
+            last_id = client_id
+        if len({row[0] for row in rows}) < page_size:
+            return
+
+
+def iter_records(source: SqliteSource | PostgresSource, page_size: int = DEFAULT_PAGE_SIZE, limit: int | None = None) -> Iterator[StatutsRecord]:
+    """Payloads des statuts, un client à la fois."""
+
+    for client in itertools.islice(iter_client_rows(source, page_size), limit):
+        metrics.incr("records")
+        yield StatutsRecord(client["id"], build_payload(client))
+
+
+def seed(path: str, count: int, seed_value: int = 0) -> None:
+    """Crée le schéma SQLite et ajoute ``count`` clients fictifs (1 à 4 associés chacun)."""
+
+    rng = random.Random(seed_value)
+    connection = sqlite3.connect(path)
+    connection.executescript(SQLITE_SCHEMA)
+    associes: list[tuple[Any, ...]] = []
+
+    def clients() -> Iterator[tuple[Any, ...]]:
+        for index in range(count):
+            client_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            nb_actions = rng.choice((100, 500, 1000, 10000))
+            capital = nb_actions * rng.choice((1, 10))
+            adresse = json.dumps({"numero_voie": str(rng.randint(1, 120)), "type_voie": "rue", "nom_voie": f"des Tests {index}", "code_postal": "75001", "ville": "Paris"})
+            yield (client_id, f"Client {index:06d}", f"SAS CLIENT {index:06d}", "SAS", adresse, "Conseil et services", 99, capital, nb_actions, capital, "2025-01-02", "31/12")
+            for position in range(rng.randint(1, 4)):
+                associes.append(
+                    (str(uuid.UUID(int=rng.getrandbits(128), version=4)), client_id, rng.choice(("M.", "Mme")), f"Prénom{position}", f"NOM{index:06d}",
+                     "1980-05-17", "Lyon", adresse, nb_actions // 4, capital / 4, 25 - position)
+                )
+
+    with connection:
+        for chunk in _chunked(clients(), 5000):
+            connection.executemany(
+                "INSERT INTO clients (id, denomination, nom_entreprise, forme_juridique, adresse_siege, objet_social, duree_societe,"
+                " capital_social, nb_actions, montant_libere, date_debut_activite, date_cloture)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                chunk,
+            )
+            connection.executemany(
+                "INSERT INTO associes (id, client_id, civilite, prenom, nom, date_naissance, lieu_naissance, adresse, nombre_actions,"
+                " montant_apport, pourcentage_capital) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                associes,
+            )
+            associes.clear()
+    connection.close()
+
+
+def _chunked(iterable: Iterator[Any], size: int) -> Iterator[list[Any]]:
+    while chunk := list(itertools.islice(iterable, size)):
+        yield chunk
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss est en kilo-octets sous Linux, en octets sous macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source_group = parser.add_mutually_exclusive_group(required=True)
+    source_group.add_argument("--dsn", help="chaîne de connexion PostgreSQL")
+    source_group.add_argument("--sqlite", help="base SQLite locale")
+    parser.add_argument("--seed", type=int, metavar="N", help="crée la base SQLite avec N clients fictifs, puis s'arrête")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="clients lus par requête")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE, help="connexions PostgreSQL du pool")
+    parser.add_argument("--limit", type=int, default=None, help="nombre maximal de clients")
+    parser.add_argument("--ndjson", action="store_true", help="écrit les payloads en NDJSON sur stdout")
+    parser.add_argument("--output", help="génère les statuts (dossier ou .zip) avec batch_render.py")
+    parser.add_argument("--workers", type=int, default=None, help="processus de rendu (avec --output)")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        if not args.sqlite:
+            parser.error("--seed ne s'applique qu'à une base --sqlite")
+        started = time.perf_counter()
+        seed(args.sqlite, args.seed)
+        print(f"✅ {args.seed} clients ajoutés à {args.sqlite} en {time.perf_counter() - started:.1f} s", file=sys.stderr)
+        return
+
+    with instrumented("payload_loader.py", args.metrics, args.profile):
+        source = open_source(args.dsn, args.sqlite, args.pool_size)
+        try:
+            records = iter_records(source, args.page_size, args.limit)
+            if args.output:
+                # Import différé : le rendu n'est chargé que s'il est demandé
+                from batch_render import run
+
+                report = run(records, args.output, workers=args.workers)
+                for error in report["errors"][:20]:
+                    print(f"❌ {error}", file=sys.stderr)
+                print(f"✅ {report['documents']} documents en {report['seconds']:.2f} s ({report['documents_per_second']:.1f} doc/s)", file=sys.stderr)
+                return
+
+            started = time.perf_counter()
+            count = 0
+            for record in records:
+                count += 1
+                if args.ndjson:
+                    sys.stdout.write(json.dumps(record.to_dict(), ensure_ascii=False, default=str) + "\n")
+            elapsed = time.perf_counter() - started
+            print(
+                f"✅ {count} payloads en {elapsed:.2f} s ({count / elapsed if elapsed else 0:.0f}/s, "
+                f"{metrics.counters.get('pages', 0)} pages, pic mémoire {peak_rss_mb():.1f} Mo)",
+                file=sys.stderr,
+            )
+        finally:
+            source.close()
+
+
+if __name__ == "__main__":
+    main()
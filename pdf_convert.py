@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+"""Conversion DOCX → PDF par un pool de LibreOffice headless gardés en vie.
+
+``soffice --convert-to pdf`` relance LibreOffice à chaque document (plusieurs
+secondes de démarrage). Ici, chaque worker est un ``soffice`` headless lancé
+une fois, avec son propre profil, piloté par UNO sur un tube nommé : les
+documents lui sont envoyés par une file et convertis par le filtre
+``writer_pdf_Export`` sans redémarrage.
+
+- un worker est recyclé (arrêté puis relancé à chaud, profil conservé) après
+  ``max_jobs`` conversions ou si son arborescence de processus dépasse
+  ``max_rss_mb`` ;
+- une conversion qui dépasse ``job_timeout`` tue le worker ; un worker planté
+  est relancé et la conversion retentée une fois.
+
+Nécessite LibreOffice et son module Python ``uno`` (paquet ``python3-uno``, ou
+l'interpréteur fourni avec LibreOffice) ; ``$SOFFICE_PATH`` désigne un
+exécutable ``soffice`` hors du ``PATH``.
+
+Exemples :
+    python pdf_convert.py out/ --output pdf/
+    python pdf_convert.py statuts.zip --output pdf/ --workers 4 --max-jobs 200
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from template_metrics import add_arguments, instrumented, metrics
+
+SOFFICE_ENV = "SOFFICE_PATH"
+PDF_FILTER = "writer_pdf_Export"
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_JOBS = 200
+DEFAULT_MAX_RSS_MB = 1024
+DEFAULT_JOB_TIMEOUT = 120.0
+START_TIMEOUT = 60.0
+
+
+def find_soffice() -> str:
+    candidates = [os.environ.get(SOFFICE_ENV), shutil.which("soffice"), shutil.which("libreoffice"), "/Applications/LibreOffice.app/Contents/MacOS/soffice"]
+    for candidate in candidates:
+        if candidate and os.path.exists(candidate):
+            return candidate
+    raise SystemExit(f"soffice introuvable : installez LibreOffice ou définissez ${SOFFICE_ENV}")
+
+
+def _uno():
+    try:
+        import uno
+        from com.sun.star.beans import PropertyValue
+    except ImportError:
+        raise SystemExit("Le module uno de LibreOffice est requis (paquet python3-uno, ou python de LibreOffice)")
+    return uno, PropertyValue
+
+
+def _properties(**values) -> tuple:
+    _module, PropertyValue = _uno()
+    properties = []
+    for name, value in values.items():
+        prop = PropertyValue()
+        prop.Name, prop.Value = name, value
+        properties.append(prop)
+    return tuple(properties)
+
+
+def tree_rss_kb(pid: int) -> int:
+    """RSS cumulée d'un processus et de ses descendants (``soffice`` lance ``soffice.bin``), Linux uniquement."""
+
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status", encoding="ascii") as handle:
+                for line in handle:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children", encoding="ascii") as handle:
+                    pending.extend(int(child) for child in handle.read().split())
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return total
+
+
+class SofficeWorker:
+    """Un ``soffice`` headless, son profil et sa connexion UNO."""
+
+    def __init__(self, index: int, soffice: str, work_dir: str):
+        self.index = index
+        self.soffice = soffice
+        self.pipe = f"tplpdf-{os.getpid()}-{index}"
+        self.profile = Path(work_dir, f"profile-{index}").absolute()
+        self.process: subprocess.Popen | None = None
+        self.desktop = None
+        self.jobs = 0
+        self.timed_out = False
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None and self.desktop is not None
+
+    def start(self) -> None:
+        uno, _PropertyValue = _uno()
+        self.process = subprocess.Popen(
+            [
+                self.soffice,
+                "--headless",
+                "--invisible",
+                "--nologo",
+                "--nodefault",
+                "--norestore",
+                "--nolockcheck",
+                # Profil propre à chaque worker : créé au premier lancement, réutilisé ensuite
+                f"-env:UserInstallation={self.profile.as_uri()}",
+                f"--accept=pipe,name={self.pipe};urp;StarOffice.ComponentContext",
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local)
+        deadline = time.monotonic() + START_TIMEOUT
+        while True:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"soffice #{self.index} arrêté au démarrage (code {self.process.returncode})")
+            try:
+                context = resolver.resolve(f"uno:pipe,name={self.pipe};urp;StarOffice.ComponentContext")
+                break
+            except Exception:  # NoConnectException tant que soffice n'écoute pas encore
+                if time.monotonic() > deadline:
+                    self.kill()
+                    raise TimeoutError(f"soffice #{self.index} n'a pas répondu en {START_TIMEOUT:.0f} s")
+                time.sleep(0.1)
+        self.desktop = context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+        self.jobs = 0
+        self.timed_out = False
+        metrics.incr("soffice_starts")
+
+    def convert(self, source: str, target: str) -> None:
+        document = self.desktop.loadComponentFromURL(Path(source).absolute().as_uri(), "_blank", 0, _properties(Hidden=True, ReadOnly=True))
+        if document is None:
+            raise ValueError(f"Document illisible par LibreOffice : {source}")
+        try:
+            document.storeToURL(Path(target).absolute().as_uri(), _properties(FilterName=PDF_FILTER))
+        finally:
+            document.close(True)
+        self.jobs += 1
+
+    def rss_kb(self) -> int:
+        return tree_rss_kb(self.process.pid) if self.process is not None else 0
+
+    def kill(self) -> None:
+        if self.process is not None and self.process.poll() is None:
+            # Groupe de processus : soffice et soffice.bin
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            self.process.wait()
+        self.desktop = None
+
+    def on_timeout(self) -> None:
+        self.timed_out = True
+        self.kill()
+
+    def stop(self) -> None:
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:  # DisposedException : la connexion se ferme pendant l'appel
+                pass
+            self.desktop = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.kill()
+            self.process = None
+
+
+class ConverterPool:
+    """File de conversions servie par ``workers`` processus soffice."""
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        max_jobs: int = DEFAULT_MAX_JOBS,
+        max_rss_mb: int = DEFAULT_MAX_RSS_MB,
+        job_timeout: float = DEFAULT_JOB_TIMEOUT,
+        soffice: str | None = None,
+    ):
+        _uno()
+        soffice = soffice or find_soffice()
+        self.max_jobs = max_jobs
+        self.max_rss_kb = max_rss_mb * 1024
+        self.job_timeout = job_timeout
+        self._directory = tempfile.TemporaryDirectory(prefix="soffice-pool-")
+        self._queue: queue.Queue[tuple[str, str, Future] | None] = queue.Queue()
+        self._threads = [
+            threading.Thread(target=self._serve, args=(SofficeWorker(index, soffice, self._directory.name),), daemon=True)
+            for index in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _serve(self, worker: SofficeWorker) -> None:
+        try:
+            try:
+                # Démarrage à chaud avant la première conversion
+                worker.start()
+            except Exception:  # nouvelle tentative à la première conversion, qui portera l'erreur
+                worker.kill()
+            while (job := self._queue.get()) is not None:
+                source, target, future = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    self._convert(worker, source, target)
+                except BaseException as exc:
+                    future.set_exception(exc)
+                else:
+                    future.set_result(target)
+        finally:
+            worker.stop()
+
+    def _convert(self, worker: SofficeWorker, source: str, target: str) -> None:
+        for attempt in (1, 2):
+            if not worker.alive:
+                worker.kill()
+                worker.start()
+            watchdog = threading.Timer(self.job_timeout, worker.on_timeout)
+            watchdog.start()
+            try:
+                with metrics.timer("pdf_convert"):
+                    worker.convert(source, target)
+                break
+            except Exception as exc:  # exceptions UNO : soffice planté ou tué par le watchdog
+                if worker.timed_out:
+                    raise TimeoutError(f"{source} : conversion de plus de {self.job_timeout:.0f} s") from exc
+                if isinstance(exc, ValueError) or attempt == 2:
+                    raise
+                metrics.incr("soffice_crashes")
+                worker.kill()
+            finally:
+                watchdog.cancel()
+        metrics.incr("pdf_converted")
+
+        if worker.jobs >= self.max_jobs or worker.rss_kb() > self.max_rss_kb:
+            # Fuites de LibreOffice sur les longues séries : redémarrage avant la conversion suivante
+            metrics.incr("soffice_recycled")
+            try:
+                worker.stop()
+                worker.start()
+            except Exception as exc:  # le PDF est écrit : l'échec ne concerne que la conversion suivante
+                print(f"⚠️  Redémarrage de soffice #{worker.index} impossible : {type(exc).__name__}: {exc}", file=sys.stderr)
+                # Worker laissé arrêté : relancé par la vérification ``alive`` de la conversion suivante
+                worker.kill()
+
+    def submit(self, source: str, target: str) -> Future:
+        future: Future = Future()
+        self._queue.put((source, target, future))
+        return future
+
+    def convert_bytes(self, data: bytes) -> bytes:
+        """Convertit un .docx en mémoire (sortie de ``CompiledTemplate.render_bytes``) ; retourne le PDF."""
+
+        with tempfile.TemporaryDirectory(dir=self._directory.name) as directory:
+            source = os.path.join(directory, "document.docx")
+            target = os.path.join(directory, "document.pdf")
+            Path(source).write_bytes(data)
+            self.submit(source, target).result()
+            return Path(target).read_bytes()
+
+    def close(self) -> None:
+        for _thread in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._directory.cleanup()
+
+    def __enter__(self) -> ConverterPool:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def iter_inputs(paths: Iterable[str], extract_dir: str) -> Iterator[tuple[str, str]]:
+    """``(chemin .docx, nom relatif)`` pour des fichiers, dossiers ou archives .zip de ``batch_render.py``."""
+
+    for index, path in enumerate(paths):
+        if path.endswith(".zip"):
+            # Un dossier par archive : deux archives peuvent contenir les mêmes noms
+            directory = os.path.join(extract_dir, str(index))
+            with zipfile.ZipFile(path) as archive:
+                for name in archive.namelist():
+                    if name.endswith(".docx"):
+                        yield archive.extract(name, directory), name
+        elif os.path.isdir(path):
+            for docx in sorted(Path(path).rglob("*.docx")):
+                yield str(docx), docx.relative_to(path).as_posix()
+        else:
+            yield path, os.path.basename(path)
+
+
+def unique_target(target: str, used: set[str]) -> str:
+    """``target``, suffixé (``-2``, ``-3``…) s'il est déjà attribué à une autre entrée."""
+
+    stem, suffix = os.path.splitext(target)
+    candidate, number = target, 1
+    while candidate in used:
+        number += 1
+        candidate = f"{stem}-{number}{suffix}"
+    used.add(candidate)
+    return candidate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help=".docx, dossiers ou archives .zip produits par batch_render.py")
+    parser.add_argument("--output", required=True, help="dossier des PDF")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="processus soffice")
+    parser.add_argument("--max-jobs", type=int, default=DEFAULT_MAX_JOBS, help="conversions avant recyclage d'un worker")
+    parser.add_argument("--max-rss-mb", type=int, default=DEFAULT_MAX_RSS_MB, help="mémoire au-delà de laquelle un worker est recyclé")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_JOB_TIMEOUT, help="durée maximale d'une conversion (s)")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    errors = []
+    with instrumented("pdf_convert.py", args.metrics, args.profile), tempfile.TemporaryDirectory() as extract_dir:
+        started = time.perf_counter()
+        with ConverterPool(args.workers, args.max_jobs, args.max_rss_mb, args.timeout) as pool:
+            futures = {}
+            targets: set[str] = set()
+            for source, name in iter_inputs(args.inputs, extract_dir):
+                wanted = os.path.join(args.output, str(Path(name).with_suffix(".pdf")))
+                target = unique_target(wanted, targets)
+                if target != wanted:
+                    print(f"⚠️  {source} : nom déjà utilisé, PDF écrit dans {target}", file=sys.stderr)
+                os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+                futures[pool.submit(source, target)] = name
+            for future, name in futures.items():
+                try:
+                    future.result()
+                except Exception as exc:  # un document en échec n'arrête pas la série
+                    errors.append(f"{name}: {type(exc).__name__}: {exc}")
+        elapsed = time.perf_counter() - started
+
+    for error in errors[:20]:
+        print(f"❌ {error}", file=sys.stderr)
+    converted = len(futures) - len(errors)
+    print(f"✅ {converted} PDF en {elapsed:.1f} s ({converted / elapsed if elapsed else 0:.1f} doc/s, {args.workers} workers)")
+    if errors:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""Inventaire des placeholders de tous les templates du dépôt.
+
+Chaque .docx de ``templates/`` et ``Templates/`` est lu une seule fois, en flux
+(voir ``docx_stream.iter_docx_paragraphs``). L'index persistant associe chaque
+placeholder à ses emplacements : template, partie, paragraphe et positions dans
+le texte du paragraphe. Il signale aussi :
+
+- ``split`` : un placeholder valide découpé par Word sur plusieurs runs ;
+- ``unmatched`` : un fragment ``{{`` ou ``}}`` qui ne forme aucun placeholder ;
+- ``loop`` : une balise de boucle ``{{#nom}}``/``{{/nom}}`` sans sa paire.
+
+Les champs utilisés dans une boucle sont rangés sous ``loops`` (nom de boucle →
+champ → emplacements) : seuls les noms de premier niveau, dont les noms de
+boucle, sont attendus dans le payload.
+
+Seuls les fichiers dont la date de modification a changé sont relus, et ne sont
+réindexés que si leur contenu (sha256) a effectivement changé.
+
+Exemples :
+    python placeholder_index.py
+    python placeholder_index.py --check Templates/template-statuts-final.docx client.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import Any, Iterable, Mapping
+from xml.parsers import expat
+
+from docx_stream import iter_docx_paragraphs
+from replacement_engine import TAG_PATTERN
+from template_compiler import DEFAULT_CACHE_DIR, file_hash
+
+INDEX_VERSION = 2
+TEMPLATE_DIRS = ("templates", "Templates")
+DEFAULT_INDEX_PATH = os.path.join(DEFAULT_CACHE_DIR, "placeholder-index.json")
+
+
+def iter_template_files(roots: Iterable[str] = TEMPLATE_DIRS) -> list[str]:
+    """Liste les .docx des dossiers de templates (une seule fois par fichier réel)."""
+
+    seen = set()
+    files = []
+    for root in roots:
+        if not os.path.isdir(root):
+            continue
+        for directory, _dirs, names in os.walk(root):
+            for name in sorted(names):
+                if not name.endswith(".docx") or name.startswith("~$"):
+                    continue
+                path = os.path.join(directory, name)
+                real = os.path.realpath(path)
+                if real not in seen:
+                    seen.add(real)
+                    files.append(Path(path).as_posix())
+    return files
+
+
+def scan_template(path: str) -> dict[str, Any]:
+    """Relève placeholders et anomalies d'un template en une passe."""
+
+    placeholders: dict[str, list[dict[str, Any]]] = {}
+    loops: dict[str, dict[str, list[dict[str, Any]]]] = {}
+    issues: list[dict[str, Any]] = []
+    # Boucles ouvertes, d'un paragraphe à l'autre
+    stack: list[str] = []
+
+    for part, index, paragraph in iter_docx_paragraphs(path):
+        text = paragraph.text
+        if "{" not in text and "}" not in text:
+            continue
+
+        boundaries = []
+        offset = 0
+        for segment in paragraph.segments:
+            offset += len(segment)
+            boundaries.append(offset)
+
+        remainder = text
+        for match in TAG_PATTERN.finditer(text):
+            start, end = match.span()
+            tag = match.group(1)
+            remainder = remainder.replace(match.group(0), "", 1)
+            if any(start < boundary < end for boundary in boundaries):
+                issues.append({"kind": "split", "part": part, "paragraph": index, "text": match.group(0)})
+            if tag[0] == "/":
+                if stack and stack[-1] == tag[1:]:
+                    stack.pop()
+                else:
+                    issues.append({"kind": "loop", "part": part, "paragraph": index, "text": match.group(0)})
+                continue
+            name = tag.lstrip("#")
+            target = loops.setdefault(stack[-1], {}) if stack else placeholders
+            target.setdefault(name, []).append({"part": part, "paragraph": index, "start": start, "end": end})
+            if tag[0] == "#":
+                stack.append(name)
+
+        if "{{" in remainder or "}}" in remainder:
+            issues.append({"kind": "unmatched", "part": part, "paragraph": index, "text": text})
+
+    for name in stack:
+        issues.append({"kind": "loop", "part": None, "paragraph": None, "text": f"{{{{#{name}}}}}"})
+    return {"placeholders": placeholders, "loops": loops, "issues": issues}
+
+
+def invalid_entry(reason: str) -> dict[str, Any]:
+    """Entrée d'index d'un template illisible : aucun placeholder, une anomalie ``invalid``."""
+
+    return {"placeholders": {}, "loops": {}, "issues": [{"kind": "invalid", "part": None, "paragraph": None, "text": reason}]}
+
+
+class PlaceholderIndex:
+    """Index persistant placeholder → emplacements, reconstruit de façon incrémentale."""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        self.files: dict[str, dict[str, Any]] = {}
+        self._sets: dict[str, frozenset[str]] = {}
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION:
+            self.files = data.get("files", {})
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as output:
+                json.dump({"version": INDEX_VERSION, "files": self.files}, output, ensure_ascii=False)
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def refresh(self, paths: Iterable[str] | None = None) -> list[str]:
+        """Met à jour l'index ; retourne les templates réellement réindexés."""
+
+        paths = list(iter_template_files() if paths is None else paths)
+        rebuilt = []
+        for path in paths:
+            stat = os.stat(path)
+            entry = self.files.get(path)
+            if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                continue
+
+            digest = file_hash(path)
+            if entry and entry["sha256"] == digest:
+                entry["mtime_ns"] = stat.st_mtime_ns
+                entry["size"] = stat.st_size
+                continue
+
+            try:
+                scanned = scan_template(path)
+            except zipfile.BadZipFile:
+                scanned = invalid_entry("archive illisible")
+            except expat.ExpatError as exc:
+                # Une partie XML malformée n'interrompt pas l'indexation des autres templates
+                scanned = invalid_entry(f"XML invalide : {exc}")
+            self.files[path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": digest, **scanned}
+            self._sets.pop(path, None)
+            rebuilt.append(path)
+
+        for stale in set(self.files) - set(paths):
+            del self.files[stale]
+            self._sets.pop(stale, None)
+        return rebuilt
+
+    def placeholders(self, template: str) -> frozenset[str]:
+        """Ensemble des placeholders d'un template (calculé une fois)."""
+
+        template = Path(template).as_posix()
+        if template not in self._sets:
+            if template not in self.files:
+                self.refresh([*self.files, template])
+            self._sets[template] = frozenset(self.files[template]["placeholders"])
+        return self._sets[template]
+
+    def locations(self) -> dict[str, list[dict[str, Any]]]:
+        """Vue inverse : placeholder → emplacements dans tous les templates."""
+
+        inverse: dict[str, list[dict[str, Any]]] = {}
+        for template, entry in self.files.items():
+            for name, occurrences in entry["placeholders"].items():
+                inverse.setdefault(name, []).extend({"template": template, **occurrence} for occurrence in occurrences)
+        return inverse
+
+    def check(self, template: str, payload: Mapping[str, Any]) -> tuple[list[str], list[str]]:
+        """Retourne ``(manquants, inconnus)`` pour un payload, avant tout rendu."""
+
+        expected = self.placeholders(template)
+        missing = sorted(name for name in expected if name not in payload)
+        unknown = sorted(key for key in payload if key not in expected)
+        return missing, unknown
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="fichier d'index persistant")
+    parser.add_argument("--check", nargs=2, metavar=("TEMPLATE", "JSON"), help="vérifie un payload contre un template")
+    args = parser.parse_args()
+
+    index = PlaceholderIndex(args.index)
+    rebuilt = index.refresh()
+    index.save()
+
+    if args.check:
+        template, payload_path = args.check
+        with open(payload_path, encoding="utf-8") as handle:
+            payload = json.load(handle)
+        missing, unknown = index.check(template, payload)
+        index.save()
+        for name in unknown:
+            print(f"⚠️  Clé inutilisée par le template : {name}")
+        if missing:
+            raise SystemExit(f"❌ Placeholders sans valeur : {', '.join(missing)}")
+        print("✅ Payload complet")
+        return
+
+    print(f"🔄 {len(rebuilt)} template(s) réindexé(s) sur {len(index.files)}")
+    for name, occurrences in sorted(index.locations().items()):
+        templates = sorted({occurrence["template"] for occurrence in occurrences})
+        print(f"  - {{{{{name}}}}} ×{len(occurrences)} : {', '.join(templates)}")
+    for template, entry in index.files.items():
+        for issue in entry["issues"]:
+            print(f"⚠️  {template} [{issue['part']} §{issue['paragraph']}] {issue['kind']} : {issue['text']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,132 @@
-from docx import Document
+# -*- coding: utf-8 -*-
+"""Extraction du texte des .docx (corps, tableaux, en-têtes, pieds de page, notes).
 
-doc = Document(r"templates\\template-statuts.docx")
-for i, para in enumerate(doc.paragraphs, 1):
-    text = para.text.strip()
-    if text:
-        print(f"[{i}] {text}")
+Le XML est lu en flux, paragraphe par paragraphe : ``--from``/``--limit``
+n'obligent pas à charger tout le document, la lecture s'arrête dès que la page
+demandée est complète. Un dossier est traité en parallèle, un fichier par processus.
+
+Exemples :
+    python read_doc.py Templates/template-statuts-final.docx
+    python read_doc.py Templates/template-statuts-final.docx --from 20 --limit 10 --format ndjson
+    python read_doc.py archives/ --format ndjson --workers 8 > archives.ndjson
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterator
+from xml.parsers import expat
+
+from docx_stream import iter_docx_paragraphs
+from replacement_engine import PLACEHOLDER_PATTERN
+
+DEFAULT_PATH = "templates/template-statuts.docx"
+
+
+def iter_records(path: str, start: int = 0, limit: int | None = None, include_empty: bool = False) -> Iterator[dict[str, Any]]:
+    """Paragraphes d'un document sous forme d'enregistrements.
+
+    Les paragraphes sont numérotés à partir de 0 sur tout le document (corps
+    puis autres parties), vides compris : ``start`` et ``record["paragraph"]``
+    désignent le même paragraphe. ``limit`` compte les enregistrements produits.
+    """
+
+    paragraphs = itertools.islice(iter_docx_paragraphs(path), start, None)
+    records = (
+        {
+            "file": path,
+            "part": part,
+            "paragraph": index,
+            "style": paragraph.style,
+            "table": paragraph.in_table,
+            "text": paragraph.text,
+            "placeholders": PLACEHOLDER_PATTERN.findall(paragraph.text),
+        }
+        for index, (part, _part_index, paragraph) in enumerate(paragraphs, start)
+        if include_empty or paragraph.text.strip()
+    )
+    yield from itertools.islice(records, limit)
+
+
+def format_record(record: dict[str, Any], output_format: str) -> str:
+    if output_format == "ndjson":
+        return json.dumps(record, ensure_ascii=False)
+    part = "" if record["part"] == "word/document.xml" else f"{record['part']} "
+    return f"[{part}{record['paragraph'] + 1}] {record['text'].strip()}"
+
+
+def extract_file(path: str, start: int, limit: int | None, output_format: str, include_empty: bool) -> str:
+    """Extraction complète d'un fichier (exécutée dans un processus du pool)."""
+
+    try:
+        return "".join(format_record(record, output_format) + "\n" for record in iter_records(path, start, limit, include_empty))
+    except (OSError, zipfile.BadZipFile, KeyError, expat.ExpatError) as exc:
+        print(f"❌ {path} : {exc}", file=sys.stderr)
+        return ""
+
+
+def iter_documents(directory: str) -> Iterator[str]:
+    for root, _dirs, names in os.walk(directory):
+        for name in sorted(names):
+            if name.endswith(".docx") and not name.startswith("~$"):
+                yield os.path.join(root, name)
+
+
+def write_output(args: argparse.Namespace) -> None:
+    """Écrit sur stdout les paragraphes du fichier ou de chaque fichier du dossier."""
+
+    if not os.path.isdir(args.path):
+        try:
+            for record in iter_records(args.path, args.start, args.limit, args.include_empty):
+                print(format_record(record, args.format))
+        except BrokenPipeError:
+            raise
+        except (OSError, zipfile.BadZipFile, expat.ExpatError) as exc:
+            raise SystemExit(f"❌ Impossible de lire {args.path} : {exc}") from exc
+        return
+
+    paths = list(iter_documents(args.path))
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        outputs = pool.map(
+            extract_file,
+            paths,
+            itertools.repeat(args.start),
+            itertools.repeat(args.limit),
+            itertools.repeat(args.format),
+            itertools.repeat(args.include_empty),
+            chunksize=8,
+        )
+        for path, output in zip(paths, outputs):
+            if output and args.format == "text":
+                # En texte, les lignes ne portent pas le nom du fichier
+                sys.stdout.write(f"📄 {path}\n")
+            sys.stdout.write(output)
+
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?", default=DEFAULT_PATH, help="fichier .docx ou dossier")
+    parser.add_argument("--from", dest="start", type=int, default=0, help="premier paragraphe à produire (numéro dans le document, vides compris, à partir de 0)")
+    parser.add_argument("--limit", type=int, default=None, help="nombre maximal de paragraphes par fichier")
+    parser.add_argument("--format", choices=("text", "ndjson"), default="text")
+    parser.add_argument("--include-empty", action="store_true", help="conserve les paragraphes vides")
+    parser.add_argument("--workers", type=int, default=None, help="processus pour un dossier (défaut : nombre de cœurs)")
+    args = parser.parse_args()
+
+    try:
+        write_output(args)
+    except BrokenPipeError:
+        # Sortie fermée par le lecteur (``| head``) : on s'arrête sans message.
+        # stdout est redirigé vers /dev/null pour que le flush final n'échoue pas à son tour.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
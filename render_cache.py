@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""Cache disque des documents rendus, adressé par contenu.
+
+La clé d'un rendu est le sha256 du hash du template source et des valeurs des
+placeholders telles qu'elles seront écrites dans le XML (échappées, encodées,
+dans l'ordre du template) : deux payloads qui produisent le même document
+partagent la même entrée, quels que soient l'ordre des clés ou les champs
+inutilisés. Régénérer des statuts sur des données inchangées revient alors à
+relire un fichier.
+
+Les entrées sont écrites de façon atomique (fichier temporaire puis
+renommage) ; au-delà du budget d'octets, les moins récemment lues sont
+supprimées (LRU, date d'accès portée par le mtime du fichier, donc partagée
+entre processus).
+
+Exemples :
+    python render_cache.py
+    python render_cache.py --clear
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Mapping
+
+from template_compiler import COMPILER_VERSION, DEFAULT_CACHE_DIR, CompiledTemplate
+from template_metrics import metrics
+
+CACHE_VERSION = 1
+DEFAULT_RENDER_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, "renders")
+DEFAULT_MAX_BYTES = 256 << 20
+ENTRY_SUFFIX = ".docx"
+
+
+def render_key(template: CompiledTemplate, encoded: Mapping[str, object]) -> str:
+    """Clé d'un rendu à partir des valeurs déjà encodées par ``CompiledTemplate.encode_values``."""
+
+    digest = hashlib.sha256(f"{CACHE_VERSION}:{COMPILER_VERSION}:{template.source_hash}".encode("ascii"))
+    for name in template.placeholders:
+        value = encoded[name]
+        digest.update(b"\x00" + name.encode("utf-8") + b"\x00")
+        if isinstance(value, list):
+            # Éléments de boucle : JSON canonique (clés triées)
+            value = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+        digest.update(value)
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """Cache LRU sur disque, borné en octets.
+
+    L'index en mémoire est protégé par un verrou : ``render_service`` lit depuis
+    la boucle asyncio et écrit depuis un thread dédié.
+    """
+
+    def __init__(self, directory: str | os.PathLike = DEFAULT_RENDER_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self._scan()
+
+    def _scan(self) -> None:
+        """Reconstruit l'index LRU depuis le disque, du moins au plus récemment lu."""
+
+        found = []
+        if self.directory.is_dir():
+            for path in self.directory.glob(f"*/*{ENTRY_SUFFIX}"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                found.append((stat.st_mtime_ns, path.stem, stat.st_size))
+        for _mtime, key, size in sorted(found):
+            self._entries[key] = size
+            self.total_bytes += size
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{ENTRY_SUFFIX}"
+
+    def _count(self, event: str) -> None:
+        self.stats[event] += 1
+        metrics.incr(f"render_cache_{event}")
+
+    def get(self, key: str) -> Path | None:
+        """Chemin du document en cache (et marque l'entrée comme récemment lue), ou ``None``."""
+
+        path = self.path(key)
+        with self._lock:
+            try:
+                os.utime(path)
+                size = path.stat().st_size
+            except FileNotFoundError:
+                # Entrée supprimée par un autre processus
+                if key in self._entries:
+                    self.total_bytes -= self._entries.pop(key)
+                self._count("misses")
+                return None
+            if key not in self._entries:
+                self._entries[key] = size
+                self.total_bytes += size
+            self._entries.move_to_end(key)
+            self._count("hits")
+        return path
+
+    def read(self, key: str) -> bytes | None:
+        path = self.get(key)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, data: bytes) -> Path:
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handle, temporary = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as output:
+                output.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        with self._lock:
+            self.total_bytes += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._evict()
+        return path
+
+    def _evict(self) -> None:
+        """Supprime les entrées les moins récemment lues (appelé verrou tenu)."""
+
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self.path(key).unlink(missing_ok=True)
+            self.total_bytes -= size
+            self._count("evictions")
+
+    def render(self, template: CompiledTemplate, values: Mapping[str, object], strict: bool = True) -> bytes:
+        """``template.render_bytes(values)``, servi depuis le cache quand c'est possible."""
+
+        key = render_key(template, template.encode_values(values, strict))
+        data = self.read(key)
+        if data is None:
+            data = template.render_bytes(values, strict)
+            self.put(key, data)
+        return data
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self.path(key).unlink(missing_ok=True)
+            self._entries.clear()
+            self.total_bytes = 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--directory", default=DEFAULT_RENDER_CACHE_DIR)
+    parser.add_argument("--clear", action="store_true", help="vide le cache")
+    args = parser.parse_args()
+
+    cache = RenderCache(args.directory)
+    if args.clear:
+        cache.clear()
+        print(f"🗑️  Cache vidé : {cache.directory}")
+        return
+    print(f"📦 {cache.directory} : {len(cache)} rendu(s), {cache.total_bytes / (1 << 20):.1f} Mo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+"""Service local de rendu des templates (HTTP sur TCP ou socket Unix, asyncio).
+
+Les routes ``app/api/generate-*`` peuvent déléguer ici la génération : le
+service reçoit un payload JSON, le place dans une file bornée et le rend sur
+un pool de processus qui partagent le magasin de templates projeté en mémoire
+(voir ``template_store.py``). Quand la file est pleine, la requête est refusée
+immédiatement (503 + ``Retry-After``) plutôt que d'accumuler du travail.
+
+Routes :
+    POST /render          {"template": "...", "record": {...}} ou {"values": {...}}
+                          → le .docx, ou 202 {"job_id": ...} avec "async": true
+    GET  /jobs/<id>       état d'un rendu asynchrone, puis le .docx une fois prêt
+    GET  /metrics         file d'attente, rendus, refus, latences p50/p90/p99 (Prometheus)
+    GET  /health
+
+``record`` est un enregistrement client converti par ``statuts_payload.build_payload`` ;
+``values`` est injecté tel quel dans le template. Un document déjà rendu pour
+les mêmes valeurs est relu depuis le cache disque (voir ``render_cache.py``)
+sans passer par la file.
+
+Exemples :
+    python render_service.py --port 8700 --workers 4
+    python render_service.py --unix /tmp/render.sock --template Templates/template-statuts-final.docx
+    curl -s -X POST localhost:8700/render -d @client.json -o statuts.docx
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from multiprocessing import get_context
+from typing import Any
+
+from template_compiler import DEFAULT_CACHE_DIR
+from render_cache import DEFAULT_MAX_BYTES, DEFAULT_RENDER_CACHE_DIR, RenderCache, render_key
+from statuts_payload import build_payload
+from template_metrics import metrics
+from template_store import STORE_NAME, TemplateStore, ensure_store, template_key
+
+DEFAULT_TEMPLATE = "Templates/template-statuts-final.docx"
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+MAX_BODY_SIZE = 1 << 20
+REQUEST_TIMEOUT = 30.0
+MAX_RETAINED_JOBS = 1024
+LATENCY_WINDOW = 2048
+PERCENTILES = (0.5, 0.9, 0.99)
+
+_store: TemplateStore | None = None
+
+
+def _init_worker(store_path: str) -> None:
+    global _store
+    _store = TemplateStore(store_path)
+
+
+def render_job(template: str, values: dict[str, Any], strict: bool) -> bytes:
+    """Exécuté dans un processus du pool."""
+
+    return _store.template(template).render_bytes(values, strict)
+
+
+class HttpError(Exception):
+    def __init__(self, status: HTTPStatus, message: str, headers: dict[str, str] | None = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+@dataclass
+class Job:
+    id: str
+    template: str
+    values: dict[str, Any]
+    strict: bool
+    cache_key: str | None = None
+    enqueued: float = field(default_factory=time.perf_counter)
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+    data: bytes | None = None
+    error: str | None = None
+    finished_at: float | None = None
+
+
+class RenderService:
+    def __init__(
+        self,
+        store_path: str,
+        templates: list[str],
+        workers: int,
+        queue_size: int,
+        result_ttl: float,
+        cache: RenderCache | None = None,
+        max_jobs: int = MAX_RETAINED_JOBS,
+    ):
+        # Projection locale du magasin : placeholders et hash des templates pour les clés du cache
+        self.store = TemplateStore(store_path)
+        self.cache = cache
+        self.templates = {template_key(path) for path in templates}
+        self.default_template = template_key(templates[0])
+        self.workers = workers
+        self.queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=queue_size)
+        self.jobs: dict[str, Job] = {}
+        self.result_ttl = result_ttl
+        self.max_jobs = max_jobs
+        self.in_flight = 0
+        self.latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.render_times: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        # spawn : un processus forké hériterait de la boucle asyncio et des sockets d'écoute
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=get_context("spawn"), initializer=_init_worker, initargs=(store_path,)
+        )
+        # Écritures du cache hors de la boucle, une à la fois (l'index LRU est protégé par le verrou du cache)
+        self.cache_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="render-cache")
+        self._consumers: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._consumers = [asyncio.create_task(self._consume()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._consumers:
+            task.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self.pool.shutdown(cancel_futures=True)
+        self.cache_writer.shutdown(wait=True)
+        self.store.close()
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            self.in_flight += 1
+            started = time.perf_counter()
+            try:
+                job.data = await loop.run_in_executor(self.pool, render_job, job.template, job.values, job.strict)
+                metrics.incr("service_rendered")
+            except Exception as exc:  # une erreur de payload ne doit pas arrêter le consommateur
+                job.error = f"{type(exc).__name__}: {exc}"
+                metrics.incr("service_failed")
+            finally:
+                self.in_flight -= 1
+                job.finished_at = time.perf_counter()
+                self.render_times.append(job.finished_at - started)
+                self.latencies.append(job.finished_at - job.enqueued)
+                job.done.set()
+                self.queue.task_done()
+            if self.cache is not None and job.data is not None:
+                try:
+                    await loop.run_in_executor(self.cache_writer, self.cache.put, job.cache_key, job.data)
+                except OSError as exc:  # le document a été servi ; seul le cache est incomplet
+                    print(f"⚠️  Écriture du cache impossible : {exc}", file=sys.stderr)
+
+    def submit(self, body: dict[str, Any]) -> Job:
+        template = body.get("template") or self.default_template
+        if not isinstance(template, str):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "'template' doit être une chaîne")
+        template = template_key(template)
+        if template not in self.templates:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"Template non servi : {template}")
+        if not isinstance(body.get("record", body.get("values")), dict):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Le corps doit contenir un objet 'record' ou 'values'")
+        strict = not body.get("lenient", False)
+        try:
+            values = build_payload(body["record"]) if "record" in body else body["values"]
+            job = Job(uuid.uuid4().hex, template, values, strict)
+            if self.cache is not None:
+                compiled = self.store.template(template)
+                job.cache_key = render_key(compiled, compiled.encode_values(values, strict))
+        except Exception as exc:  # payload invalide : inutile d'occuper un worker
+            raise HttpError(HTTPStatus.UNPROCESSABLE_ENTITY, f"{type(exc).__name__}: {exc}") from exc
+
+        if job.cache_key is not None:
+            job.data = self.cache.read(job.cache_key)
+            if job.data is not None:
+                # Document déjà rendu : servi sans passer par la file
+                job.finished_at = time.perf_counter()
+                self.latencies.append(job.finished_at - job.enqueued)
+                job.done.set()
+                self.jobs[job.id] = job
+                return job
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            metrics.incr("service_rejected")
+            raise HttpError(HTTPStatus.SERVICE_UNAVAILABLE, "File de rendu pleine", {"Retry-After": "1"}) from None
+        metrics.incr("service_accepted")
+        self.jobs[job.id] = job
+        return job
+
+    def expire_jobs(self) -> None:
+        limit = time.perf_counter() - self.result_ttl
+        finished = sorted((job.finished_at, job_id) for job_id, job in self.jobs.items() if job.finished_at is not None)
+        # Au-delà de max_jobs résultats conservés, les plus anciens sont supprimés avant leur TTL
+        excess = len(finished) - self.max_jobs
+        for index, (finished_at, job_id) in enumerate(finished):
+            if finished_at >= limit and index >= excess:
+                break
+            del self.jobs[job_id]
+
+    def prometheus(self, prefix: str = "render_service_") -> str:
+        lines = [
+            f"# TYPE {prefix}queue_depth gauge",
+            f"{prefix}queue_depth {self.queue.qsize()}",
+            f"# TYPE {prefix}queue_capacity gauge",
+            f"{prefix}queue_capacity {self.queue.maxsize}",
+            f"# TYPE {prefix}in_flight gauge",
+            f"{prefix}in_flight {self.in_flight}",
+            f"# TYPE {prefix}jobs_retained gauge",
+            f"{prefix}jobs_retained {len(self.jobs)}",
+        ]
+        for name in ("accepted", "rejected", "rendered", "failed"):
+            lines += [f"# TYPE {prefix}{name}_total counter", f"{prefix}{name}_total {metrics.counters['service_' + name]}"]
+        if self.cache is not None:
+            for name in ("hits", "misses", "evictions"):
+                lines += [f"# TYPE {prefix}cache_{name}_total counter", f"{prefix}cache_{name}_total {self.cache.stats[name]}"]
+            lines += [f"# TYPE {prefix}cache_bytes gauge", f"{prefix}cache_bytes {self.cache.total_bytes}"]
+        for name, samples in (("latency_seconds", self.latencies), ("render_seconds", self.render_times)):
+            ordered = sorted(samples)
+            lines.append(f"# TYPE {prefix}{name} summary")
+            for quantile in PERCENTILES:
+                value = ordered[min(len(ordered) - 1, int(quantile * len(ordered)))] if ordered else 0.0
+                lines.append(f'{prefix}{name}{{quantile="{quantile}"}} {value:.6f}')
+            lines += [f"{prefix}{name}_sum {sum(ordered):.6f}", f"{prefix}{name}_count {len(ordered)}"]
+        return "\n".join(lines) + "\n"
+
+    async def handle(self, method: str, path: str, body: bytes) -> tuple[HTTPStatus, dict[str, str], bytes]:
+        self.expire_jobs()
+        if method == "GET" and path == "/health":
+            return HTTPStatus.OK, {"Content-Type": "text/plain"}, b"ok\n"
+        if method == "GET" and path == "/metrics":
+            return HTTPStatus.OK, {"Content-Type": "text/plain; version=0.0.4"}, self.prometheus().encode("utf-8")
+        if method == "GET" and path.startswith("/jobs/"):
+            job = self.jobs.get(path[len("/jobs/") :])
+            if job is None:
+                raise HttpError(HTTPStatus.NOT_FOUND, "Rendu inconnu ou expiré")
+            if not job.done.is_set():
+                return _json(HTTPStatus.ACCEPTED, {"job_id": job.id, "status": "pending"})
+            return self._result(job)
+        if method == "POST" and path == "/render":
+            try:
+                payload = json.loads(body)
+            except ValueError as exc:
+                raise HttpError(HTTPStatus.BAD_REQUEST, f"JSON invalide : {exc}") from exc
+            if not isinstance(payload, dict):
+                raise HttpError(HTTPStatus.BAD_REQUEST, "Le corps doit être un objet JSON")
+            job = self.submit(payload)
+            if payload.get("async"):
+                return _json(HTTPStatus.ACCEPTED, {"job_id": job.id, "status": "pending"})
+            await job.done.wait()
+            self.jobs.pop(job.id, None)
+            return self._result(job)
+        raise HttpError(HTTPStatus.NOT_FOUND, f"Route inconnue : {method} {path}")
+
+    @staticmethod
+    def _result(job: Job) -> tuple[HTTPStatus, dict[str, str], bytes]:
+        if job.error:
+            return _json(HTTPStatus.UNPROCESSABLE_ENTITY, {"job_id": job.id, "status": "failed", "error": job.error})
+        return HTTPStatus.OK, {"Content-Type": DOCX_CONTENT_TYPE, "X-Job-Id": job.id}, job.data
+
+
+def _json(status: HTTPStatus, value: Any) -> tuple[HTTPStatus, dict[str, str], bytes]:
+    return status, {"Content-Type": "application/json"}, json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+
+async def read_request(reader: asyncio.StreamReader) -> tuple[str, str, bytes]:
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    try:
+        method, target, _version = request_line.split(" ", 2)
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Requête HTTP invalide") from None
+    headers = {}
+    while line := (await reader.readline()).decode("latin-1").strip():
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Content-Length invalide") from None
+    if length < 0:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Content-Length invalide")
+    if length > MAX_BODY_SIZE:
+        raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Payload trop volumineux")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], body
+
+
+def make_handler(service: RenderService):
+    async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            try:
+                try:
+                    # Un client qui n'envoie pas tout son Content-Length ne garde pas la connexion indéfiniment
+                    method, path, body = await asyncio.wait_for(read_request(reader), REQUEST_TIMEOUT)
+                except asyncio.TimeoutError:
+                    raise HttpError(HTTPStatus.REQUEST_TIMEOUT, "Requête incomplète") from None
+                status, headers, content = await service.handle(method, path, body)
+            except HttpError as exc:
+                status, headers, content = _json(exc.status, {"error": str(exc)})
+                headers.update(exc.headers)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception as exc:  # une requête ne doit jamais fermer la connexion sans réponse
+                print(f"❌ Erreur interne : {type(exc).__name__}: {exc}", file=sys.stderr)
+                status, headers, content = _json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(exc).__name__}: {exc}"})
+            head = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Length: {len(content)}", "Connection: close"]
+            head += [f"{name}: {value}" for name, value in headers.items()]
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + content)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    return handle_connection
+
+
+async def serve(args: argparse.Namespace) -> None:
+    templates = args.template or [DEFAULT_TEMPLATE]
+    store_path = str(ensure_store(templates, os.path.join(args.cache_dir, STORE_NAME)))
+    workers = args.workers or os.cpu_count() or 1
+    cache = RenderCache(args.render_cache_dir, args.render_cache_bytes) if args.render_cache_bytes else None
+    service = RenderService(store_path, templates, workers, args.queue_size, args.result_ttl, cache, args.max_jobs)
+    service.start()
+
+    handler = make_handler(service)
+    if args.unix:
+        server = await asyncio.start_unix_server(handler, path=args.unix)
+        where = args.unix
+    else:
+        server = await asyncio.start_server(handler, host=args.host, port=args.port)
+        where = f"http://{args.host}:{args.port}"
+    print(f"🚀 Service de rendu sur {where} ({workers} workers, file de {args.queue_size})")
+    print(f"📋 Templates : {', '.join(sorted(service.templates))}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--unix", help="socket Unix (remplace --host/--port)")
+    parser.add_argument("--template", action="append", help=f"template servi, répétable (défaut : {DEFAULT_TEMPLATE})")
+    parser.add_argument("--workers", type=int, default=None, help="processus de rendu (défaut : nombre de cœurs)")
+    parser.add_argument("--queue-size", type=int, default=64, help="rendus en attente au-delà desquels les requêtes sont refusées")
+    parser.add_argument("--result-ttl", type=float, default=300.0, help="durée de conservation des rendus asynchrones (s)")
+    parser.add_argument("--max-jobs", type=int, default=MAX_RETAINED_JOBS, help="rendus asynchrones terminés conservés au plus")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--render-cache-dir", default=DEFAULT_RENDER_CACHE_DIR, help="cache des documents rendus")
+    parser.add_argument(
+        "--render-cache-bytes", type=int, default=DEFAULT_MAX_BYTES, help="budget du cache des documents rendus (0 : désactivé)"
+    )
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("\n👋 Arrêt du service")
+
+
+if __name__ == "__main__":
+    main()
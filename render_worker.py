@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""Worker de rendu longue durée : requêtes NDJSON sur stdin, réponses sur stdout.
+
+Au démarrage, tous les templates de ``templates/`` et ``Templates/`` sont
+compilés si besoin, placés dans le magasin projeté en mémoire
+(``template_store.py``) et ouverts une fois pour toutes ; une ligne
+``{"ready": true, ...}`` signale que le worker est prêt. Chaque requête est
+ensuite rendue sans réimporter ni réanalyser quoi que ce soit : un générateur
+Node garde le processus ouvert et lui écrit une ligne par document, au lieu de
+lancer un interpréteur (et python-docx/lxml) à chaque appel.
+
+Seul le nécessaire au rendu est importé au démarrage ; ``statuts_payload``
+(conversion d'un enregistrement client) et ``base64`` ne le sont qu'à la
+première requête qui en a besoin. python-docx n'est jamais chargé.
+
+Requêtes (une ligne JSON chacune) :
+    {"id": 1, "template": "Templates/template-statuts-final.docx", "record": {...}}
+    {"id": 2, "values": {...}, "output": "out/statuts.docx", "lenient": true}
+    {"id": 3, "op": "templates"}
+    {"id": 4, "op": "ping"}
+
+Réponses, dans l'ordre des requêtes :
+    {"id": 1, "ok": true, "docx": "<base64>", "bytes": 41234, "ms": 2.1}
+    {"id": 2, "ok": true, "output": "out/statuts.docx", "bytes": 41234, "ms": 1.8}
+    {"id": 5, "ok": false, "error": "KeyError: ..."}
+
+Exemple :
+    python render_worker.py < requetes.ndjson > reponses.ndjson
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import IO, Any, Callable
+
+from placeholder_index import iter_template_files
+from template_compiler import DEFAULT_CACHE_DIR, CompiledTemplate
+from template_store import STORE_NAME, TemplateStore, ensure_store, template_key
+
+DEFAULT_TEMPLATE = "Templates/template-statuts-final.docx"
+
+
+class RenderWorker:
+    """Templates compilés prêts à rendre, indexés par chemin relatif."""
+
+    def __init__(self, templates: list[str], cache_dir: str = DEFAULT_CACHE_DIR):
+        store_path = ensure_store(templates, os.path.join(cache_dir, STORE_NAME))
+        self.store = TemplateStore(store_path)
+        self.templates: dict[str, CompiledTemplate] = {template_key(path): self.store.template(path) for path in templates}
+        self._build_payload: Callable[[dict[str, Any]], dict[str, Any]] | None = None
+
+    def payload(self, request: dict[str, Any]) -> dict[str, Any]:
+        if "values" in request:
+            return request["values"]
+        if self._build_payload is None:
+            # Import différé : seules les requêtes « record » en ont besoin
+            from statuts_payload import build_payload
+
+            self._build_payload = build_payload
+        return self._build_payload(request["record"])
+
+    def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        started = time.perf_counter()
+        operation = request.get("op", "render")
+        if operation == "ping":
+            return {"ok": True}
+        if operation == "templates":
+            return {"ok": True, "templates": {key: template.placeholders for key, template in self.templates.items()}}
+        if operation != "render":
+            raise ValueError(f"Opération inconnue : {operation}")
+
+        key = template_key(request.get("template") or DEFAULT_TEMPLATE)
+        template = self.templates.get(key)
+        if template is None:
+            raise KeyError(f"Template non chargé : {key}")
+        strict = not request.get("lenient", False)
+        values = self.payload(request)
+
+        output = request.get("output")
+        if output:
+            directory = os.path.dirname(output)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(output, "wb") as handle:
+                template.render(values, handle, strict)
+            response = {"ok": True, "output": output, "bytes": os.path.getsize(output)}
+        else:
+            import base64
+
+            data = template.render_bytes(values, strict)
+            response = {"ok": True, "docx": base64.b64encode(data).decode("ascii"), "bytes": len(data)}
+        response["ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return response
+
+    def serve(self, requests: IO[bytes], responses: IO[str]) -> int:
+        """Traite les requêtes jusqu'à la fin de l'entrée ; retourne le nombre de requêtes."""
+
+        count = 0
+        for line in requests:
+            if not line.strip():
+                continue
+            count += 1
+            request_id = None
+            try:
+                request = json.loads(line)
+                request_id = request.get("id")
+                response = self.handle(request)
+            except Exception as exc:  # une requête invalide ne doit pas arrêter le worker
+                response = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+            responses.write(json.dumps({"id": request_id, **response}, ensure_ascii=False) + "\n")
+            responses.flush()
+        return count
+
+    def close(self) -> None:
+        # Les vues sur le magasin doivent être libérées avant sa fermeture
+        self.templates.clear()
+        self.store.close()
+
+
+def main() -> None:
+    started = time.perf_counter()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--template", action="append", help="template à charger (défaut : tous ceux du dépôt)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args()
+
+    # stdout est réservé au protocole : messages éventuels des modules vers stderr
+    protocol, sys.stdout = sys.stdout, sys.stderr
+    worker = RenderWorker(args.template or iter_template_files(), args.cache_dir)
+    ready = {"ready": True, "templates": sorted(worker.templates), "ms": round((time.perf_counter() - started) * 1000, 1)}
+    protocol.write(json.dumps(ready, ensure_ascii=False) + "\n")
+    protocol.flush()
+    try:
+        worker.serve(sys.stdin.buffer, protocol)
+    finally:
+        worker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""Moteur de remplacement multi-motifs compilé une seule fois.
+
+Les tables de remplacement (``improved_template.REPLACEMENTS``) sont des listes
+ordonnées de couples ``(recherche, remplacement)``. Plutôt que de parcourir chaque
+paragraphe une fois par motif, on compile une alternance unique : chaque texte est
+réécrit en une seule passe.
+
+Règles conservées par rapport à la boucle historique :
+
+- l'ordre de la table fait foi : à une position donnée, le premier motif de la liste
+  qui correspond l'emporte (``"31 décembre 2025"`` avant ``"31 décembre"``) ;
+- un texte inséré par un remplacement n'est jamais ré-analysé.
+"""
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from collections import Counter
+from typing import Iterable, Iterator, Sequence
+
+Replacement = tuple[str, str]
+
+# Placeholder docxtemplater : {{nom}} (espaces tolérés autour du nom)
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*([A-Za-z_][\w.]*)\s*\}\}")
+# Placeholders et balises de boucle (syntaxe docxtemplater : {{#associes}} … {{/associes}})
+TAG_PATTERN = re.compile(r"\{\{\s*([#/]?[A-Za-z_][\w.]*)\s*\}\}")
+
+
+class ReplacementMatcher:
+    """Table de remplacements compilée en une seule expression régulière."""
+
+    def __init__(self, replacements: Sequence[Replacement]):
+        self.replacements = list(replacements)
+        self._lookup: dict[str, str] = {}
+        for search, replacement in self.replacements:
+            if search:
+                # En cas de doublon, la première entrée de la table reste prioritaire
+                self._lookup.setdefault(search, replacement)
+
+        if self._lookup:
+            # dict conserve l'ordre d'insertion : l'alternance respecte l'ordre de la table
+            pattern = "|".join(re.escape(search) for search in self._lookup)
+            self._regex: re.Pattern[str] | None = re.compile(pattern)
+        else:
+            self._regex = None
+
+        # Occurrences par motif, relevées seulement après track_hits()
+        self.hits: Counter[str] | None = None
+
+    def track_hits(self) -> Counter[str]:
+        """Active le comptage des occurrences par motif (repérage des entrées mortes)."""
+
+        if self.hits is None:
+            self.hits = Counter()
+        return self.hits
+
+    def _replace(self, match: re.Match[str]) -> str:
+        search = match.group(0)
+        if self.hits is not None:
+            self.hits[search] += 1
+        return self._lookup[search]
+
+    def __len__(self) -> int:
+        return len(self._lookup)
+
+    def finditer(self, text: str) -> Iterator[tuple[int, int, str, str]]:
+        """Produit ``(début, fin, motif, remplacement)`` pour chaque occurrence, de gauche à droite."""
+
+        if self._regex is None:
+            return
+        for match in self._regex.finditer(text):
+            yield match.start(), match.end(), match.group(0), self._replace(match)
+
+    def sub(self, text: str) -> str:
+        """Retourne ``text`` réécrit en une seule passe."""
+
+        if self._regex is None:
+            return text
+        return self._regex.sub(self._replace, text)
+
+    def subn(self, text: str) -> tuple[str, int]:
+        """Comme :meth:`sub`, en retournant aussi le nombre de remplacements effectués."""
+
+        if self._regex is None:
+            return text, 0
+        return self._regex.subn(self._replace, text)
+
+
+class PlaceholderMatcher:
+    """Repère les placeholders ``{{nom}}`` et les remplace par ``render(nom)``.
+
+    Même interface que :class:`ReplacementMatcher`, utilisable avec :func:`splice_runs`.
+    """
+
+    def __init__(self, render, pattern: re.Pattern[str] = PLACEHOLDER_PATTERN):
+        self.render = render
+        self.pattern = pattern
+
+    def finditer(self, text: str) -> Iterator[tuple[int, int, str, str]]:
+        for match in self.pattern.finditer(text):
+            yield match.start(), match.end(), match.group(0), self.render(match.group(1))
+
+
+def splice_runs(run_texts: Sequence[str], matcher: ReplacementMatcher) -> tuple[list[str], int]:
+    """Applique ``matcher`` au texte concaténé des runs et redistribue le résultat.
+
+    Le texte du paragraphe est construit une seule fois avec l'index des débuts de
+    run ; les occurrences à cheval sur plusieurs runs (découpage Word) sont donc
+    trouvées. Chaque remplacement est inséré dans le run où commence l'occurrence,
+    qui conserve ainsi sa mise en forme ; les caractères consommés dans les runs
+    suivants sont retirés. Coût linéaire en la taille du texte.
+
+    Retourne ``(nouveaux_textes, nombre_de_remplacements)``.
+    """
+
+    texts = list(run_texts)
+    text = "".join(texts)
+    matches = list(matcher.finditer(text))
+    if not matches:
+        return texts, 0
+
+    starts = []
+    ends = []
+    offset = 0
+    for run_text in texts:
+        starts.append(offset)
+        offset += len(run_text)
+        ends.append(offset)
+
+    pieces: list[list[str]] = [[] for _ in texts]
+
+    def run_at(position: int) -> int:
+        return bisect_right(starts, position) - 1
+
+    def copy(start: int, end: int) -> None:
+        while start < end:
+            index = run_at(start)
+            stop = min(end, ends[index])
+            pieces[index].append(text[start:stop])
+            start = stop
+
+    position = 0
+    for start, end, _search, replacement in matches:
+        copy(position, start)
+        pieces[run_at(start)].append(replacement)
+        position = end
+    copy(position, len(text))
+
+    return ["".join(chunks) for chunks in pieces], len(matches)
+
+
+def replace_in_runs(paragraph, matcher: ReplacementMatcher) -> int:
+    """Remplace dans un paragraphe python-docx sans perdre la mise en forme des runs.
+
+    Seuls les runs dont le texte change sont réécrits. Retourne le nombre de remplacements.
+    """
+
+    runs = paragraph.runs
+    old_texts = [run.text for run in runs]
+    new_texts, count = splice_runs(old_texts, matcher)
+    if count:
+        for run, old_text, new_text in zip(runs, old_texts, new_texts):
+            if new_text != old_text:
+                run.text = new_text
+    return count
+
+
+def compile_replacements(replacements: Iterable[Replacement]) -> ReplacementMatcher:
+    """Compile une table ordonnée de remplacements."""
+
+    return ReplacementMatcher(tuple(replacements))
+
+
+def apply_sequential(text: str, replacements: Iterable[Replacement]) -> str:
+    """Boucle historique : un ``str.replace`` par motif (référence pour les benchmarks)."""
+
+    new_text = text
+    for search, replacement in replacements:
+        if search in new_text:
+            new_text = new_text.replace(search, replacement)
+    return new_text
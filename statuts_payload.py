@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""Construction des valeurs des placeholders des statuts à partir d'un export client.
+
+Reprend les règles de ``lib/generateStatuts.ts`` (forme juridique selon le nombre
+d'associés, premier exercice) pour remplir les placeholders listés par
+``create_clean_template.py`` ; montants et dates passent par ``french_format.py``.
+
+Un enregistrement peut être :
+- un client au format ``lib/tests/fixtures/clients.json`` (colonnes Supabase),
+  éventuellement accompagné d'une liste ``associes`` ;
+- ou directement un dictionnaire de placeholders (avec, éventuellement, la liste
+  ``associes`` déjà convertie), qui est alors conservé tel quel.
+
+La liste ``associes`` du payload alimente les blocs répétés des templates
+(``{{#associes}} … {{/associes}}``, voir ``template_compiler.py``).
+"""
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Mapping
+
+from create_clean_template import PLACEHOLDERS
+from french_format import format_date_longue as format_date
+from french_format import format_montant, parse_date
+
+
+def format_adresse(adresse: Any) -> str:
+    if not adresse:
+        return "Adresse non renseignée"
+    if isinstance(adresse, str):
+        return adresse
+    nom_voie = adresse.get("libelle_voie") or adresse.get("nom_voie")
+    parts = [adresse.get("numero_voie"), adresse.get("type_voie"), nom_voie, adresse.get("code_postal"), adresse.get("ville")]
+    parts = [str(part) for part in parts if part]
+    return " ".join(parts) if parts else "Adresse non renseignée"
+
+
+def forme_juridique(nb_associes: int) -> tuple[str, str]:
+    if nb_associes == 1:
+        return "Société par Actions Simplifiée Unipersonnelle", "SASU"
+    return "Société par Actions Simplifiée", "SAS"
+
+
+def premier_exercice_fin(date_debut_activite: str | None, date_cloture: str | None) -> str:
+    jour, mois = (date_cloture or "31/12").split("/")[:2]
+    debut = parse_date(date_debut_activite) or date.today()
+    annee = debut.year
+    if date(annee, int(mois), int(jour)) < debut:
+        annee += 1
+    return format_date(date(annee, int(mois), int(jour)))
+
+
+def associes_uniques(associes: list[Mapping[str, Any]]) -> list[Mapping[str, Any]]:
+    """Dédoublonne les associés sur (nom, prénom), comme la génération TS."""
+
+    seen = set()
+    uniques = []
+    for associe in associes:
+        key = (associe.get("nom"), associe.get("prenom"))
+        if key not in seen:
+            seen.add(key)
+            uniques.append(associe)
+    return uniques
+
+
+def associe_values(associe: Mapping[str, Any]) -> dict[str, Any]:
+    """Champs d'un associé pour les blocs ``{{#associes}}``."""
+
+    return {
+        "civilite": associe.get("civilite", ""),
+        "prenom": associe.get("prenom", ""),
+        "nom": associe.get("nom", ""),
+        "date_naissance": format_date(associe.get("date_naissance")) if associe.get("date_naissance") else "",
+        "lieu_naissance": associe.get("lieu_naissance", ""),
+        "adresse_complete": format_adresse(associe.get("adresse")),
+        "nombre_actions": associe.get("nombre_actions") or 0,
+        "apport_formate": format_montant(associe.get("montant_apport") or associe.get("apport") or 0),
+    }
+
+
+def build_payload(record: Mapping[str, Any]) -> dict[str, Any]:
+    """Retourne les valeurs des placeholders des statuts pour un enregistrement."""
+
+    if all(name in record for name in PLACEHOLDERS):
+        payload = {name: record[name] for name in PLACEHOLDERS}
+        if "associes" in record:
+            payload["associes"] = record["associes"]
+        return payload
+
+    associes = associes_uniques(list(record.get("associes") or []))
+    associe = associes[0] if associes else {}
+    if associes:
+        complete, sigle = forme_juridique(len(associes))
+    else:
+        complete, sigle = forme_juridique(1 if record.get("forme_juridique") == "SASU" else 2)
+
+    capital = record.get("capital_social") or 0
+    nb_actions = record.get("nb_actions") or 0
+    valeur_nominale = capital / nb_actions if nb_actions else 0
+
+    payload = {
+        "associe_civilite": associe.get("civilite", ""),
+        "associe_prenom": associe.get("prenom", ""),
+        "associe_nom": associe.get("nom", ""),
+        "associe_date_naissance": format_date(associe.get("date_naissance")) if associe.get("date_naissance") else "",
+        "associe_lieu_naissance": associe.get("lieu_naissance", ""),
+        "associe_adresse_complete": format_adresse(associe.get("adresse")) if associe else "",
+        "forme_juridique_complete": complete,
+        "forme_juridique_sigle": sigle,
+        "denomination": record.get("nom_entreprise") or record.get("denomination", ""),
+        "adresse_siege_complete": format_adresse(record.get("adresse_siege") or record.get("adresse")),
+        "objet_social": record.get("objet_social", ""),
+        "duree_societe": record.get("duree_societe", 99),
+        "capital_social_formate": format_montant(capital),
+        "nombre_actions": nb_actions,
+        "valeur_nominale_formate": format_montant(valeur_nominale),
+        "montant_libere_formate": format_montant(record.get("montant_libere", capital)),
+        "premier_exercice_fin": premier_exercice_fin(record.get("date_debut_activite"), record.get("date_cloture")),
+        "date_signature": format_date(record.get("date_signature")),
+        "associes": [associe_values(item) for item in associes],
+    }
+    # Les placeholders fournis explicitement priment sur les valeurs calculées
+    payload.update({name: record[name] for name in PLACEHOLDERS if name in record})
+    return payload
@@ -0,0 +1,452 @@
+# -*- coding: utf-8 -*-
+"""Compilation des templates .docx en morceaux XML statiques + emplacements.
+
+Un template produit par ``improved_template.py`` ou ``create_clean_template.py``
+est analysé une seule fois : chaque partie texte devient une suite de morceaux
+d'octets entre lesquels s'insèrent les placeholders (``{{nom}}``), y compris ceux
+que Word a découpés sur plusieurs runs. Les autres parties sont conservées
+compressées telles quelles.
+
+L'artefact est stocké sur disque sous le hash du .docx source : toute
+modification du template produit un nouveau hash et donc une recompilation.
+Le rendu se limite ensuite à concaténer morceaux et valeurs, sans analyse XML.
+
+Les boucles suivent la syntaxe docxtemplater : ``{{#associes}} … {{/associes}}``
+répète le contenu pour chaque élément de la liste ``associes`` ; à l'intérieur,
+``{{nom}}`` désigne d'abord le champ de l'élément, puis la valeur globale. Au
+moment de la compilation, les balises sont déplacées au niveau XML :
+
+- balises dans des lignes de tableau : les lignes de l'ouverture à la
+  fermeture sont répétées (tableau des apports, répartition des actions) ;
+- balises seules dans leur paragraphe : ces deux paragraphes disparaissent et
+  les paragraphes compris entre eux sont répétés ;
+- paragraphe qui commence par l'ouverture et finit par la fermeture : le
+  paragraphe entier est répété (une ligne d'associé par élément) ;
+- sinon, seul le texte entre les balises est répété, dans le paragraphe.
+
+Le rendu recopie alors la plage d'octets du bloc une fois par élément, en une
+seule passe, quel que soit le nombre d'associés.
+
+Exemple :
+    python template_compiler.py Templates/template-statuts-final.docx
+    python template_compiler.py Templates/template-statuts-final.docx --render client.json --output statuts.docx
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import pickle
+import re
+import tempfile
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Mapping, Union
+
+from docx_package import PackageWriter, raw_data_offset
+from docx_stream import STREAMED_PARTS, PartRewriter, escape_text
+from replacement_engine import TAG_PATTERN, PlaceholderMatcher
+
+COMPILER_VERSION = 3
+DEFAULT_CACHE_DIR = ".template-cache"
+ARTIFACT_SUFFIX = ".tplc"
+SLOT_MARK = "\x00"
+LOOP_OPEN = "#"
+LOOP_CLOSE = "/"
+
+_LOOP_TAG = re.compile(rb"\x00([#/])([^\x00]*)\x00")
+_MARKUP = re.compile(rb"<[^>]*>")
+
+_memory: dict[str, "CompiledTemplate"] = {}
+
+
+@dataclass
+class StaticPart:
+    """Partie recopiée telle quelle : données déjà compressées."""
+
+    filename: str
+    date_time: tuple[int, int, int, int, int, int]
+    external_attr: int
+    compress_type: int
+    crc: int
+    file_size: int
+    data: bytes
+
+    def zip_info(self) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(self.filename, self.date_time)
+        info.external_attr = self.external_attr
+        info.compress_type = self.compress_type
+        info.CRC = self.crc
+        info.file_size = self.file_size
+        info.compress_size = len(self.data)
+        return info
+
+
+@dataclass
+class CompiledPart:
+    """Partie texte : ``chunks[0] slot[0] chunks[1] … slot[n-1] chunks[n]``.
+
+    Un emplacement ``#nom`` ouvre une boucle refermée par l'emplacement ``/nom``
+    correspondant (``ends``) ; ``fields`` liste les noms utilisés directement
+    dans le corps de chaque boucle.
+    """
+
+    filename: str
+    date_time: tuple[int, int, int, int, int, int]
+    external_attr: int
+    chunks: list[bytes]
+    slots: list[str]
+    ends: dict[int, int] = field(init=False, repr=False, default_factory=dict)
+    fields: dict[int, tuple[str, ...]] = field(init=False, repr=False, default_factory=dict)
+
+    def __post_init__(self) -> None:
+        stack: list[tuple[int, dict[str, None]]] = []
+        for index, slot in enumerate(self.slots):
+            if stack and slot[:1] != LOOP_CLOSE:
+                stack[-1][1][slot.lstrip(LOOP_OPEN)] = None
+            if slot[:1] == LOOP_OPEN:
+                stack.append((index, {}))
+            elif slot[:1] == LOOP_CLOSE:
+                start, names = stack.pop()
+                self.ends[start] = index
+                self.fields[start] = tuple(names)
+
+    def zip_info(self) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(self.filename, self.date_time)
+        info.external_attr = self.external_attr
+        return info
+
+    def write(self, write, scope: Mapping[str, object], strict: bool, first: int = 0, stop: int | None = None) -> None:
+        """Écrit ``chunks[first]`` puis les emplacements ``first`` à ``stop`` (exclu) et leurs morceaux."""
+
+        chunks, slots = self.chunks, self.slots
+        stop = len(slots) if stop is None else stop
+        write(chunks[first])
+        index = first
+        while index < stop:
+            slot = slots[index]
+            if slot[:1] == LOOP_OPEN:
+                end = self.ends[index]
+                for item in scope.get(slot[1:]) or ():
+                    self.write(write, _item_scope(scope, item, self.fields[index]), strict, index + 1, end)
+                index = end
+            else:
+                value = scope.get(slot)
+                if value is None:
+                    if strict:
+                        raise KeyError(f"Placeholders sans valeur : {slot}")
+                    value = b""
+                write(value)
+            index += 1
+            write(chunks[index])
+
+
+Part = Union[StaticPart, CompiledPart]
+
+
+@dataclass
+class CompiledTemplate:
+    source_hash: str
+    parts: list[Part]
+    version: int = COMPILER_VERSION
+    placeholders: list[str] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if not self.placeholders:
+            # Noms attendus au premier niveau du payload : hors boucle, plus les noms de boucle
+            seen: dict[str, None] = {}
+            for part in self.parts:
+                if isinstance(part, CompiledPart):
+                    depth = 0
+                    for slot in part.slots:
+                        if slot[:1] == LOOP_CLOSE:
+                            depth -= 1
+                            continue
+                        if depth == 0:
+                            seen[slot.lstrip(LOOP_OPEN)] = None
+                        if slot[:1] == LOOP_OPEN:
+                            depth += 1
+            self.placeholders = list(seen)
+
+    @property
+    def loops(self) -> frozenset[str]:
+        return frozenset(
+            slot[1:] for part in self.parts if isinstance(part, CompiledPart) for slot in part.slots if slot[:1] == LOOP_OPEN
+        )
+
+    def encode_values(self, values: Mapping[str, object], strict: bool = True) -> dict[str, object]:
+        """Prépare les valeurs (échappement XML + UTF-8) une seule fois par rendu.
+
+        Les listes des boucles sont conservées telles quelles ; leurs éléments sont
+        encodés au moment où le bloc est répété.
+        """
+
+        missing = [name for name in self.placeholders if name not in values]
+        if missing and strict:
+            raise KeyError(f"Placeholders sans valeur : {', '.join(missing)}")
+        loops = self.loops
+        encoded: dict[str, object] = {}
+        for name in self.placeholders:
+            value = values.get(name)
+            encoded[name] = list(value or ()) if name in loops else encode_value(value)
+        return encoded
+
+    def render(self, values: Mapping[str, object], output: BinaryIO, strict: bool = True) -> None:
+        """Écrit le .docx rendu dans ``output`` (fichier binaire positionnable)."""
+
+        encoded = self.encode_values(values, strict)
+        with PackageWriter(output) as writer:
+            for part in self.parts:
+                if isinstance(part, StaticPart):
+                    writer.write_compressed(part.zip_info(), part.data)
+                    continue
+                with writer.open(part.zip_info()) as stream:
+                    part.write(stream.write, encoded, strict)
+
+    def render_bytes(self, values: Mapping[str, object], strict: bool = True) -> bytes:
+        buffer = io.BytesIO()
+        self.render(values, buffer, strict)
+        return buffer.getvalue()
+
+
+def encode_value(value: object) -> bytes:
+    return escape_text("" if value is None else str(value)).encode("utf-8")
+
+
+def _item_scope(scope: Mapping[str, object], item: Mapping[str, object], names: tuple[str, ...]) -> dict[str, object]:
+    """Portée d'un élément de boucle : ses champs masquent les valeurs englobantes."""
+
+    child = dict(scope)
+    for name in names:
+        if name in item:
+            value = item[name]
+            child[name] = list(value) if isinstance(value, (list, tuple)) else encode_value(value)
+    return child
+
+
+class _SlotRewriter(PartRewriter):
+    """Remplace chaque placeholder ou balise de boucle par un marqueur ``\\0nom\\0`` dans le XML produit."""
+
+    def __init__(self, write):
+        super().__init__(write, PlaceholderMatcher(lambda name: f"{SLOT_MARK}{name}{SLOT_MARK}", TAG_PATTERN))
+
+    def preserve_space(self, text: str) -> bool:
+        # Une valeur insérée peut commencer ou finir par un espace
+        return SLOT_MARK in text or super().preserve_space(text)
+
+
+def file_hash(path: str | os.PathLike) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _enclosing(xml: bytes, position: int, start_tag: bytes, end_tag: bytes) -> tuple[int, int] | None:
+    """Élément ``start_tag`` (``<w:tr``, ``<w:p``) qui contient ``position``, ou ``None``."""
+
+    start = position
+    while True:
+        start = xml.rfind(start_tag, 0, start)
+        if start < 0:
+            return None
+        # <w:p> ou <w:p …>, pas <w:pPr>
+        if xml[start + len(start_tag) : start + len(start_tag) + 1] in (b" ", b">"):
+            break
+    end = xml.find(end_tag, start)
+    if end < position:
+        return None
+    return start, end + len(end_tag)
+
+
+def _only_tag(xml: bytes, span: tuple[int, int], tag: re.Match[bytes]) -> bool:
+    return _MARKUP.sub(b"", xml[span[0] : span[1]]).strip() == tag.group(0)
+
+
+def _wraps(xml: bytes, span: tuple[int, int], opening: re.Match[bytes], closing: re.Match[bytes]) -> bool:
+    text = _MARKUP.sub(b"", xml[span[0] : span[1]]).strip()
+    return text.startswith(opening.group(0)) and text.endswith(closing.group(0))
+
+
+def hoist_loops(xml: bytes, part_name: str) -> bytes:
+    """Déplace les marqueurs de boucle aux limites des lignes ou paragraphes à répéter."""
+
+    pairs = []
+    stack: list[re.Match[bytes]] = []
+    for tag in _LOOP_TAG.finditer(xml):
+        name = tag.group(2).decode("utf-8")
+        if tag.group(1) == LOOP_OPEN.encode("ascii"):
+            stack.append(tag)
+            continue
+        if not stack or stack[-1].group(2) != tag.group(2):
+            raise ValueError(f"{part_name} : {{{{/{name}}}}} sans {{{{#{name}}}}} correspondant")
+        pairs.append((stack.pop(), tag))
+    if stack:
+        raise ValueError(f"{part_name} : {{{{#{stack[-1].group(2).decode('utf-8')}}}}} jamais refermé")
+
+    edits: list[tuple[int, int, bytes]] = []
+    for opening, closing in pairs:
+        first_row = _enclosing(xml, opening.start(), b"<w:tr", b"</w:tr>")
+        last_row = _enclosing(xml, closing.start(), b"<w:tr", b"</w:tr>")
+        if first_row and last_row:
+            edits += [
+                (first_row[0], first_row[0], opening.group(0)),
+                (opening.start(), opening.end(), b""),
+                (closing.start(), closing.end(), b""),
+                (last_row[1], last_row[1], closing.group(0)),
+            ]
+            continue
+        first = _enclosing(xml, opening.start(), b"<w:p", b"</w:p>")
+        last = _enclosing(xml, closing.start(), b"<w:p", b"</w:p>")
+        if first and last and first != last and _only_tag(xml, first, opening) and _only_tag(xml, last, closing):
+            edits += [(first[0], first[1], opening.group(0)), (last[0], last[1], closing.group(0))]
+        elif first and first == last and _wraps(xml, first, opening, closing):
+            edits += [
+                (first[0], first[0], opening.group(0)),
+                (opening.start(), opening.end(), b""),
+                (closing.start(), closing.end(), b""),
+                (first[1], first[1], closing.group(0)),
+            ]
+        # Sinon boucle dans le texte du paragraphe : les marqueurs restent en place
+
+    edits.sort(key=lambda edit: (edit[0], edit[1]))
+    pieces = []
+    position = 0
+    for start, end, replacement in edits:
+        if start < position:
+            raise ValueError(f"{part_name} : boucles imbriquées sur la même ligne ou le même paragraphe non gérées")
+        pieces += [xml[position:start], replacement]
+        position = end
+    pieces.append(xml[position:])
+    return b"".join(pieces)
+
+
+def compile_part(source: BinaryIO, info: zipfile.ZipInfo) -> CompiledPart:
+    output: list[bytes] = []
+    rewriter = _SlotRewriter(output.append)
+    while True:
+        chunk = source.read(1 << 16)
+        if not chunk:
+            break
+        rewriter.feed(chunk)
+    rewriter.close()
+
+    pieces = hoist_loops(b"".join(output), info.filename).split(SLOT_MARK.encode("ascii"))
+    chunks = pieces[0::2]
+    slots = [name.decode("utf-8") for name in pieces[1::2]]
+    return CompiledPart(info.filename, info.date_time, info.external_attr, chunks, slots)
+
+
+def compile_template(source_path: str | os.PathLike, source_hash: str | None = None) -> CompiledTemplate:
+    """Compile un template .docx (sans passer par le cache)."""
+
+    parts: list[Part] = []
+    with zipfile.ZipFile(source_path) as archive, open(source_path, "rb") as raw:
+        for info in archive.infolist():
+            if STREAMED_PARTS.match(info.filename):
+                with archive.open(info) as source:
+                    parts.append(compile_part(source, info))
+                continue
+
+            raw.seek(raw_data_offset(raw, info))
+            data = raw.read(info.compress_size)
+            parts.append(
+                StaticPart(
+                    info.filename,
+                    info.date_time,
+                    info.external_attr,
+                    info.compress_type,
+                    info.CRC,
+                    info.file_size,
+                    data,
+                )
+            )
+    return CompiledTemplate(source_hash or file_hash(source_path), parts)
+
+
+def artifact_path(source_path: str | os.PathLike, source_hash: str, cache_dir: str | os.PathLike = DEFAULT_CACHE_DIR) -> Path:
+    return Path(cache_dir) / f"{Path(source_path).stem}-{source_hash[:16]}{ARTIFACT_SUFFIX}"
+
+
+def store_template(compiled: CompiledTemplate, path: Path) -> None:
+    """Écriture atomique de l'artefact (fichier temporaire puis renommage)."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as output:
+            pickle.dump(compiled, output, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def read_artifact(path: Path, source_hash: str) -> CompiledTemplate | None:
+    try:
+        with open(path, "rb") as handle:
+            compiled = pickle.load(handle)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    if getattr(compiled, "version", None) != COMPILER_VERSION or compiled.source_hash != source_hash:
+        return None
+    return compiled
+
+
+def load_template(source_path: str | os.PathLike, cache_dir: str | os.PathLike = DEFAULT_CACHE_DIR) -> CompiledTemplate:
+    """Retourne le template compilé, depuis la mémoire, le disque ou par compilation.
+
+    Le hash du .docx source est recalculé à chaque appel : un template modifié
+    est donc toujours recompilé, et les artefacts périmés sont supprimés.
+    """
+
+    source_hash = file_hash(source_path)
+    compiled = _memory.get(source_hash)
+    if compiled is not None:
+        return compiled
+
+    path = artifact_path(source_path, source_hash, cache_dir)
+    compiled = read_artifact(path, source_hash)
+    if compiled is None:
+        compiled = compile_template(source_path, source_hash)
+        store_template(compiled, path)
+        for stale in path.parent.glob(f"{Path(source_path).stem}-*{ARTIFACT_SUFFIX}"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+
+    _memory[source_hash] = compiled
+    return compiled
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("template", help="template .docx à placeholders")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--render", metavar="JSON", help="fichier JSON des valeurs à injecter")
+    parser.add_argument("--output", help="document .docx produit (avec --render)")
+    parser.add_argument("--lenient", action="store_true", help="placeholders manquants rendus vides")
+    args = parser.parse_args()
+
+    compiled = load_template(args.template, args.cache_dir)
+    print(f"📦 {artifact_path(args.template, compiled.source_hash, args.cache_dir)}")
+    print(f"📋 {len(compiled.placeholders)} placeholders : {', '.join(compiled.placeholders)}")
+
+    if args.render:
+        if not args.output:
+            raise SystemExit("--output est requis avec --render")
+        with open(args.render, encoding="utf-8") as handle:
+            values = json.load(handle)
+        try:
+            with open(args.output, "wb") as output:
+                compiled.render(values, output, strict=not args.lenient)
+        except KeyError as exc:
+            raise SystemExit(f"❌ {exc.args[0]}") from exc
+        print(f"✅ Document généré : {args.output}")
+
+
+if __name__ == "__main__":
+    main()
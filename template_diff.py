@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""Diff structurel entre deux versions d'un template.
+
+Chaque paragraphe non vide reçoit une empreinte (hash du texte normalisé et du
+style), chaque partie l'empreinte de la suite de ses paragraphes. Deux versions
+sont comparées partie par partie : les parties identiques sont écartées sur leur
+seule empreinte, les autres sont alignées sur les hashes (préfixe et suffixe
+communs, puis ancres uniques des deux côtés, façon « patience diff ») en temps
+quasi linéaire. Le rapport liste les paragraphes ajoutés, supprimés et modifiés,
+et les placeholders apparus ou disparus.
+
+Les empreintes sont mises en cache à côté de chaque template
+(``.<nom>.fingerprint.json``) et réutilisées tant que le fichier n'a pas changé.
+Avec un seul fichier, la comparaison se fait avec la dernière empreinte
+enregistrée : relancer le script après ``build_templates.py`` montre ce que la
+reconstruction a modifié.
+
+Exemples :
+    python template_diff.py ancien.docx templates/template-statuts-enrichi.docx
+    python template_diff.py templates/template-statuts-enrichi.docx
+    python template_diff.py ancien.docx nouveau.docx --format json
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import unicodedata
+import zipfile
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterator
+from xml.parsers import expat
+
+from docx_stream import iter_docx_paragraphs, part_sort_key
+from replacement_engine import TAG_PATTERN
+from template_compiler import file_hash
+
+FINGERPRINT_VERSION = 1
+_WHITESPACE = re.compile(r"\s+")
+
+# (index dans l'ancienne version, index dans la nouvelle)
+Match = tuple[int, int]
+
+
+def normalize(text: str) -> str:
+    """Texte comparé : NFC, espaces (insécables compris) réduits à un seul."""
+
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def paragraph_hash(text: str, style: str | None) -> str:
+    return hashlib.blake2b(f"{style or ''}\x00{text}".encode("utf-8"), digest_size=8).hexdigest()
+
+
+def cache_path(path: str | os.PathLike) -> Path:
+    path = Path(path)
+    return path.with_name(f".{path.name}.fingerprint.json")
+
+
+def compute_fingerprint(path: str | os.PathLike) -> dict[str, Any]:
+    """Empreintes des paragraphes non vides, par partie : ``[hash, index, style, texte]``."""
+
+    parts: dict[str, dict[str, Any]] = {}
+    for part, index, paragraph in iter_docx_paragraphs(str(path)):
+        text = normalize(paragraph.text)
+        if not text:
+            continue
+        entry = parts.setdefault(part, {"paragraphs": []})
+        entry["paragraphs"].append([paragraph_hash(text, paragraph.style), index, paragraph.style, text])
+    for entry in parts.values():
+        digest = hashlib.blake2b(digest_size=8)
+        for paragraph in entry["paragraphs"]:
+            digest.update(paragraph[0].encode("ascii"))
+        entry["hash"] = digest.hexdigest()
+    return {"version": FINGERPRINT_VERSION, "parts": parts}
+
+
+def read_cached(path: str | os.PathLike) -> dict[str, Any] | None:
+    try:
+        with open(cache_path(path), encoding="utf-8") as handle:
+            cached = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    return cached if cached.get("version") == FINGERPRINT_VERSION else None
+
+
+def write_cached(path: str | os.PathLike, fingerprint: dict[str, Any]) -> None:
+    target = cache_path(path)
+    handle, temporary = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8") as output:
+            json.dump(fingerprint, output, ensure_ascii=False)
+        # mkstemp crée le fichier en 0600 : on reprend les droits du template
+        shutil.copymode(path, temporary)
+        os.replace(temporary, target)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def load_fingerprint(path: str | os.PathLike, use_cache: bool = True) -> dict[str, Any]:
+    """Empreinte du template, relue depuis le cache si le fichier n'a pas changé (mtime, taille, puis sha256)."""
+
+    stat = os.stat(path)
+    cached = read_cached(path) if use_cache else None
+    if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+        return cached
+
+    digest = file_hash(path)
+    if cached and cached["sha256"] == digest:
+        fingerprint = cached
+    else:
+        fingerprint = compute_fingerprint(path)
+        fingerprint["sha256"] = digest
+    fingerprint.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+    if use_cache:
+        write_cached(path, fingerprint)
+    return fingerprint
+
+
+# --- Alignement --------------------------------------------------------------
+
+
+def _unique_anchors(old: list[str], new: list[str], old_lo: int, old_hi: int, new_lo: int, new_hi: int) -> list[Match]:
+    """Plus longue suite croissante des hashes présents une seule fois de chaque côté."""
+
+    counts: dict[str, list[int]] = {}
+    for index in range(old_lo, old_hi):
+        counts.setdefault(old[index], [0, -1, 0])
+        counts[old[index]][0] += 1
+        counts[old[index]][1] = index
+    candidates = []
+    for index in range(new_lo, new_hi):
+        count = counts.get(new[index])
+        if count is not None:
+            count[2] += 1
+            candidates.append(index)
+    pairs = [(counts[new[index]][1], index) for index in candidates if counts[new[index]][0] == 1 and counts[new[index]][2] == 1]
+    pairs.sort()
+
+    # Tri par patience sur les index de la nouvelle version : O(k log k)
+    tails: list[int] = []
+    tail_pair: list[int] = []
+    previous: list[int] = []
+    for position, (_old_index, new_index) in enumerate(pairs):
+        slot = bisect_left(tails, new_index)
+        if slot == len(tails):
+            tails.append(new_index)
+            tail_pair.append(position)
+        else:
+            tails[slot] = new_index
+            tail_pair[slot] = position
+        previous.append(tail_pair[slot - 1] if slot else -1)
+    anchors = []
+    position = tail_pair[-1] if tail_pair else -1
+    while position >= 0:
+        anchors.append(pairs[position])
+        position = previous[position]
+    anchors.reverse()
+    return anchors
+
+
+def align(old: list[str], new: list[str]) -> list[Match]:
+    """Couples ``(i, j)`` de paragraphes identiques, dans l'ordre des deux versions."""
+
+    matches: list[Match] = []
+    # Pile de plages à aligner : pas de récursion, quelle que soit la taille des documents
+    stack: list[tuple[int, int, int, int] | Match] = [(0, len(old), 0, len(new))]
+    while stack:
+        item = stack.pop()
+        if len(item) == 2:
+            matches.append(item)
+            continue
+        old_lo, old_hi, new_lo, new_hi = item
+        while old_lo < old_hi and new_lo < new_hi and old[old_lo] == new[new_lo]:
+            matches.append((old_lo, new_lo))
+            old_lo, new_lo = old_lo + 1, new_lo + 1
+        suffix = []
+        while old_lo < old_hi and new_lo < new_hi and old[old_hi - 1] == new[new_hi - 1]:
+            old_hi, new_hi = old_hi - 1, new_hi - 1
+            suffix.append((old_hi, new_hi))
+        pending: list[tuple[int, int, int, int] | Match] = []
+        if old_lo < old_hi and new_lo < new_hi:
+            anchors = _unique_anchors(old, new, old_lo, old_hi, new_lo, new_hi)
+            for old_index, new_index in anchors:
+                pending += [(old_lo, old_index, new_lo, new_index), (old_index, new_index)]
+                old_lo, new_lo = old_index + 1, new_index + 1
+            if anchors:
+                pending.append((old_lo, old_hi, new_lo, new_hi))
+        pending += reversed(suffix)
+        # Ordre de traitement : plages et ancres de gauche à droite
+        stack.extend(reversed(pending))
+    return matches
+
+
+def _gaps(matches: list[Match], old_size: int, new_size: int) -> Iterator[tuple[range, range]]:
+    """Plages non appariées entre deux correspondances successives."""
+
+    old_next = new_next = 0
+    for old_index, new_index in [*matches, (old_size, new_size)]:
+        if old_index > old_next or new_index > new_next:
+            yield range(old_next, old_index), range(new_next, new_index)
+        old_next, new_next = old_index + 1, new_index + 1
+
+
+# --- Comparaison -------------------------------------------------------------
+
+
+def _placeholders(paragraphs: list[list[Any]]) -> Counter[str]:
+    return Counter(name for paragraph in paragraphs for name in TAG_PATTERN.findall(paragraph[3]))
+
+
+def diff_parts(name: str, old: list[list[Any]], new: list[list[Any]]) -> list[dict[str, Any]]:
+    changes = []
+    matches = align([paragraph[0] for paragraph in old], [paragraph[0] for paragraph in new])
+    for removed, added in _gaps(matches, len(old), len(new)):
+        # Dans une même plage, les paragraphes sont appariés dans l'ordre : modifiés, puis ajouts ou suppressions
+        for old_index, new_index in zip(removed, added):
+            before, after = old[old_index], new[new_index]
+            changes.append({"kind": "changed", "part": name, "old": before[1], "new": after[1], "style": [before[2], after[2]], "text": [before[3], after[3]]})
+        for old_index in removed[len(added) :]:
+            changes.append({"kind": "removed", "part": name, "old": old[old_index][1], "style": old[old_index][2], "text": old[old_index][3]})
+        for new_index in added[len(removed) :]:
+            changes.append({"kind": "added", "part": name, "new": new[new_index][1], "style": new[new_index][2], "text": new[new_index][3]})
+    return changes
+
+
+def diff_fingerprints(old: dict[str, Any], new: dict[str, Any]) -> dict[str, Any]:
+    changes = []
+    unchanged = 0
+    old_parts, new_parts = old["parts"], new["parts"]
+    for name in sorted(old_parts.keys() | new_parts.keys(), key=part_sort_key):
+        old_part = old_parts.get(name, {"hash": None, "paragraphs": []})
+        new_part = new_parts.get(name, {"hash": None, "paragraphs": []})
+        if old_part["hash"] == new_part["hash"]:
+            unchanged += 1
+            continue
+        changes.extend(diff_parts(name, old_part["paragraphs"], new_part["paragraphs"]))
+
+    old_placeholders = sum((_placeholders(part["paragraphs"]) for part in old_parts.values()), Counter())
+    new_placeholders = sum((_placeholders(part["paragraphs"]) for part in new_parts.values()), Counter())
+    return {
+        "changes": changes,
+        "unchanged_parts": unchanged,
+        "placeholders_added": sorted(new_placeholders.keys() - old_placeholders.keys()),
+        "placeholders_removed": sorted(old_placeholders.keys() - new_placeholders.keys()),
+    }
+
+
+def format_report(report: dict[str, Any]) -> Iterator[str]:
+    part = None
+    for change in report["changes"]:
+        if change["part"] != part:
+            part = change["part"]
+            yield f"📄 {part}"
+        if change["kind"] == "changed":
+            style = "" if change["style"][0] == change["style"][1] else f" (style {change['style'][0]} → {change['style'][1]})"
+            yield f"  ~ §{change['old'] + 1} → §{change['new'] + 1}{style}"
+            yield f"      - {change['text'][0]}"
+            yield f"      + {change['text'][1]}"
+        elif change["kind"] == "removed":
+            yield f"  - §{change['old'] + 1} {change['text']}"
+        else:
+            yield f"  + §{change['new'] + 1} {change['text']}"
+    if report["placeholders_added"]:
+        yield f"🏷️  Placeholders ajoutés : {', '.join(report['placeholders_added'])}"
+    if report["placeholders_removed"]:
+        yield f"🏷️  Placeholders supprimés : {', '.join(report['placeholders_removed'])}"
+    if not report["changes"]:
+        yield f"✅ Aucune différence ({report['unchanged_parts']} partie(s) identique(s))"
+        return
+    counts = Counter(change["kind"] for change in report["changes"])
+    yield (
+        f"📊 {counts['changed']} modifié(s), {counts['added']} ajouté(s), {counts['removed']} supprimé(s), "
+        f"{report['unchanged_parts']} partie(s) identique(s)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", metavar="docx", help="ancienne puis nouvelle version, ou un seul template")
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    parser.add_argument("--no-cache", action="store_true", help="ne lit ni n'écrit les empreintes en cache")
+    args = parser.parse_args()
+    if len(args.paths) > 2:
+        parser.error("un ou deux templates attendus")
+    if len(args.paths) == 1 and args.no_cache:
+        parser.error("--no-cache demande deux templates (un seul template se compare à son empreinte en cache)")
+
+    try:
+        if len(args.paths) == 1:
+            # Dernière empreinte enregistrée, même si le fichier a changé depuis
+            old = read_cached(args.paths[0])
+            if old is None:
+                load_fingerprint(args.paths[0])
+                print(f"📌 Empreinte enregistrée : {cache_path(args.paths[0])}")
+                return
+        else:
+            old = load_fingerprint(args.paths[0], not args.no_cache)
+        new = load_fingerprint(args.paths[-1], not args.no_cache)
+    except (OSError, zipfile.BadZipFile, expat.ExpatError) as exc:
+        raise SystemExit(f"❌ Impossible de lire le template : {exc}") from exc
+
+    report = diff_fingerprints(old, new)
+    if args.format == "json":
+        print(json.dumps(report, ensure_ascii=False, indent=1))
+        return
+    for line in format_report(report):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""Chronométrage et compteurs du pipeline de templates.
+
+Les scripts enregistrent leurs étapes dans le registre global ``metrics`` :
+
+    with metrics.timer("load"):
+        document = Document(path)
+    metrics.incr("paragraphs_visited", 120)
+
+Le registre est exporté à la fin d'un script par :func:`instrumented`, en JSON
+(une ligne par exécution) ou au format texte Prometheus si le fichier se termine
+par ``.prom``. Le profilage cProfile (ou pyinstrument pour un fichier ``.html``)
+est optionnel.
+
+Sans option en ligne de commande, les variables d'environnement
+``TEMPLATE_METRICS`` et ``TEMPLATE_PROFILE`` donnent les fichiers de sortie.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+METRICS_ENV = "TEMPLATE_METRICS"
+PROFILE_ENV = "TEMPLATE_PROFILE"
+PROMETHEUS_PREFIX = "template_"
+
+
+class Metrics:
+    """Registre de durées, compteurs et compteurs par libellé (motif de remplacement…)."""
+
+    def __init__(self) -> None:
+        self.timings: dict[str, list[float]] = {}
+        self.counters: Counter[str] = Counter()
+        self.labeled: dict[str, Counter[str]] = {}
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.timings.setdefault(stage, [0, 0.0])
+            entry[0] += 1
+            entry[1] += time.perf_counter() - start
+
+    def incr(self, name: str, value: int = 1) -> None:
+        self.counters[name] += value
+
+    def record_hits(self, name: str, matcher) -> None:
+        """Reprend les occurrences cumulées par motif d'un matcher, y compris les motifs jamais trouvés."""
+
+        counted = matcher.hits or {}
+        self.labeled[name] = Counter({search: counted.get(search, 0) for search, _replacement in matcher.replacements})
+
+    def reset(self) -> None:
+        self.timings.clear()
+        self.counters.clear()
+        self.labeled.clear()
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "timings": {stage: {"count": count, "seconds": round(total, 6)} for stage, (count, total) in self.timings.items()},
+            "counters": dict(self.counters),
+            "labeled": {name: dict(values) for name, values in self.labeled.items()},
+        }
+
+    def to_prometheus(self, prefix: str = PROMETHEUS_PREFIX) -> str:
+        lines = [
+            f"# TYPE {prefix}stage_seconds_total counter",
+            *(f'{prefix}stage_seconds_total{{stage="{stage}"}} {total:.6f}' for stage, (_count, total) in self.timings.items()),
+            f"# TYPE {prefix}stage_calls_total counter",
+            *(f'{prefix}stage_calls_total{{stage="{stage}"}} {count}' for stage, (count, _total) in self.timings.items()),
+        ]
+        for name, value in self.counters.items():
+            lines += [f"# TYPE {prefix}{name}_total counter", f"{prefix}{name}_total {value}"]
+        for name, values in self.labeled.items():
+            lines.append(f"# TYPE {prefix}{name}_total counter")
+            lines += [f'{prefix}{name}_total{{label="{_escape_label(label)}"}} {value}' for label, value in values.items()]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str, **context: Any) -> None:
+        """Exporte vers ``path`` : texte Prometheus (``.prom``) ou ligne JSON ajoutée au fichier."""
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if path.endswith(".prom"):
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(self.to_prometheus())
+            return
+        record = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), **context, **self.as_dict()}
+        with open(path, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = Metrics()
+
+
+@contextmanager
+def profiled(path: str | None) -> Iterator[None]:
+    """Profile le bloc : pyinstrument pour un fichier ``.html`` (si installé), cProfile sinon."""
+
+    if not path:
+        yield
+        return
+
+    if path.endswith(".html"):
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise SystemExit("pyinstrument est requis pour un profil .html (pip install pyinstrument)")
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(profiler.output_html())
+        return
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+@contextmanager
+def instrumented(script: str, metrics_path: str | None = None, profile_path: str | None = None) -> Iterator[Metrics]:
+    """Active profilage et export des métriques autour du ``main`` d'un script."""
+
+    metrics_path = metrics_path or os.environ.get(METRICS_ENV)
+    profile_path = profile_path or os.environ.get(PROFILE_ENV)
+    with profiled(profile_path):
+        try:
+            with metrics.timer("total"):
+                yield metrics
+        finally:
+            flush(script, metrics_path)
+
+
+def flush(script: str, metrics_path: str | None = None) -> None:
+    """Exporte le registre (``--metrics`` ou ``$TEMPLATE_METRICS``) ; sans effet si aucun fichier n'est demandé."""
+
+    metrics_path = metrics_path or os.environ.get(METRICS_ENV)
+    if metrics_path:
+        metrics.write(metrics_path, script=script)
+
+
+def add_arguments(parser) -> None:
+    """Options ``--metrics`` et ``--profile`` communes aux scripts."""
+
+    parser.add_argument("--metrics", help=f"export des métriques (.prom ou JSON), défaut ${METRICS_ENV}")
+    parser.add_argument("--profile", help=f"profil cProfile (.prof) ou pyinstrument (.html), défaut ${PROFILE_ENV}")
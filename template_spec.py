@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""Génération des templates .docx à partir d'une description déclarative.
+
+Une spécification (JSON, ou YAML si PyYAML est installé) décrit les marges, les
+styles et la suite des blocs du document. Les styles sont créés une seule fois
+dans le document : les paragraphes y font référence au lieu de porter chacun
+leur propre mise en forme (taille, gras, alignement).
+
+Blocs reconnus :
+    "texte"                                  paragraphe dans le style "body"
+    ""                                       paragraphe vide
+    {"text": "...", "style": "strong"}       paragraphe dans un style de la spec
+    {"heading": "...", "level": 1, "align": "center"}
+    {"part": "TITRE I : ..."}                titre de partie, mis en forme selon "part"
+    {"article": "Article 1 - ...", "body": ["...", ...]}
+                                             article, mis en forme selon "article"
+    {"page_break": true}
+
+Exemples :
+    python template_spec.py                          # toutes les specs de templates/specs
+    python template_spec.py templates/specs/statuts-clean.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Inches, Pt
+
+from replacement_engine import PLACEHOLDER_PATTERN
+from template_metrics import add_arguments, instrumented, metrics
+
+SPECS_DIR = "templates/specs"
+SPEC_SUFFIXES = (".json", ".yaml", ".yml")
+STYLE_PREFIX = "Statuts "
+
+ALIGNMENTS = {
+    "left": WD_ALIGN_PARAGRAPH.LEFT,
+    "center": WD_ALIGN_PARAGRAPH.CENTER,
+    "right": WD_ALIGN_PARAGRAPH.RIGHT,
+    "justify": WD_ALIGN_PARAGRAPH.JUSTIFY,
+}
+
+
+def load_spec(path: str | Path) -> dict[str, Any]:
+    path = Path(path)
+    with open(path, encoding="utf-8") as handle:
+        if path.suffix in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError as exc:
+                raise SystemExit(f"PyYAML est requis pour lire {path} (pip install pyyaml)") from exc
+            return yaml.safe_load(handle)
+        return json.load(handle)
+
+
+def iter_spec_paths(directory: str | Path = SPECS_DIR) -> list[Path]:
+    return sorted(path for path in Path(directory).iterdir() if path.suffix in SPEC_SUFFIXES)
+
+
+def iter_texts(blocks: Iterable[Any]) -> Iterator[str]:
+    for block in blocks:
+        if isinstance(block, str):
+            yield block
+            continue
+        for key in ("text", "heading", "part", "article"):
+            if key in block:
+                yield block[key]
+        yield from iter_texts(block.get("body", ()))
+
+
+def spec_placeholders(spec: dict[str, Any]) -> list[str]:
+    """Placeholders utilisés par la spec, dans l'ordre d'apparition."""
+
+    seen: dict[str, None] = {}
+    for text in iter_texts(spec["blocks"]):
+        seen.update(dict.fromkeys(PLACEHOLDER_PATTERN.findall(text)))
+    return list(seen)
+
+
+class TemplateBuilder:
+    """Construit un document python-docx à partir d'une spécification."""
+
+    def __init__(self, spec: dict[str, Any]):
+        self.spec = spec
+        self.doc = Document()
+        self.styles = {name: self._create_style(name, options) for name, options in spec.get("styles", {}).items()}
+        self.styles.setdefault("body", self.doc.styles["Normal"])
+
+    def _create_style(self, name: str, options: dict[str, Any]):
+        # "body" configure directement le style Normal : les paragraphes courants
+        # n'ont alors besoin d'aucune propriété dans le XML
+        if name == "body":
+            style = self.doc.styles["Normal"]
+        else:
+            style = self.doc.styles.add_style(STYLE_PREFIX + name, WD_STYLE_TYPE.PARAGRAPH)
+            style.base_style = self.doc.styles["Normal"]
+        if "size" in options:
+            style.font.size = Pt(options["size"])
+        if options.get("bold"):
+            style.font.bold = True
+        if options.get("italic"):
+            style.font.italic = True
+        if "align" in options:
+            style.paragraph_format.alignment = ALIGNMENTS[options["align"]]
+        return style
+
+    def style(self, name: str | None):
+        try:
+            return self.styles[name or "body"]
+        except KeyError as exc:
+            raise ValueError(f"Style inconnu dans la spec : {name}") from exc
+
+    def paragraph(self, text: str = "", style: str | None = None) -> None:
+        style = self.style(style)
+        self.doc.add_paragraph(text, style=None if style.name == "Normal" else style)
+
+    def heading(self, text: str, level: int, align: str | None = None) -> None:
+        heading = self.doc.add_heading(text, level=level)
+        if align:
+            heading.alignment = ALIGNMENTS[align]
+
+    def titled(self, text: str, options: dict[str, Any]) -> None:
+        """Titre de partie ou d'article selon la mise en forme déclarée par la spec."""
+
+        if "heading" in options:
+            self.heading(text, options["heading"], options.get("align"))
+        else:
+            self.paragraph(text, options.get("style", "strong"))
+
+    def block(self, block: Any) -> None:
+        if isinstance(block, str):
+            self.paragraph(block)
+        elif "text" in block:
+            self.paragraph(block["text"], block.get("style"))
+        elif "heading" in block:
+            self.heading(block["heading"], block.get("level", 1), block.get("align"))
+        elif "part" in block:
+            options = self.spec.get("part", {})
+            self.titled(block["part"], options)
+            if options.get("blank_after"):
+                self.paragraph()
+        elif "article" in block:
+            options = self.spec.get("article", {})
+            self.titled(block["article"], options)
+            for item in block.get("body", ()):
+                self.block(item)
+            if options.get("blank_after"):
+                self.paragraph()
+        elif block.get("page_break"):
+            self.doc.add_page_break()
+        else:
+            raise ValueError(f"Bloc non reconnu : {block!r}")
+
+    def build(self):
+        margins = self.spec.get("margins", {})
+        for section in self.doc.sections:
+            for side in ("top", "bottom", "left", "right"):
+                if side in margins:
+                    setattr(section, f"{side}_margin", Inches(margins[side]))
+
+        for block in self.spec["blocks"]:
+            self.block(block)
+        return self.doc
+
+
+def build_from_spec(spec_path: str | Path, output_path: str | None = None) -> tuple[str, list[str]]:
+    """Génère le template décrit par ``spec_path`` ; retourne (chemin produit, placeholders)."""
+
+    spec = load_spec(spec_path)
+    output = output_path or spec["output"]
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with metrics.timer("build"):
+        document = TemplateBuilder(spec).build()
+    with metrics.timer("save"):
+        document.save(output)
+    metrics.incr("paragraphs_written", len(document.paragraphs))
+    metrics.incr("bytes_written", Path(output).stat().st_size)
+    return output, spec_placeholders(spec)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("specs", nargs="*", help=f"specs à générer (défaut : toutes celles de {SPECS_DIR})")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrumented("template_spec.py", args.metrics, args.profile):
+        for spec_path in args.specs or iter_spec_paths():
+            output, placeholders = build_from_spec(spec_path)
+            print(f"✅ Template créé : {output} ({len(placeholders)} placeholders)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""Magasin de templates compilés partagé en mémoire entre processus de rendu.
+
+Les templates compilés (voir ``template_compiler.py``) sont regroupés dans un
+seul fichier en lecture seule :
+
+    en-tête   b"TPLSTORE" + version + taille de l'index (struct ``<8sII``)
+    index     JSON : hash source, placeholders et, pour chaque partie, position
+              des données compressées ou des morceaux XML dans la zone de données
+    données   octets bruts, dans l'ordre de l'index
+
+Chaque processus ouvre le fichier avec ``mmap`` : les pages sont celles du cache
+du système, partagées par tous les workers, et un rendu ne lit que des tranches
+(``memoryview``) de la zone projetée, sans copie. Avec 16 workers la mémoire
+résidente reste celle d'un seul exemplaire du template.
+
+Exemples :
+    python template_store.py Templates/template-statuts-final.docx
+    python template_store.py Templates/*.docx --store .template-cache/templates.tplm --measure 16
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Any, Iterable
+
+from template_compiler import DEFAULT_CACHE_DIR, CompiledPart, CompiledTemplate, StaticPart, compile_template, file_hash
+
+STORE_MAGIC = b"TPLSTORE"
+STORE_VERSION = 3
+STORE_HEADER = struct.Struct("<8sII")
+STORE_NAME = "templates.tplm"
+DEFAULT_STORE_PATH = os.path.join(DEFAULT_CACHE_DIR, STORE_NAME)
+
+
+def template_key(path: str | os.PathLike) -> str:
+    return Path(path).as_posix()
+
+
+def _describe(compiled: CompiledTemplate, write_data) -> dict[str, Any]:
+    parts = []
+    for part in compiled.parts:
+        common = {"filename": part.filename, "date_time": list(part.date_time), "external_attr": part.external_attr}
+        if isinstance(part, StaticPart):
+            parts.append(
+                {
+                    **common,
+                    "compress_type": part.compress_type,
+                    "crc": part.crc,
+                    "file_size": part.file_size,
+                    "data": write_data(part.data),
+                }
+            )
+        else:
+            parts.append({**common, "chunks": [write_data(chunk) for chunk in part.chunks], "slots": part.slots})
+    return {"source_hash": compiled.source_hash, "placeholders": compiled.placeholders, "parts": parts}
+
+
+def write_store(templates: Iterable[str | os.PathLike], store_path: str | os.PathLike = DEFAULT_STORE_PATH) -> dict[str, str]:
+    """Compile les templates et écrit le magasin (écriture atomique).
+
+    Un processus qui a déjà projeté l'ancien fichier continue de le lire sans
+    risque : le nouveau magasin remplace l'entrée du dossier, pas ses pages.
+    """
+
+    data: list[bytes] = []
+    offset = 0
+
+    def write_data(blob: bytes) -> list[int]:
+        nonlocal offset
+        data.append(blob)
+        position = [offset, len(blob)]
+        offset += len(blob)
+        return position
+
+    index = {template_key(path): _describe(compile_template(path), write_data) for path in templates}
+    header = json.dumps({"templates": index}, ensure_ascii=False).encode("utf-8")
+
+    store_path = Path(store_path)
+    store_path.parent.mkdir(parents=True, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=store_path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as output:
+            output.write(STORE_HEADER.pack(STORE_MAGIC, STORE_VERSION, len(header)))
+            output.write(header)
+            output.writelines(data)
+        os.replace(temporary, store_path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return {key: entry["source_hash"] for key, entry in index.items()}
+
+
+class TemplateStore:
+    """Magasin projeté en mémoire ; les templates sont construits à la demande, sans copie des données."""
+
+    def __init__(self, store_path: str | os.PathLike = DEFAULT_STORE_PATH):
+        self.path = Path(store_path)
+        with open(self.path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_size = STORE_HEADER.unpack_from(self._map)
+        if magic != STORE_MAGIC or version != STORE_VERSION:
+            self._map.close()
+            raise ValueError(f"Magasin de templates invalide ou d'une autre version : {self.path}")
+        start = STORE_HEADER.size
+        self.index: dict[str, dict[str, Any]] = json.loads(self._map[start : start + header_size])["templates"]
+        self._data = memoryview(self._map)[start + header_size :]
+        self._templates: dict[str, CompiledTemplate] = {}
+
+    def __contains__(self, template: str | os.PathLike) -> bool:
+        return template_key(template) in self.index
+
+    def source_hashes(self) -> dict[str, str]:
+        return {key: entry["source_hash"] for key, entry in self.index.items()}
+
+    def _slice(self, position: list[int]) -> memoryview:
+        offset, size = position
+        return self._data[offset : offset + size]
+
+    def template(self, template: str | os.PathLike) -> CompiledTemplate:
+        """Template compilé dont les octets sont des vues sur le fichier projeté."""
+
+        key = template_key(template)
+        compiled = self._templates.get(key)
+        if compiled is not None:
+            return compiled
+        try:
+            entry = self.index[key]
+        except KeyError:
+            raise KeyError(f"Template absent du magasin {self.path} : {key}") from None
+
+        parts = []
+        for part in entry["parts"]:
+            date_time = tuple(part["date_time"])
+            if "data" in part:
+                parts.append(
+                    StaticPart(
+                        part["filename"],
+                        date_time,
+                        part["external_attr"],
+                        part["compress_type"],
+                        part["crc"],
+                        part["file_size"],
+                        self._slice(part["data"]),
+                    )
+                )
+            else:
+                chunks = [self._slice(position) for position in part["chunks"]]
+                parts.append(CompiledPart(part["filename"], date_time, part["external_attr"], chunks, part["slots"]))
+        compiled = self._templates[key] = CompiledTemplate(entry["source_hash"], parts, placeholders=entry["placeholders"])
+        return compiled
+
+    def close(self) -> None:
+        self._templates.clear()
+        self._data.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # Un template obtenu par template() est encore utilisé : la projection
+            # sera libérée avec ses dernières vues
+            pass
+
+    def __enter__(self) -> "TemplateStore":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.close()
+
+
+def ensure_store(templates: Iterable[str | os.PathLike], store_path: str | os.PathLike = DEFAULT_STORE_PATH) -> Path:
+    """Reconstruit le magasin si un template demandé manque ou si son contenu (sha256) a changé.
+
+    À appeler une fois dans le processus parent ; les workers se contentent
+    d'ouvrir le fichier avec :class:`TemplateStore`.
+    """
+
+    templates = list(templates)
+    expected = {template_key(path): file_hash(path) for path in templates}
+    try:
+        with TemplateStore(store_path) as store:
+            current = store.source_hashes()
+    except (OSError, ValueError):
+        current = {}
+    if any(current.get(key) != digest for key, digest in expected.items()):
+        # Les templates déjà présents (et toujours sur disque) sont conservés
+        kept = [key for key in current if key not in expected and os.path.exists(key)]
+        write_store([*templates, *kept], store_path)
+    return Path(store_path)
+
+
+def resident_kb(pid: int | None = None) -> dict[str, int]:
+    """RSS et PSS (part proportionnelle des pages partagées) d'un processus, Linux uniquement."""
+
+    values = {}
+    with open(f"/proc/{pid or 'self'}/smaps_rollup", encoding="ascii") as handle:
+        for line in handle:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key.lower()] = int(rest.split()[0])
+    return values
+
+
+def _hold_template(mode: str, store_path: str, template: str, ready, release) -> None:
+    """Worker de mesure : charge le template (projeté ou désérialisé), rend un document puis attend."""
+
+    import io
+
+    from template_compiler import load_template
+
+    store = None
+    if mode == "mmap":
+        store = TemplateStore(store_path)
+        compiled = store.template(template)
+    else:
+        compiled = load_template(template)
+    compiled.render(dict.fromkeys(compiled.placeholders, "x"), io.BytesIO())
+    ready.set()
+    release.wait()
+
+
+def measure_workers(mode: str, store_path: str, template: str, workers: int) -> dict[str, int]:
+    """RSS et PSS cumulées de ``workers`` processus tenant le même template.
+
+    ``mode`` vaut ``"mmap"`` (magasin projeté) ou ``"pickle"`` (artefact de
+    ``template_compiler.load_template``, une copie privée par processus).
+    """
+
+    from multiprocessing import get_context
+
+    context = get_context("spawn")
+    release = context.Event()
+    processes = []
+    try:
+        for _ in range(workers):
+            ready = context.Event()
+            process = context.Process(target=_hold_template, args=(mode, store_path, template, ready, release))
+            process.start()
+            ready.wait()
+            processes.append(process)
+        totals = {"rss": 0, "pss": 0}
+        for process in processes:
+            for key, value in resident_kb(process.pid).items():
+                totals[key] += value
+        return totals
+    finally:
+        release.set()
+        for process in processes:
+            process.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("templates", nargs="+", help="templates .docx à placer dans le magasin")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="fichier du magasin")
+    parser.add_argument("--measure", type=int, metavar="N", help="mesure la PSS cumulée de N workers (Linux)")
+    args = parser.parse_args()
+
+    path = ensure_store(args.templates, args.store)
+    with TemplateStore(path) as store:
+        print(f"📦 {path} ({path.stat().st_size} octets)")
+        for key in store.index:
+            print(f"  - {key} : {len(store.template(key).placeholders)} placeholders")
+
+    if args.measure:
+        # L'écart entre les deux modes est la mémoire occupée par les copies du template
+        for workers in sorted({1, args.measure}):
+            for mode in ("pickle", "mmap"):
+                totals = measure_workers(mode, str(path), template_key(args.templates[0]), workers)
+                print(f"📊 {workers:>3} worker(s) {mode:<6} : PSS cumulée {totals['pss'] / 1024:.1f} Mo (RSS cumulée {totals['rss'] / 1024:.1f} Mo)")
+
+
+if __name__ == "__main__":
+    main()
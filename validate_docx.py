@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""Contrôle en masse des .docx générés (intégrité, XML, placeholders, relations).
+
+Chaque fichier est vérifié dans un processus du pool, en flux : les parties
+sont décompressées par blocs et analysées par expat au fil de la lecture, sans
+jamais charger un document entier. Une partie dont la taille décompressée
+dépasse le budget (``--max-part-mb``, garde contre les archives piégées) n'est
+pas lue.
+
+Contrôles :
+
+- ``ZIP_INVALID`` / ``ZIP_CORRUPT`` / ``ZIP_DUPLICATE`` : archive illisible,
+  CRC faux, entrée en double ;
+- ``XML_MALFORMED`` : partie XML mal formée (balise coupée par une regex…) ;
+- ``PLACEHOLDER_UNRESOLVED`` : ``{{nom}}`` resté dans le texte ;
+  ``PLACEHOLDER_FRAGMENT`` (avertissement) : ``{{`` ou ``}}`` isolé ;
+- ``CONTENT_TYPE_MISSING`` : partie sans type dans ``[Content_Types].xml`` ;
+- ``REL_TARGET_MISSING`` : relation interne vers une partie absente ;
+  ``REL_ID_UNKNOWN`` : ``r:id``/``r:embed`` sans relation correspondante ;
+  ``REL_ID_DUPLICATE``, ``MAIN_DOCUMENT_MISSING``.
+
+Le rapport est produit en NDJSON, une ligne par fichier (mêmes champs que
+``ValidationError`` de ``lib/validateStatuts.ts`` : code, message, severity,
+plus la partie concernée) ; le code de sortie vaut 1 si un fichier est invalide.
+
+Exemples :
+    python validate_docx.py out/ > rapport.ndjson
+    python validate_docx.py out/ --output rapport.ndjson --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import posixpath
+import sys
+import time
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterator
+from urllib.parse import unquote
+from xml.parsers import expat
+
+from docx_stream import STREAMED_PARTS
+from read_doc import iter_documents
+from replacement_engine import TAG_PATTERN
+
+READ_CHUNK_SIZE = 1 << 16
+DEFAULT_MAX_PART_MB = 256
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PACKAGE_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+OFFICE_DOCUMENT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+CONTENT_TYPES_PART = "[Content_Types].xml"
+
+# Noms qualifiés tels que produits par expat (espace de noms, espace, nom local)
+_PARAGRAPH = f"{W_NS} p"
+_TEXT = f"{W_NS} t"
+_RELATIONSHIP = f"{PACKAGE_REL_NS} Relationship"
+_DEFAULT = f"{CONTENT_TYPES_NS} Default"
+_OVERRIDE = f"{CONTENT_TYPES_NS} Override"
+
+
+def issue(code: str, message: str, part: str | None = None, severity: str = "error") -> dict[str, Any]:
+    return {"code": code, "message": message, "part": part, "severity": severity}
+
+
+def source_part(rels_name: str) -> str:
+    """``word/_rels/document.xml.rels`` → ``word/document.xml`` ; ``_rels/.rels`` → racine (``""``)."""
+
+    directory, name = posixpath.split(rels_name)
+    return posixpath.join(posixpath.dirname(directory), name[: -len(".rels")]).lstrip("/")
+
+
+class PartScanner:
+    """Analyse en flux d'une partie XML : relations déclarées ou référencées, types, texte."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.is_text = bool(STREAMED_PARTS.match(name))
+        self.references: set[str] = set()
+        self.relationships: list[dict[str, str]] = []
+        self.defaults: dict[str, str] = {}
+        self.overrides: dict[str, str] = {}
+        self.issues: list[dict[str, Any]] = []
+        self._paragraphs: list[list[str]] = []
+        self._paragraph_index = 0
+        self._in_text = False
+        self._parser = expat.ParserCreate(namespace_separator=" ")
+        self._parser.buffer_text = True
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+        if self.is_text:
+            self._parser.CharacterDataHandler = self._characters
+
+    def _start(self, name: str, attributes: dict[str, str]) -> None:
+        if attributes:
+            for attribute, value in attributes.items():
+                # r:id, r:embed, r:link… : toute valeur dans cet espace de noms est un identifiant de relation
+                if attribute.startswith(REL_NS):
+                    self.references.add(value)
+        if name == _PARAGRAPH:
+            self._paragraphs.append([])
+        elif name == _TEXT:
+            self._in_text = True
+        elif name == _RELATIONSHIP:
+            self.relationships.append(attributes)
+        elif name == _DEFAULT:
+            self.defaults[attributes.get("Extension", "").lower()] = attributes.get("ContentType", "")
+        elif name == _OVERRIDE:
+            self.overrides[attributes.get("PartName", "").lstrip("/")] = attributes.get("ContentType", "")
+
+    def _end(self, name: str) -> None:
+        if name == _TEXT:
+            self._in_text = False
+        elif name == _PARAGRAPH and self._paragraphs:
+            self._check_text("".join(self._paragraphs.pop()))
+            self._paragraph_index += 1
+
+    def _characters(self, data: str) -> None:
+        if self._in_text and self._paragraphs:
+            self._paragraphs[-1].append(data)
+
+    def _check_text(self, text: str) -> None:
+        if "{" not in text and "}" not in text:
+            return
+        location = f"§{self._paragraph_index + 1}"
+        names = TAG_PATTERN.findall(text)
+        if names:
+            self.issues.append(issue("PLACEHOLDER_UNRESOLVED", f"{location} : {', '.join(names)}", self.name))
+        remainder = TAG_PATTERN.sub("", text)
+        if "{{" in remainder or "}}" in remainder:
+            self.issues.append(issue("PLACEHOLDER_FRAGMENT", f"{location} : {text.strip()[:120]}", self.name, "warning"))
+
+    def feed(self, data: bytes, final: bool = False) -> None:
+        self._parser.Parse(data, final)
+
+
+def check_relationships(scanners: dict[str, PartScanner], names: set[str]) -> Iterator[dict[str, Any]]:
+    for rels_name, scanner in scanners.items():
+        if not rels_name.endswith(".rels"):
+            continue
+        source = source_part(rels_name)
+        if source and source not in names:
+            yield issue("REL_SOURCE_MISSING", f"relations d'une partie absente ({source})", rels_name, "warning")
+        base = posixpath.dirname(source)
+        seen: set[str] = set()
+        for relationship in scanner.relationships:
+            identifier = relationship.get("Id", "")
+            if identifier in seen:
+                yield issue("REL_ID_DUPLICATE", f"identifiant {identifier} répété", rels_name)
+            seen.add(identifier)
+            if relationship.get("TargetMode") == "External":
+                continue
+            target = unquote(relationship.get("Target", ""))
+            resolved = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join(base, target))
+            if resolved not in names:
+                yield issue("REL_TARGET_MISSING", f"{identifier} → {target} absent de l'archive", rels_name)
+
+        referencing = scanners.get(source)
+        if referencing is not None:
+            for identifier in sorted(referencing.references - seen):
+                yield issue("REL_ID_UNKNOWN", f"{identifier} utilisé sans relation déclarée", source)
+
+    # Parties qui référencent des relations sans fichier .rels
+    for name, scanner in scanners.items():
+        if scanner.references and posixpath.join(posixpath.dirname(name), "_rels", posixpath.basename(name) + ".rels") not in scanners:
+            yield issue("REL_ID_UNKNOWN", f"{', '.join(sorted(scanner.references))} sans fichier de relations", name)
+
+
+
+def content_type(content_types: PartScanner, name: str) -> str | None:
+    if name in content_types.overrides:
+        return content_types.overrides[name]
+    # Extension du nom de fichier : ``_rels/.rels`` → ``rels``
+    _base, dot, extension = posixpath.basename(name).rpartition(".")
+    return content_types.defaults.get(extension.lower()) if dot else None
+
+
+def check_content_types(scanners: dict[str, PartScanner], names: set[str]) -> Iterator[dict[str, Any]]:
+    content_types = scanners.get(CONTENT_TYPES_PART)
+    if content_types is None:
+        yield issue("CONTENT_TYPE_MISSING", f"{CONTENT_TYPES_PART} absent", CONTENT_TYPES_PART)
+        return
+    for name in sorted(names):
+        if name != CONTENT_TYPES_PART and not name.endswith("/") and content_type(content_types, name) is None:
+            yield issue("CONTENT_TYPE_MISSING", "aucun type déclaré", name)
+
+    package = scanners.get("_rels/.rels")
+    main_documents = [rel for rel in package.relationships if rel.get("Type") == OFFICE_DOCUMENT] if package else []
+    if not main_documents:
+        yield issue("MAIN_DOCUMENT_MISSING", "aucune relation officeDocument dans _rels/.rels", "_rels/.rels")
+        return
+    main = unquote(main_documents[0].get("Target", "")).lstrip("/")
+    declared = content_type(content_types, main) or ""
+    # Word refuse d'ouvrir un document principal sans son type WordprocessingML
+    if main in names and "wordprocessingml" not in declared:
+        yield issue("CONTENT_TYPE_MISSING", f"type du document principal incorrect ({declared or 'aucun'})", main)
+
+
+def validate_file(path: str, max_part_bytes: int = DEFAULT_MAX_PART_MB << 20) -> dict[str, Any]:
+    """Valide un .docx (exécuté dans un processus du pool) ; retourne sa ligne de rapport."""
+
+    started = time.perf_counter()
+    issues: list[dict[str, Any]] = []
+    scanners: dict[str, PartScanner] = {}
+    names: set[str] = set()
+    try:
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                name = info.filename
+                if name in names:
+                    issues.append(issue("ZIP_DUPLICATE", "entrée présente plusieurs fois", name))
+                names.add(name)
+                if info.file_size > max_part_bytes:
+                    issues.append(issue("PART_TOO_LARGE", f"{info.file_size} octets décompressés, budget {max_part_bytes}", name))
+                    continue
+                scanner = PartScanner(name) if name.endswith((".xml", ".rels")) else None
+                try:
+                    # La lecture complète vérifie aussi le CRC de l'entrée
+                    with archive.open(info) as stream:
+                        while chunk := stream.read(READ_CHUNK_SIZE):
+                            if scanner is not None:
+                                scanner.feed(chunk)
+                    if scanner is not None:
+                        scanner.feed(b"", final=True)
+                        scanners[name] = scanner
+                        issues.extend(scanner.issues)
+                except expat.ExpatError as exc:
+                    issues.append(issue("XML_MALFORMED", str(exc), name))
+                except (zipfile.BadZipFile, zlib.error, EOFError) as exc:
+                    issues.append(issue("ZIP_CORRUPT", str(exc), name))
+    except (OSError, zipfile.BadZipFile) as exc:
+        issues.append(issue("ZIP_INVALID", str(exc)))
+    else:
+        issues.extend(check_content_types(scanners, names))
+        issues.extend(check_relationships(scanners, names))
+
+    errors = [entry for entry in issues if entry["severity"] == "error"]
+    return {
+        "file": path,
+        "isValid": not errors,
+        "errors": errors,
+        "warnings": [entry for entry in issues if entry["severity"] == "warning"],
+        "parts": len(names),
+        "ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def iter_paths(paths: list[str]) -> Iterator[str]:
+    for path in paths:
+        if os.path.isdir(path):
+            yield from iter_documents(path)
+        else:
+            yield path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="fichiers .docx ou dossiers")
+    parser.add_argument("--output", help="rapport NDJSON (défaut : sortie standard)")
+    parser.add_argument("--workers", type=int, default=None, help="processus (défaut : nombre de cœurs)")
+    parser.add_argument("--max-part-mb", type=int, default=DEFAULT_MAX_PART_MB, help="taille décompressée maximale d'une partie")
+    parser.add_argument("--errors-only", action="store_true", help="n'écrit que les fichiers en erreur ou avec avertissements")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    paths = list(iter_paths(args.paths))
+    counts = {"files": 0, "invalid": 0, "warnings": 0}
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            limits = [args.max_part_mb << 20] * len(paths)
+            for report in pool.map(validate_file, paths, limits, chunksize=16):
+                counts["files"] += 1
+                counts["invalid"] += not report["isValid"]
+                counts["warnings"] += bool(report["warnings"])
+                if args.errors_only and report["isValid"] and not report["warnings"]:
+                    continue
+                output.write(json.dumps(report, ensure_ascii=False) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"{'❌' if counts['invalid'] else '✅'} {counts['files']} fichier(s) en {elapsed:.1f} s "
+        f"({counts['files'] / elapsed if elapsed else 0:.0f}/s) : {counts['invalid']} invalide(s), "
+        f"{counts['warnings']} avec avertissements",
+        file=sys.stderr,
+    )
+    if counts["invalid"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()